@@ -7,6 +7,7 @@ import typer
 
 from domjudge_tool_cli.models import DomServerClient
 from domjudge_tool_cli.services import SUPPORT_API_VERSIONS, SUPPORT_VERSIONS
+from domjudge_tool_cli.services.web.base import HTMLParserBackend
 
 from ._check import (
     check_login_website,
@@ -167,6 +168,39 @@ def config(
     timeout: Optional[float] = typer.Option(None),
     max_connections: Optional[int] = typer.Option(None),
     max_keepalive_connections: Optional[int] = typer.Option(None),
+    retries: int = typer.Option(3, help="Retries of a failed request."),
+    backoff_factor: float = typer.Option(
+        0.5,
+        help="Retry backoff base seconds, doubled on each attempt.",
+    ),
+    adaptive_concurrency: bool = typer.Option(
+        False,
+        help="Lower parallel requests when the server slows down or fails.",
+    ),
+    max_latency: Optional[float] = typer.Option(
+        None,
+        help="Response seconds considered as server overload.",
+    ),
+    cache_dir: Optional[str] = typer.Option(
+        None,
+        help="Local cache directory, default to ~/.cache/domjudge-tool-cli.",
+    ),
+    http_cache: bool = typer.Option(
+        False,
+        help="Cache teams, problems, users and judgement types responses.",
+    ),
+    http_cache_ttl: Optional[float] = typer.Option(
+        None,
+        help="Seconds to reuse cached responses without asking the server.",
+    ),
+    html_parser: Optional[HTMLParserBackend] = typer.Option(
+        None,
+        help="Jury pages HTML parser, default to soup, lxml and stream are opt-in.",
+    ),
+    persist_session: bool = typer.Option(
+        False,
+        help="Keep the web login cookies in a user-only file next to the config.",
+    ),
 ):
     create_config(
         host=host,
@@ -178,4 +212,13 @@ def config(
         timeout=timeout,
         max_connections=max_connections,
         max_keepalive_connections=max_keepalive_connections,
+        retries=retries,
+        backoff_factor=backoff_factor,
+        adaptive_concurrency=adaptive_concurrency,
+        max_latency=max_latency,
+        cache_dir=cache_dir,
+        http_cache=http_cache,
+        http_cache_ttl=http_cache_ttl,
+        html_parser=html_parser.value if html_parser else None,
+        persist_session=persist_session,
     )
@@ -22,8 +22,8 @@ async def get_version(client: DomServerClient):
 
 async def check_login_website(client: DomServerClient):
     DomServerWeb = DomServerWebGateway(client.version)
-    async with DomServerWeb(**client.api_params) as web:
-        await web.login()
+    async with DomServerWeb(**client.api_params, **client.web_params) as web:
+        await web.ensure_login()
         message = typer.style(
             f"Success connect DomJudge {client.version} website.",
             fg=typer.colors.GREEN,
@@ -42,6 +42,15 @@ def create_config(
     timeout: Optional[float] = None,
     max_connections: Optional[int] = None,
     max_keepalive_connections: Optional[int] = None,
+    retries: int = 3,
+    backoff_factor: float = 0.5,
+    adaptive_concurrency: bool = False,
+    max_latency: Optional[float] = None,
+    cache_dir: Optional[str] = None,
+    http_cache: bool = False,
+    http_cache_ttl: Optional[float] = None,
+    html_parser: Optional[str] = None,
+    persist_session: bool = False,
 ) -> DomServerClient:
     typer.echo("*" * len(password))
     dom_server = DomServerClient(
@@ -52,6 +61,15 @@ def create_config(
         timeout=timeout,
         max_connections=max_connections,
         max_keepalive_connections=max_keepalive_connections,
+        retries=retries,
+        backoff_factor=backoff_factor,
+        adaptive_concurrency=adaptive_concurrency,
+        max_latency=max_latency,
+        cache_dir=cache_dir,
+        http_cache=http_cache,
+        http_cache_ttl=http_cache_ttl,
+        html_parser=html_parser,
+        persist_session=persist_session,
         version=version,
         api_version=api_version,
     )
@@ -59,6 +77,8 @@ def create_config(
         f.write(dom_server.json().encode())
         typer.echo("Success config Dom Server.")
 
+    dom_server._config_path = Path("domserver.json")
+
     return dom_server
 
 
@@ -68,6 +88,7 @@ def read_config(path: Optional[Path] = None) -> DomServerClient:
 
     if path.exists() and path.is_file():
         client = DomServerClient.parse_file(path)
+        client._config_path = path
         return client
 
     raise FileNotFoundError(path)
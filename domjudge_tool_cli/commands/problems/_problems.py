@@ -22,8 +22,8 @@ async def download_problems_zips(
         await aio_os.makedirs(folder, exist_ok=True)
 
     DomServerWeb = DomServerWebGateway(client.version)
-    async with DomServerWeb(**client.api_params) as web:
-        await web.login()
+    async with DomServerWeb(**client.api_params, **client.web_params) as web:
+        await web.ensure_login()
         problems = await web.get_problems(exclude, only)
 
         with typer.progressbar(problems, label="Download problems:") as progress:
@@ -1,117 +1,280 @@
-import csv
-from typing import Optional
+import asyncio
+from typing import List, Optional
 
-import httpx
 import typer
-from bs4 import BeautifulSoup
 
 from domjudge_tool_cli.commands.general import general_state, get_or_ask_config
+from domjudge_tool_cli.utils.contest_time import parse_contest_time
 
-app = typer.Typer()
+from ._scoreboard import (
+    ScoreboardExportFormat,
+    compute_scoreboard,
+    export_scoreboard,
+    export_scoreboards,
+    parse_contest_ids,
+    scoreboard_frames,
+    watch_scoreboard,
+)
 
+app = typer.Typer()
 
-def titles(items):
-    headers = ["Rank", "TeamAffiliation", "TeamName", "SolvedCount", "Score"]
-    for item in items:
-        title = item["title"]
-        if title.startswith("problem "):
-            headers.append(title[8:])
-    return headers
 
+@app.command()
+def export(
+    cid: int,
+    filename: str = "export",
+    url: Optional[str] = typer.Option(
+        None,
+        help="Public scoreboard page to scrape instead of the API.",
+    ),
+    path_prefix: Optional[str] = None,
+    format: ScoreboardExportFormat = typer.Option(ScoreboardExportFormat.CSV),
+    public: bool = typer.Option(
+        True,
+        help="The public scoreboard, frozen at the scoreboard freeze.",
+    ),
+):
+    """
+    Export the contest scoreboard.
 
-def get_element_empty(element) -> str:
-    value = ""
-    if element:
-        value = element.text.strip()
-    return value
+    Args:
+        cid: Contest id.
+        filename: File name without the extension.
+    """
+    client = None
+    if not url:
+        client = get_or_ask_config(general_state["config"])
 
+    file_path = f"{filename}.{format.value}"
+    if path_prefix:
+        file_path = f"{path_prefix}/{file_path}"
 
-def scores(element):
-    data = []
-    # Rank
-    data.append(
-        get_element_empty(
-            element.find("td", class_="scorepl"),
-        ),
-    )
-    # TeamAffiliation
-    affiliation_element = element.find("td", class_="scoretn")
-    affiliation = ""
-    if affiliation_element and affiliation_element.find("span", class_="univ"):
-        affiliation = affiliation_element.find("span", class_="univ").text.strip()
-    data.append(affiliation)
-    # TeamName
-    team_name_element = element.find("td", class_="scoretn")
-    team_name = ""
-    if team_name_element and team_name_element.find("span"):
-        team_name = element.find("span").text.split()[-1]
-    data.append(team_name)
-    # SolvedCount
-    data.append(
-        get_element_empty(
-            element.find("td", class_="scorenc"),
-        ),
-    )
-    # Score
-    data.append(
-        get_element_empty(
-            element.find("td", class_="scorett"),
-        ),
+    asyncio.run(
+        export_scoreboard(
+            client,
+            str(cid) if cid else None,
+            file_path,
+            format,
+            url,
+            public,
+        )
     )
-    # Problem Score
-    for el in element.find_all("td", class_="score_cell"):
-        s = el.text.strip().split()
-        if len(s) == 0:
-            data.append("")
-        elif len(s) == 2:
-            data.append("{} {}".format(*s))
-        elif len(s) == 3:
-            data.append("{}/{} {}".format(*s))
-    return data
-
-
-def summary(element):
-    data = [""] * 3
-    data.append(element.find("td", class_="scorenc").text.strip())
-    data.append("")
-    for el in element.find_all("td")[3:]:
-        data.append("/".join(el.text.split()))
-    return data
+    typer.echo(file_path)
 
 
 @app.command()
-def export(
-    cid: int,
+def export_batch(
+    cids: Optional[List[str]] = typer.Argument(
+        None,
+        help="Contest ids or ranges, ex: 3 5-9, every visible contest by default.",
+    ),
     filename: str = "export",
-    url: Optional[str] = None,
     path_prefix: Optional[str] = None,
+    format: Optional[ScoreboardExportFormat] = typer.Option(
+        None,
+        help="Default to csv, and to xlsx with --combined.",
+    ),
+    public: bool = typer.Option(
+        True,
+        help="The public scoreboards, frozen at the scoreboard freeze.",
+    ),
+    combined: bool = typer.Option(
+        False,
+        help="One XLSX workbook with a sheet per contest.",
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        help="Contests exported in parallel, default to config max_connections.",
+    ),
 ):
-    if not url:
-        client = get_or_ask_config(general_state["config"])
-        url = f"{client.host}/public?static=1"
+    """
+    Export the scoreboards of several contests.
+
+    Args:
+        filename: File name prefix, followed by the contest id and the extension.
+    """
+    if combined and format not in (None, ScoreboardExportFormat.XLSX):
+        raise typer.BadParameter("A combined export is an xlsx workbook.")
+    if not format:
+        format = ScoreboardExportFormat.XLSX if combined else ScoreboardExportFormat.CSV
+    contest_ids = parse_contest_ids(cids) if cids else None
+
+    client = get_or_ask_config(general_state["config"])
+
+    file_prefix = filename
+    if path_prefix:
+        file_prefix = f"{path_prefix}/{file_prefix}"
+
+    asyncio.run(
+        export_scoreboards(
+            client,
+            contest_ids,
+            file_prefix,
+            format,
+            public,
+            combined,
+            workers,
+        )
+    )
 
-    cookies = None
-    if cid:
-        cookies = {"domjudge_cid": f"{cid}"}
 
-    res = httpx.get(url, cookies=cookies).content
-    soup = BeautifulSoup(res, "html.parser")
+@app.command()
+def watch(
+    cid: str,
+    interval: float = typer.Option(30, help="Seconds between polls."),
+    output: Optional[str] = typer.Option(
+        None,
+        help="Scoreboard file replaced atomically when the board changes.",
+    ),
+    format: ScoreboardExportFormat = typer.Option(ScoreboardExportFormat.CSV),
+    events: Optional[typer.FileTextWrite] = typer.Option(
+        None,
+        help="JSON lines file of the changes, default to the standard output.",
+    ),
+    public: bool = typer.Option(
+        True,
+        help="The public scoreboard, frozen at the scoreboard freeze.",
+    ),
+    count: Optional[int] = typer.Option(
+        None,
+        help="Stop after this number of polls.",
+    ),
+):
+    """
+    Poll the contest scoreboard and emit rank changes, solves and attempts.
 
-    data = []
-    data.append(titles(soup.find("tr", class_="scoreheader").find_all("th")))
+    Args:
+        cid: Contest id.
+    """
+    client = get_or_ask_config(general_state["config"])
+    try:
+        asyncio.run(
+            watch_scoreboard(
+                client,
+                cid,
+                interval,
+                output,
+                format,
+                events,
+                public,
+                count,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
 
-    elements = soup.find("table", class_="scoreboard").find("tbody").find_all("tr")
-    for element in elements:
-        if element.find("td", class_="scoresummary"):
-            data.append(summary(element))
-        else:
-            data.append(scores(element))
 
-    file_path = f"{filename}.csv"
+@app.command()
+def compute(
+    cid: str,
+    filename: str = "scoreboard",
+    path_prefix: Optional[str] = None,
+    format: ScoreboardExportFormat = typer.Option(ScoreboardExportFormat.CSV),
+    db: Optional[str] = typer.Option(
+        None,
+        help="Contest store from `submissions sync-db`, synced if older than 10 min.",
+    ),
+    penalty: Optional[int] = typer.Option(
+        None,
+        help="Penalty minutes of a rejected try, default to the contest penalty time.",
+    ),
+    exclude_team: Optional[List[str]] = typer.Option(
+        None,
+        help="Team id left out of the board, can be repeated.",
+    ),
+    ignore_problem: Optional[List[str]] = typer.Option(
+        None,
+        help="Problem id or label left out of the board, can be repeated.",
+    ),
+):
+    """
+    Compute the full scoreboard locally from submissions and judgements.
+
+    Args:
+        cid: Contest id.
+        filename: File name without the extension.
+    """
+    client = get_or_ask_config(general_state["config"])
+
+    file_path = f"{filename}.{format.value}"
     if path_prefix:
         file_path = f"{path_prefix}/{file_path}"
 
-    with open(file_path, "w", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        for row in data:
-            writer.writerow(row)
+    asyncio.run(
+        compute_scoreboard(
+            client,
+            cid,
+            file_path,
+            format,
+            db,
+            penalty,
+            exclude_team,
+            ignore_problem,
+        )
+    )
+    typer.echo(file_path)
+
+
+@app.command()
+def frames(
+    cid: str,
+    at: Optional[List[str]] = typer.Option(
+        None,
+        help="Contest time of a frame, ex: 2:30:00, can be repeated.",
+    ),
+    every: Optional[int] = typer.Option(None, help="Minutes between frames."),
+    until: Optional[str] = typer.Option(
+        None,
+        help="Contest time of the last frame, the last judgement by default.",
+    ),
+    filename: str = "scoreboard",
+    path_prefix: Optional[str] = None,
+    format: ScoreboardExportFormat = typer.Option(ScoreboardExportFormat.CSV),
+    db: Optional[str] = typer.Option(
+        None,
+        help="Contest store from `submissions sync-db`, synced if older than 10 min.",
+    ),
+    penalty: Optional[int] = typer.Option(
+        None,
+        help="Penalty minutes of a rejected try, default to the contest penalty time.",
+    ),
+    exclude_team: Optional[List[str]] = typer.Option(
+        None,
+        help="Team id left out of the board, can be repeated.",
+    ),
+    ignore_problem: Optional[List[str]] = typer.Option(
+        None,
+        help="Problem id or label left out of the board, can be repeated.",
+    ),
+):
+    """
+    Replay the scoreboard at contest times, one file per frame named with its
+    contest second.
+
+    Args:
+        cid: Contest id.
+        filename: File name without the second and the extension.
+    """
+    client = get_or_ask_config(general_state["config"])
+
+    file_prefix = filename
+    if path_prefix:
+        file_prefix = f"{path_prefix}/{file_prefix}"
+
+    file_paths = asyncio.run(
+        scoreboard_frames(
+            client,
+            cid,
+            file_prefix,
+            format,
+            [parse_contest_time(it) for it in at or []],
+            every,
+            parse_contest_time(until),
+            db,
+            penalty,
+            exclude_team,
+            ignore_problem,
+        )
+    )
+    for it in file_paths:
+        typer.echo(it)
@@ -0,0 +1,644 @@
+import asyncio
+import csv
+import json
+import os
+import re
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import httpx
+import typer
+from bs4 import BeautifulSoup
+from openpyxl import Workbook
+
+from domjudge_tool_cli.commands.submissions._submissions import open_store
+from domjudge_tool_cli.models import (
+    DomServerClient,
+    Judgement,
+    Problem,
+    Scoreboard,
+    ScoreboardProblem,
+    ScoreboardRow,
+    Submission,
+    Team,
+)
+from domjudge_tool_cli.services.api_client import BaseClient
+from domjudge_tool_cli.services.session import DomServerSession
+from domjudge_tool_cli.services.web.base import get_page_parser
+from domjudge_tool_cli.utils.contest_time import parse_contest_time
+from domjudge_tool_cli.utils.pool import PoolResult, run_pool
+from domjudge_tool_cli.utils.scoreboard import (
+    DEFAULT_PENALTY_MINUTES,
+    ScoreboardEngine,
+    ScoreboardTimeline,
+)
+
+HEADERS = ["Rank", "TeamAffiliation", "TeamName", "SolvedCount", "Score"]
+
+
+class ScoreboardExportFormat(str, Enum):
+    CSV = "csv"
+    JSON = "json"
+    XLSX = "xlsx"
+
+
+def titles(items):
+    headers = list(HEADERS)
+    for item in items:
+        title = item["title"]
+        if title.startswith("problem "):
+            headers.append(title[8:])
+    return headers
+
+
+def get_element_empty(element) -> str:
+    value = ""
+    if element:
+        value = element.text.strip()
+    return value
+
+
+def scores(element):
+    data = []
+    # Rank
+    data.append(
+        get_element_empty(
+            element.find("td", class_="scorepl"),
+        ),
+    )
+    # TeamAffiliation
+    affiliation_element = element.find("td", class_="scoretn")
+    affiliation = ""
+    if affiliation_element and affiliation_element.find("span", class_="univ"):
+        affiliation = affiliation_element.find("span", class_="univ").text.strip()
+    data.append(affiliation)
+    # TeamName
+    team_name_element = element.find("td", class_="scoretn")
+    team_name = ""
+    if team_name_element and team_name_element.find("span"):
+        team_name = element.find("span").text.split()[-1]
+    data.append(team_name)
+    # SolvedCount
+    data.append(
+        get_element_empty(
+            element.find("td", class_="scorenc"),
+        ),
+    )
+    # Score
+    data.append(
+        get_element_empty(
+            element.find("td", class_="scorett"),
+        ),
+    )
+    # Problem Score
+    for el in element.find_all("td", class_="score_cell"):
+        s = el.text.strip().split()
+        if len(s) == 0:
+            data.append("")
+        elif len(s) == 2:
+            data.append("{} {}".format(*s))
+        elif len(s) == 3:
+            data.append("{}/{} {}".format(*s))
+    return data
+
+
+def summary(element):
+    data = [""] * 3
+    data.append(element.find("td", class_="scorenc").text.strip())
+    data.append("")
+    for el in element.find_all("td")[3:]:
+        data.append("/".join(el.text.split()))
+    return data
+
+
+def html_scoreboard_rows(page: bytes, features: str = "html.parser") -> List[List[str]]:
+    """Header and rows scraped from the public scoreboard page."""
+    soup = BeautifulSoup(page, features)
+
+    data = []
+    data.append(titles(soup.find("tr", class_="scoreheader").find_all("th")))
+
+    elements = soup.find("table", class_="scoreboard").find("tbody").find_all("tr")
+    for element in elements:
+        if element.find("td", class_="scoresummary"):
+            data.append(summary(element))
+        else:
+            data.append(scores(element))
+
+    return data
+
+
+def tries_text(count: int) -> str:
+    return f"{count} try" if count == 1 else f"{count} tries"
+
+
+def problem_cell(problem: ScoreboardProblem) -> str:
+    """The scoreboard page cell text, ex: `20/1 try`."""
+    tries = problem.num_judged + problem.num_pending
+    if problem.solved:
+        return f"{problem.time}/{tries_text(tries)}"
+    if tries:
+        return tries_text(tries)
+    return ""
+
+
+def summary_cell(problems: List[ScoreboardProblem]) -> str:
+    """Accepted, rejected and pending tries, then the first solve time."""
+    accepted = sum(1 for it in problems if it.solved)
+    rejected = sum(it.num_judged for it in problems) - accepted
+    pending = sum(it.num_pending for it in problems)
+    times = [it.time for it in problems if it.solved and it.time is not None]
+    first = min(times) if times else "n/a"
+    return f"{accepted}/{rejected}/{pending}/{first}"
+
+
+def scoreboard_rows(
+    scoreboard: Scoreboard,
+    teams: List[Team],
+    problems: List[Problem],
+) -> Iterator[List[Any]]:
+    """
+    Header, team rows and summary row of an API scoreboard, in the columns of
+    the scoreboard page export.
+    """
+    problems = sorted(problems, key=lambda it: it.ordinal)
+    teams_by_id = {it.id: it for it in teams}
+    yield HEADERS + [it.label for it in problems]
+
+    problem_results: Dict[str, List[ScoreboardProblem]] = {it.id: [] for it in problems}
+    num_solved = 0
+    for row in scoreboard.rows:
+        team = teams_by_id.get(row.team_id)
+        cells = {}
+        for it in row.problems:
+            cells[it.problem_id] = problem_cell(it)
+            problem_results.setdefault(it.problem_id, []).append(it)
+
+        num_solved += row.score.num_solved
+        yield [
+            row.rank,
+            (team.affiliation or "") if team else "",
+            (team.display_name or team.name) if team else row.team_id,
+            row.score.num_solved,
+            row.score.total_time,
+            *(cells.get(it.id, "") for it in problems),
+        ]
+
+    yield ["", "", "", num_solved, ""] + [
+        summary_cell(problem_results[it.id]) for it in problems
+    ]
+
+
+def sheet_title(title: str) -> str:
+    """Excel sheet titles are at most 31 characters, without `[]:*?/\\`."""
+    return re.sub(r"[\[\]:*?/\\]", "_", title)[:31]
+
+
+def write_workbook(
+    sheets: Iterable[Tuple[str, Iterable[List[Any]]]],
+    file_path: str,
+) -> None:
+    """Write an XLSX workbook, one sheet of rows per (title, rows)."""
+    workbook = Workbook(write_only=True)
+    for title, rows in sheets:
+        sheet = workbook.create_sheet(sheet_title(title))
+        for row in rows:
+            sheet.append(row)
+    workbook.save(file_path)
+
+
+def write_scoreboard(
+    rows: Iterable[List[Any]],
+    file_path: str,
+    format: ScoreboardExportFormat,
+) -> None:
+    """Write the header then each row as it comes, the first row is the header."""
+    if format == ScoreboardExportFormat.XLSX:
+        write_workbook([("Scoreboard", rows)], file_path)
+        return
+
+    rows = iter(rows)
+    headers = next(rows)
+
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        if format == ScoreboardExportFormat.CSV:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows(rows)
+            return
+
+        f.write("[")
+        for index, row in enumerate(rows):
+            f.write(",\n" if index else "\n")
+            f.write(json.dumps(dict(zip(headers, row)), ensure_ascii=False))
+        f.write("\n]\n")
+
+
+async def get_scoreboard_page(http: BaseClient, url: str, cid: Optional[str]) -> bytes:
+    headers = {"Cookie": f"domjudge_cid={cid}"} if cid else None
+    res = await http.request("GET", url, headers=headers, follow_redirects=True)
+    res.raise_for_status()
+    return res.content
+
+
+async def api_scoreboard_rows(
+    session: DomServerSession,
+    cid: str,
+    public: bool = True,
+) -> Iterator[List[Any]]:
+    scoreboard, teams, problems = await asyncio.gather(
+        session.scoreboard.scoreboard(cid, public),
+        session.teams.all_teams(cid),
+        session.problems.all_problems(cid),
+    )
+    return scoreboard_rows(scoreboard, teams, problems)
+
+
+async def export_scoreboard(
+    client: Optional[DomServerClient],
+    cid: Optional[str],
+    file_path: str,
+    format: ScoreboardExportFormat = ScoreboardExportFormat.CSV,
+    url: Optional[str] = None,
+    public: bool = True,
+) -> None:
+    """
+    Export the contest scoreboard from the API, the public scoreboard page is
+    scraped when `url` is given or when the API refuses the request.
+    """
+    if url or not client:
+        async with BaseClient(url) as http:
+            page = await get_scoreboard_page(http, url, cid)
+        write_scoreboard(html_scoreboard_rows(page), file_path, format)
+        return
+
+    async with DomServerSession(**client.api_params) as session:
+        try:
+            rows = await api_scoreboard_rows(session, cid, public)
+        except httpx.HTTPStatusError as e:
+            typer.echo(
+                f"Scoreboard API fail: {e.response.status_code}, "
+                "export the public scoreboard page.",
+                err=True,
+            )
+            page = await get_scoreboard_page(
+                session,
+                f"{client.host}/public?static=1",
+                cid,
+            )
+            features = get_page_parser(client.html_parser).soup_features
+            rows = html_scoreboard_rows(page, features)
+
+    write_scoreboard(rows, file_path, format)
+
+
+def parse_contest_ids(values: Iterable[str]) -> List[str]:
+    """
+    Contest ids from ids and inclusive ranges, ex: `["3", "5-7,9"]` to
+    `["3", "5", "6", "7", "9"]`, duplicates are dropped.
+    """
+    cids: Dict[str, None] = {}
+    for value in values:
+        for part in value.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            start, sep, end = part.partition("-")
+            if sep:
+                if not (start.isdigit() and end.isdigit()):
+                    raise typer.BadParameter(f"Invalid contest id range {part}.")
+                cids.update((str(it), None) for it in range(int(start), int(end) + 1))
+            else:
+                cids[part] = None
+    return list(cids)
+
+
+async def export_scoreboards(
+    client: DomServerClient,
+    cids: Optional[List[str]],
+    file_prefix: str,
+    format: ScoreboardExportFormat = ScoreboardExportFormat.CSV,
+    public: bool = True,
+    combined: bool = False,
+    workers: Optional[int] = None,
+) -> PoolResult:
+    """
+    Export the scoreboards of `cids`, of every contest visible to the user
+    when None, fetched in parallel over one session.
+
+    Each board is written to `{file_prefix}-{cid}`, or to a sheet of the
+    `{file_prefix}.xlsx` workbook when `combined`, whatever the `format`.
+    """
+    if combined:
+        format = ScoreboardExportFormat.XLSX
+
+    async with DomServerSession(**client.api_params) as session:
+        if cids is None:
+            contests = await session.contests.all_contests()
+            sheet_titles = {it.id: it.shortname for it in contests}
+            cids = [it.id for it in contests]
+        else:
+            sheet_titles = {}
+
+        async def export(cid: str) -> Any:
+            rows = await api_scoreboard_rows(session, cid, public)
+            if combined:
+                return list(rows)
+
+            file_path = f"{file_prefix}-{cid}.{format.value}"
+            write_scoreboard(rows, file_path, format)
+            return file_path
+
+        result = await run_pool(cids, export, client.get_concurrency(workers))
+
+    if combined:
+        file_path = f"{file_prefix}.{format.value}"
+        write_workbook(
+            (
+                (sheet_titles.get(cid, cid), rows)
+                for cid, rows in zip(cids, result.results)
+                if rows is not None
+            ),
+            file_path,
+        )
+        typer.echo(file_path)
+    else:
+        for it in result.results:
+            if it is not None:
+                typer.echo(it)
+
+    for error in result.errors:
+        typer.echo(f"Contest {error.item} export fail: {error.error!r}", err=True)
+    typer.echo(result.summary("contests"))
+    return result
+
+
+def diff_scoreboards(
+    old: Optional[Scoreboard],
+    new: Scoreboard,
+    teams: Dict[str, Team],
+    problems: Dict[str, Problem],
+) -> List[Dict[str, Any]]:
+    """
+    Row changes from `old` to `new` in the new rank order, as `team`, `rank`,
+    `solve` and `attempt` events. The first board has no changes.
+    """
+    if old is None:
+        return []
+
+    old_rows: Dict[str, ScoreboardRow] = {it.team_id: it for it in old.rows}
+    changes = []
+    for row in new.rows:
+        team = teams.get(row.team_id)
+        event = {
+            "contest_time": new.contest_time,
+            "team_id": row.team_id,
+            "team": (team.display_name or team.name) if team else row.team_id,
+        }
+
+        before = old_rows.get(row.team_id)
+        if not before:
+            changes.append({**event, "type": "team", "rank": row.rank})
+            continue
+
+        if before.rank != row.rank:
+            changes.append(
+                {**event, "type": "rank", "from": before.rank, "to": row.rank}
+            )
+
+        before_problems = {it.problem_id: it for it in before.problems}
+        for it in row.problems:
+            previous = before_problems.get(it.problem_id)
+            if not previous:
+                previous = ScoreboardProblem(problem_id=it.problem_id)
+
+            problem = problems.get(it.problem_id)
+            label = it.label or (problem.label if problem else it.problem_id)
+            if it.solved and not previous.solved:
+                changes.append(
+                    {
+                        **event,
+                        "type": "solve",
+                        "problem": label,
+                        "time": it.time,
+                        "tries": it.num_judged,
+                        "first_to_solve": it.first_to_solve,
+                    }
+                )
+            elif not it.solved and (it.num_judged, it.num_pending) != (
+                previous.num_judged,
+                previous.num_pending,
+            ):
+                changes.append(
+                    {
+                        **event,
+                        "type": "attempt",
+                        "problem": label,
+                        "judged": it.num_judged,
+                        "pending": it.num_pending,
+                    }
+                )
+
+    return changes
+
+
+def replace_scoreboard_file(
+    rows: Iterable[List[Any]],
+    file_path: str,
+    format: ScoreboardExportFormat,
+) -> None:
+    """Write a temporary file then rename it, readers never see a partial file."""
+    temp_path = f"{file_path}.tmp"
+    write_scoreboard(rows, temp_path, format)
+    os.replace(temp_path, file_path)
+
+
+async def watch_scoreboard(
+    client: DomServerClient,
+    cid: str,
+    interval: float = 30,
+    output: Optional[str] = None,
+    format: ScoreboardExportFormat = ScoreboardExportFormat.CSV,
+    events: Optional[typer.FileTextWrite] = None,
+    public: bool = True,
+    count: Optional[int] = None,
+) -> None:
+    """
+    Poll the scoreboard on one session with conditional requests, print the
+    changes as JSON lines and replace `output` when the board changes.
+
+    Args:
+        events: JSON lines file of the changes, default to the standard output.
+        count: Stop after this number of polls, never by default.
+    """
+    async with DomServerSession(**client.api_params) as session:
+        teams = {it.id: it for it in await session.teams.all_teams(cid)}
+        problems = {it.id: it for it in await session.problems.all_problems(cid)}
+
+        validators: Dict[str, str] = {}
+        previous: Optional[Scoreboard] = None
+        polls = 0
+        while True:
+            try:
+                scoreboard, validators = await session.scoreboard.poll(
+                    cid,
+                    public,
+                    validators,
+                )
+            except httpx.HTTPError as e:
+                typer.echo(f"Scoreboard poll fail: {e!r}", err=True)
+                scoreboard = None
+
+            # The same last event id is the same board.
+            if scoreboard and not (
+                previous
+                and scoreboard.event_id
+                and scoreboard.event_id == previous.event_id
+            ):
+                if any(it.team_id not in teams for it in scoreboard.rows):
+                    teams = {it.id: it for it in await session.teams.all_teams(cid)}
+
+                changes = diff_scoreboards(previous, scoreboard, teams, problems)
+                for change in changes:
+                    line = json.dumps(change, ensure_ascii=False)
+                    if events:
+                        events.write(f"{line}\n")
+                        events.flush()
+                    else:
+                        typer.echo(line)
+
+                if output and (changes or not previous):
+                    rows = scoreboard_rows(
+                        scoreboard,
+                        list(teams.values()),
+                        list(problems.values()),
+                    )
+                    replace_scoreboard_file(rows, output, format)
+                previous = scoreboard
+
+            polls += 1
+            if count and polls >= count:
+                return
+            await asyncio.sleep(interval)
+
+
+async def load_contest(
+    client: DomServerClient,
+    cid: str,
+    db: Optional[str] = None,
+    penalty_minutes: Optional[int] = None,
+    exclude_teams: Optional[List[str]] = None,
+    ignore_problems: Optional[List[str]] = None,
+) -> Tuple[ScoreboardEngine, List[Submission], List[Judgement]]:
+    """
+    An empty engine of the contest with its submissions and judgements, from
+    the contest store, a synced `db` needs no request to the server.
+
+    Args:
+        penalty_minutes: Default to the contest penalty time, else 20.
+    """
+    async with DomServerSession(**client.api_params) as session:
+        store = await open_store(session, cid, db)
+
+    with store:
+        contest = store.contest(cid)
+        if penalty_minutes is None:
+            penalty_minutes = DEFAULT_PENALTY_MINUTES
+            if contest and contest.penalty_time is not None:
+                penalty_minutes = contest.penalty_time
+
+        engine = ScoreboardEngine(
+            store.teams(cid),
+            store.problems(cid),
+            store.judgement_types(cid),
+            penalty_minutes,
+            exclude_teams or [],
+            ignore_problems or [],
+            store.groups(cid),
+            parse_contest_time(contest.duration) if contest else None,
+        )
+        return engine, store.submissions(cid), store.judgements(cid)
+
+
+async def compute_scoreboard(
+    client: DomServerClient,
+    cid: str,
+    file_path: str,
+    format: ScoreboardExportFormat = ScoreboardExportFormat.CSV,
+    db: Optional[str] = None,
+    penalty_minutes: Optional[int] = None,
+    exclude_teams: Optional[List[str]] = None,
+    ignore_problems: Optional[List[str]] = None,
+) -> ScoreboardEngine:
+    """Compute the scoreboard from the submissions and judgements."""
+    engine, submissions, judgements = await load_contest(
+        client,
+        cid,
+        db,
+        penalty_minutes,
+        exclude_teams,
+        ignore_problems,
+    )
+    engine.load(submissions, judgements)
+
+    rows = scoreboard_rows(engine.scoreboard(), engine.teams, engine.problems)
+    write_scoreboard(rows, file_path, format)
+    return engine
+
+
+def frame_times(
+    end_time: float,
+    times: Optional[List[float]] = None,
+    every: Optional[int] = None,
+) -> List[float]:
+    """
+    Frame contest times, every `every` minutes up to and with `end_time`, and
+    only `end_time` without `times` nor `every`. Times are whole seconds, a
+    frame file is named with its second.
+    """
+    end_time = round(end_time)
+    result = {round(it) for it in times or []}
+    if every:
+        result.update(range(0, int(end_time), every * 60))
+        result.add(end_time)
+    if not result:
+        result.add(end_time)
+    return sorted(result)
+
+
+async def scoreboard_frames(
+    client: DomServerClient,
+    cid: str,
+    file_prefix: str,
+    format: ScoreboardExportFormat = ScoreboardExportFormat.CSV,
+    times: Optional[List[float]] = None,
+    every: Optional[int] = None,
+    until: Optional[float] = None,
+    db: Optional[str] = None,
+    penalty_minutes: Optional[int] = None,
+    exclude_teams: Optional[List[str]] = None,
+    ignore_problems: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    Write the scoreboard at each frame time to `{file_prefix}-{seconds}`, the
+    frames are replayed in one pass over the events.
+    """
+    engine, submissions, judgements = await load_contest(
+        client,
+        cid,
+        db,
+        penalty_minutes,
+        exclude_teams,
+        ignore_problems,
+    )
+    timeline = ScoreboardTimeline(engine, submissions, judgements)
+    end_time = until if until is not None else timeline.end_time
+
+    file_paths = []
+    for seconds, scoreboard in timeline.frames(frame_times(end_time, times, every)):
+        file_path = f"{file_prefix}-{seconds:05d}.{format.value}"
+        rows = scoreboard_rows(scoreboard, engine.teams, engine.problems)
+        write_scoreboard(rows, file_path, format)
+        file_paths.append(file_path)
+
+    return file_paths
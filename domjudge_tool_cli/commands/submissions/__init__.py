@@ -5,20 +5,60 @@ import typer
 
 from domjudge_tool_cli.commands.general import general_state, get_or_ask_config
 from domjudge_tool_cli.commands.submissions._submissions import (
+    SourceFetchMode,
+    SubmissionFilters,
     download_contest_files,
     download_submission_files,
     get_submissions,
+    mirror_contest,
+    sync_contest_store,
 )
+from domjudge_tool_cli.utils.contest_time import parse_contest_time
 
 app = typer.Typer()
 
 
+def check_contest_time(value: Optional[str]) -> Optional[str]:
+    try:
+        parse_contest_time(value)
+    except ValueError:
+        raise typer.BadParameter(f"{value!r} is not a contest time, ex: 1:30:00.")
+    return value
+
+
 @app.command()
 def submission_list(
     cid: str,
     language_id: Optional[str] = None,
     strict: Optional[bool] = False,
     ids: Optional[List[str]] = None,
+    team_id: Optional[str] = None,
+    problem_id: Optional[str] = None,
+    verdict: Optional[str] = typer.Option(
+        None,
+        help="Judgement type id or name, ex: AC or wrong_answer.",
+    ),
+    since: Optional[str] = typer.Option(
+        None,
+        help="Contest time, ex: 1:30:00.",
+        callback=check_contest_time,
+    ),
+    until: Optional[str] = typer.Option(
+        None,
+        help="Contest time, ex: 2:00:00.",
+        callback=check_contest_time,
+    ),
+    db: Optional[str] = typer.Option(
+        None,
+        help=(
+            "Query this sync-db database instead of the API, synced again "
+            "when older than 10 minutes."
+        ),
+    ),
+    refresh: bool = typer.Option(
+        False,
+        help="Sync the --db database again even if it was synced recently.",
+    ),
 ):
     """
     Console log submissions.
@@ -27,13 +67,32 @@ def submission_list(
         language_id:
         strict:
         ids: Submission ids.
+        team_id: Team id.
+        problem_id: Problem id.
+        verdict: Current verdict.
+        since: Submitted at or after this contest time.
+        until: Submitted before this contest time.
+        db: Local contest database file.
+        refresh: Sync the database before the query.
     """
     submission_ids = None
     if ids:
         submission_ids = ids.split(",")
 
+    filters = SubmissionFilters(team_id, problem_id, verdict, since, until)
     client = get_or_ask_config(general_state["config"])
-    asyncio.run(get_submissions(client, cid, language_id, strict, submission_ids))
+    asyncio.run(
+        get_submissions(
+            client,
+            cid,
+            language_id,
+            strict,
+            submission_ids,
+            db,
+            filters,
+            refresh,
+        )
+    )
 
 
 @app.command()
@@ -52,6 +111,23 @@ def submission_file(
     path: Optional[str] = None,
     strict: Optional[bool] = False,
     is_extract: bool = True,
+    fetch_mode: SourceFetchMode = typer.Option(
+        SourceFetchMode.SOURCE,
+        help="source: decode the source-code endpoint, archive: download zip files.",
+    ),
+    use_cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse and fill the local submission files cache.",
+    ),
+    link_files: bool = typer.Option(
+        False,
+        "--link/--copy",
+        help=(
+            "Hardlink output files to the read-only cache files instead of "
+            "copying them, do not edit linked outputs in place."
+        ),
+    ),
 ):
     """
     Download a submission source code files.
@@ -62,6 +138,9 @@ def submission_file(
         path: Output path.
         strict:
         is_extract: unzip file if true.
+        fetch_mode: Source files fetch mode.
+        use_cache: Copy output files from the local cache.
+        link_files: Hardlink output files to the cache, they are read-only.
     """
     client = get_or_ask_config(general_state["config"])
     asyncio.run(
@@ -73,6 +152,9 @@ def submission_file(
             path,
             strict,
             is_extract,
+            fetch_mode,
+            use_cache,
+            link_files,
         )
     )
 
@@ -92,6 +174,58 @@ def contest_files(
     path: Optional[str] = None,
     strict: Optional[bool] = False,
     is_extract: bool = True,
+    concurrency: Optional[int] = typer.Option(
+        None,
+        help="Parallel downloads, default to config max_connections.",
+    ),
+    incremental: bool = typer.Option(
+        True,
+        help="Skip submissions already in the output manifest.",
+    ),
+    fetch_mode: SourceFetchMode = typer.Option(
+        SourceFetchMode.SOURCE,
+        help="source: decode the source-code endpoint, archive: download zip files.",
+    ),
+    use_cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse and fill the local submission files cache.",
+    ),
+    link_files: bool = typer.Option(
+        False,
+        "--link/--copy",
+        help=(
+            "Hardlink output files to the read-only cache files instead of "
+            "copying them, do not edit linked outputs in place."
+        ),
+    ),
+    team_id: Optional[str] = None,
+    problem_id: Optional[str] = None,
+    verdict: Optional[str] = typer.Option(
+        None,
+        help="Judgement type id or name, ex: AC or wrong_answer.",
+    ),
+    since: Optional[str] = typer.Option(
+        None,
+        help="Contest time, ex: 1:30:00.",
+        callback=check_contest_time,
+    ),
+    until: Optional[str] = typer.Option(
+        None,
+        help="Contest time, ex: 2:00:00.",
+        callback=check_contest_time,
+    ),
+    db: Optional[str] = typer.Option(
+        None,
+        help=(
+            "Query this sync-db database instead of the API, synced again "
+            "when older than 10 minutes."
+        ),
+    ),
+    refresh: bool = typer.Option(
+        False,
+        help="Sync the --db database again even if it was synced recently.",
+    ),
 ):
     """
     Download a contest all submissions source code files.
@@ -101,7 +235,20 @@ def contest_files(
         path: Output path.
         strict:
         is_extract: unzip file if true.
+        concurrency: Number of parallel downloads.
+        incremental: Only download new or re-judged submissions.
+        fetch_mode: Source files fetch mode.
+        use_cache: Copy output files from the local cache.
+        link_files: Hardlink output files to the cache, they are read-only.
+        team_id: Team id.
+        problem_id: Problem id.
+        verdict: Current verdict.
+        since: Submitted at or after this contest time.
+        until: Submitted before this contest time.
+        db: Local contest database file.
+        refresh: Sync the database before the query.
     """
+    filters = SubmissionFilters(team_id, problem_id, verdict, since, until)
     client = get_or_ask_config(general_state["config"])
     asyncio.run(
         download_contest_files(
@@ -111,5 +258,50 @@ def contest_files(
             path,
             strict,
             is_extract,
+            concurrency,
+            incremental,
+            fetch_mode,
+            use_cache,
+            link_files,
+            db,
+            filters,
+            refresh,
         )
     )
+
+
+@app.command()
+def sync_db(
+    cid: str,
+    db: str = typer.Option("contest.sqlite3", help="Database file."),
+):
+    """
+    Download a contest users, teams, problems, submissions and judgements
+    into a local SQLite database for `--db` queries.
+    Args:
+        cid: Contest id.
+        db: Database file.
+    """
+    client = get_or_ask_config(general_state["config"])
+    asyncio.run(sync_contest_store(client, cid, db))
+
+
+@app.command()
+def mirror(
+    cid: str,
+    path: Optional[str] = None,
+    follow: bool = typer.Option(
+        False,
+        help="Keep listening to the event feed until interrupted.",
+    ),
+):
+    """
+    Mirror a contest teams, problems, submissions and judgements locally
+    from the event feed, resuming from the last received event.
+    Args:
+        cid: Contest id.
+        path: Mirror file directory.
+        follow: Keep the event feed open.
+    """
+    client = get_or_ask_config(general_state["config"])
+    asyncio.run(mirror_contest(client, cid, path, follow))
@@ -1,16 +1,99 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+import time
+from contextlib import nullcontext
+from enum import Enum
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 import typer
 from tablib import Dataset
 
-from domjudge_tool_cli.models import DomServerClient, Submission
-from domjudge_tool_cli.services.api.v4 import (
-    JudgementAPI,
-    JudgementTypeAPI,
-    ProblemsAPI,
-    SubmissionsAPI,
-    TeamsAPI,
-)
+from domjudge_tool_cli.models import DomServerClient, Judgement, Submission
+from domjudge_tool_cli.services.session import DomServerSession
+from domjudge_tool_cli.utils.contest_time import parse_contest_time
+from domjudge_tool_cli.utils.manifest import SubmissionManifest
+from domjudge_tool_cli.utils.mirror import MIRROR_TYPES, ContestMirror
+from domjudge_tool_cli.utils.pool import run_pool
+from domjudge_tool_cli.utils.store import ContestStore, current_judgements, verdict_name
+
+# A `--db` store synced longer ago than this is synced again when opened.
+STORE_MAX_AGE = 10 * 60
+
+
+class SourceFetchMode(str, Enum):
+    SOURCE = "source"
+    ARCHIVE = "archive"
+
+    def resolve(self, is_extract: bool) -> "SourceFetchMode":
+        # Keeping the zip files needs the archive endpoint.
+        return self if is_extract else SourceFetchMode.ARCHIVE
+
+    def output(self, is_extract: bool) -> str:
+        """The manifest output of a resolved mode: `source`, `zip` or `extracted`."""
+        if self == SourceFetchMode.SOURCE:
+            return "source"
+        return "extracted" if is_extract else "zip"
+
+
+class SubmissionFilters(NamedTuple):
+    team_id: Optional[str] = None
+    problem_id: Optional[str] = None
+    verdict: Optional[str] = None
+    since: Optional[str] = None
+    until: Optional[str] = None
+
+    def is_set(self) -> bool:
+        return any(it is not None for it in self)
+
+    def query(self) -> Dict[str, Any]:
+        return dict(
+            team_id=self.team_id,
+            problem_id=self.problem_id,
+            verdict=self.verdict,
+            since=parse_contest_time(self.since),
+            until=parse_contest_time(self.until),
+        )
+
+    def apply(
+        self,
+        submissions: List[Submission],
+        judgements: Dict[str, Judgement],
+        verdicts: Dict[str, str],
+    ) -> List[Submission]:
+        """
+        Filter API submissions like `ContestStore.submissions`.
+
+        Args:
+            judgements: Current judgement by submission id.
+            verdicts: Verdict name by judgement type id.
+        """
+        query = self.query()
+        result = []
+        for it in submissions:
+            if self.team_id and it.team_id != self.team_id:
+                continue
+            if self.problem_id and it.problem_id != self.problem_id:
+                continue
+
+            seconds = parse_contest_time(it.contest_time)
+            if query["since"] is not None and (
+                seconds is None or seconds < query["since"]
+            ):
+                continue
+            if query["until"] is not None and (
+                seconds is None or seconds >= query["until"]
+            ):
+                continue
+
+            if self.verdict:
+                judgement = judgements.get(it.id)
+                if judgement is None or self.verdict not in (
+                    judgement.judgement_type_id,
+                    verdicts.get(judgement.judgement_type_id),
+                ):
+                    continue
+
+            result.append(it)
+        return result
 
 
 def gen_submission_dataset(submissions: List[Any]) -> Dataset:
@@ -25,6 +108,10 @@ def gen_submission_dataset(submissions: List[Any]) -> Dataset:
 
 
 def print_submissions_table(submissions: List[Submission]):
+    if not submissions:
+        typer.echo("No submissions.")
+        return
+
     dataset = gen_submission_dataset(submissions)
     # ["id", "team_id", "problem_id", "language_id",
     # "files", "entry_point", "time", "contest_time", "externalid"]
@@ -54,23 +141,81 @@ def index_by_id(objs):
     return data
 
 
+async def current_verdicts(
+    session: DomServerSession,
+    cid: str,
+) -> Tuple[Dict[str, Judgement], Dict[str, str]]:
+    """
+    The current judgement by submission id, with the same rule as the contest
+    store, and the verdict name by judgement type id.
+    """
+    judgement_types, judgements = await asyncio.gather(
+        session.judgement_types.all_judgement_types(cid),
+        session.judgements.all_judgements(cid),
+    )
+    verdicts = {it.id: verdict_name(it) for it in judgement_types}
+    return current_judgements(judgements), verdicts
+
+
+def verdict_mapping(
+    judgements: Dict[str, Judgement],
+    verdicts: Dict[str, str],
+) -> Dict[str, str]:
+    """Submission id to its current verdict name, ex: `wrong_answer`."""
+    return {
+        submission_id: verdicts.get(it.judgement_type_id)
+        for submission_id, it in judgements.items()
+    }
+
+
 async def judgement_submission_mapping(
-    client: DomServerClient,
+    session: DomServerSession,
     cid: str,
 ) -> Dict[str, str]:
-    async with JudgementTypeAPI(**client.api_params) as api:
-        judgement_types = await api.all_judgement_types(cid)
+    return verdict_mapping(*await current_verdicts(session, cid))
 
-    async with JudgementAPI(**client.api_params) as api:
-        judgements = await api.all_judgements(cid)
 
-    judgement_type_mapping = {
-        item.id: str(item.name).lower().replace(" ", "_") for item in judgement_types
-    }
-    return {
-        item.submission_id: judgement_type_mapping.get(item.judgement_type_id)
-        for item in judgements
-    }
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+async def open_store(
+    session: DomServerSession,
+    cid: str,
+    db: Optional[str] = None,
+    refresh: bool = False,
+) -> ContestStore:
+    """
+    Open the contest store at `db`, syncing it first if the contest was never
+    synced, was synced more than `STORE_MAX_AGE` seconds ago or on `refresh`.
+    Without `db` an in-memory store is synced for this command only.
+    """
+    store = ContestStore(db or ":memory:")
+    synced_at = store.synced_at(cid)
+    age = time.time() - synced_at if synced_at is not None else None
+    if age is None or refresh or age > STORE_MAX_AGE:
+        typer.echo(f"Sync contest {cid} to {db or 'memory'}.")
+        await store.sync(session, cid)
+    else:
+        typer.echo(
+            f"Contest {cid} in {db} synced {format_age(age)} ago, "
+            "--refresh to sync it again."
+        )
+    return store
+
+
+async def sync_contest_store(client: DomServerClient, cid: str, db: str):
+    async with DomServerSession(**client.api_params) as session:
+        with ContestStore(db) as store:
+            counts = await store.sync(session, cid, users=True)
+
+    counts = ", ".join(f"{key}: {value}" for key, value in counts.items())
+    typer.echo(f"Synced contest {cid}, {counts}.")
+    typer.echo(f"Database file: {db}")
 
 
 async def get_submissions(
@@ -79,14 +224,31 @@ async def get_submissions(
     language_id: Optional[str] = None,
     strict: Optional[bool] = False,
     ids: Optional[List[str]] = None,
+    db: Optional[str] = None,
+    filters: SubmissionFilters = SubmissionFilters(),
+    refresh: bool = False,
 ):
-    async with SubmissionsAPI(**client.api_params) as api:
-        submissions = await api.all_submissions(
-            cid,
-            language_id=language_id,
-            strict=strict,
-            ids=ids,
-        )
+    async with DomServerSession(**client.api_params) as session:
+        if db:
+            with await open_store(session, cid, db, refresh) as store:
+                submissions = store.submissions(
+                    cid,
+                    language_id=language_id,
+                    ids=ids,
+                    **filters.query(),
+                )
+        else:
+            submissions = await session.submissions.all_submissions(
+                cid,
+                language_id=language_id,
+                strict=strict,
+                ids=ids,
+            )
+            if filters.is_set():
+                judgements, verdicts = {}, {}
+                if filters.verdict:
+                    judgements, verdicts = await current_verdicts(session, cid)
+                submissions = filters.apply(submissions, judgements, verdicts)
 
         print_submissions_table(submissions)
 
@@ -99,32 +261,46 @@ async def download_submission_files(
     path_prefix: Optional[str] = None,
     strict: Optional[bool] = False,
     is_extract: bool = True,
+    fetch_mode: SourceFetchMode = SourceFetchMode.SOURCE,
+    use_cache: bool = True,
+    link_files: bool = False,
 ):
-    judgement_mapping = await judgement_submission_mapping(client, cid)
-    async with SubmissionsAPI(**client.api_params) as api:
-        submission = await api.submission(cid, id)
-
-        async with TeamsAPI(**client.api_params) as team_api:
-            team = await team_api.team(cid, submission.team_id)
-
-        async with ProblemsAPI(**client.api_params) as problem_api:
-            problem = await problem_api.problem(cid, submission.problem_id)
-
-        submission_file = await api.submission_file_name(cid, id)
-        submission_filename = submission_file.filename.split(".")[0]
-        judgement_name = judgement_mapping.get(id)
-        submission_filename = f"{submission_filename}_{judgement_name}"
-
-        path = file_path(cid, mode, path_prefix, team, problem)
-        typer.echo(f"Output path: {path}.")
-        await api.submission_files(
-            cid,
-            id,
-            submission_filename,
-            path,
-            strict,
-            is_extract,
-        )
+    fetch_mode = fetch_mode.resolve(is_extract)
+    file_cache = client.submission_file_cache() if use_cache else None
+    with file_cache or nullcontext():
+        async with DomServerSession(**client.api_params) as session:
+            judgement_mapping = await judgement_submission_mapping(session, cid)
+            api = session.submissions
+            api.file_cache = file_cache
+            api.link_files = link_files
+            submission = await api.submission(cid, id)
+            team = await session.teams.team(cid, submission.team_id)
+            problem = await session.problems.problem(cid, submission.problem_id)
+
+            source_files = await api.source_files(cid, id)
+            submission_filename = source_files[0][0].split(".")[0]
+            judgement_name = judgement_mapping.get(id)
+            submission_filename = f"{submission_filename}_{judgement_name}"
+
+            path = file_path(cid, mode, path_prefix, team, problem)
+            typer.echo(f"Output path: {path}.")
+            if fetch_mode == SourceFetchMode.SOURCE:
+                await api.submission_sources(
+                    cid,
+                    id,
+                    submission_filename,
+                    path,
+                    source_files,
+                )
+            else:
+                await api.submission_files(
+                    cid,
+                    id,
+                    submission_filename,
+                    path,
+                    strict,
+                    is_extract,
+                )
 
 
 async def download_contest_files(
@@ -134,46 +310,149 @@ async def download_contest_files(
     path_prefix: Optional[str] = None,
     strict: Optional[bool] = False,
     is_extract: bool = True,
+    concurrency: Optional[int] = None,
+    incremental: bool = True,
+    fetch_mode: SourceFetchMode = SourceFetchMode.SOURCE,
+    use_cache: bool = True,
+    link_files: bool = False,
+    db: Optional[str] = None,
+    filters: SubmissionFilters = SubmissionFilters(),
+    refresh: bool = False,
 ):
-    judgement_mapping = await judgement_submission_mapping(client, cid)
+    fetch_mode = fetch_mode.resolve(is_extract)
+    output = fetch_mode.output(is_extract)
+    concurrency = client.get_concurrency(concurrency)
     typer.echo(f"Download contest files, cid: {cid}.")
-    async with SubmissionsAPI(**client.api_params) as api:
-        submissions = await api.all_submissions(cid)
-
-        async with TeamsAPI(**client.api_params) as team_api:
-            teams = await team_api.all_teams(cid)
+    manifest = SubmissionManifest(path_prefix or ".", cid)
+    if incremental:
+        manifest.load()
+
+    file_cache = client.submission_file_cache() if use_cache else None
+    with file_cache or nullcontext():
+        async with DomServerSession(**client.api_params) as session:
+            api = session.submissions
+            api.file_cache = file_cache
+            api.link_files = link_files
+            if db:
+                with await open_store(session, cid, db, refresh) as store:
+                    judgement_mapping = store.judgement_mapping(cid)
+                    submissions = store.submissions(cid, **filters.query())
+                    teams = store.teams(cid)
+                    problems = store.problems(cid)
+            else:
+                (
+                    (judgements, verdicts),
+                    submissions,
+                    teams,
+                    problems,
+                ) = await asyncio.gather(
+                    current_verdicts(session, cid),
+                    api.all_submissions(cid),
+                    session.teams.all_teams(cid),
+                    session.problems.all_problems(cid),
+                )
+                judgement_mapping = verdict_mapping(judgements, verdicts)
+                if filters.is_set():
+                    submissions = filters.apply(submissions, judgements, verdicts)
             teams_mapping = index_by_id(teams)
-
-        async with ProblemsAPI(**client.api_params) as problem_api:
-            problems = await problem_api.all_problems(cid)
             problems_mapping = index_by_id(problems)
 
-        async def get_source_codes(submission) -> None:
-            id = submission.id
+            tasks = []
+            for submission in submissions:
+                if (
+                    submission.team_id not in teams_mapping
+                    or submission.problem_id not in problems_mapping
+                ):
+                    continue
 
-            if (
-                submission.team_id not in teams_mapping
-                or submission.problem_id not in problems_mapping
-            ):
-                return
+                team = teams_mapping[submission.team_id]
+                problem = problems_mapping[submission.problem_id]
+                judgement_name = judgement_mapping.get(submission.id)
+                path = file_path(cid, mode, path_prefix, team, problem)
 
-            team = teams_mapping[submission.team_id]
-            problem = problems_mapping[submission.problem_id]
-            judgement_name = judgement_mapping.get(id)
+                if manifest.is_fresh(submission.id, judgement_name, path, output):
+                    continue
 
-            path = file_path(cid, mode, path_prefix, team, problem)
-            await api.submission_files(
-                cid,
-                id,
-                judgement_name,
-                path,
-                strict,
-                is_extract,
+                manifest.discard_stale(submission.id, judgement_name, output)
+                tasks.append((submission, judgement_name, path))
+
+            typer.echo(
+                f"{len(tasks)} submissions to download, "
+                f"{len(submissions) - len(tasks)} skipped."
             )
 
-        count = 0
-        with typer.progressbar(submissions) as progress:
-            for task in progress:
-                count += 1
-                await get_source_codes(task)
-        typer.echo(f"Download {count} submissions.")
+            async def get_source_codes(task) -> None:
+                submission, judgement_name, path = task
+                if fetch_mode == SourceFetchMode.SOURCE:
+                    output_path = await api.submission_sources(
+                        cid,
+                        submission.id,
+                        judgement_name,
+                        path,
+                    )
+                else:
+                    output_path = await api.submission_files(
+                        cid,
+                        submission.id,
+                        judgement_name,
+                        path,
+                        strict,
+                        is_extract,
+                    )
+                if output_path:
+                    await manifest.record(
+                        submission.id,
+                        judgement_name,
+                        output_path,
+                        output,
+                    )
+
+            try:
+                with typer.progressbar(
+                    length=len(tasks),
+                    label="Download submissions:",
+                ) as progress:
+                    result = await run_pool(
+                        tasks,
+                        get_source_codes,
+                        concurrency,
+                        on_done=lambda _: progress.update(1),
+                    )
+            finally:
+                manifest.save()
+
+    for error in result.errors:
+        submission, _, _ = error.item
+        typer.echo(
+            f"Submission {submission.id} download fail: {error.error!r}",
+            err=True,
+        )
+    typer.echo(result.summary("submissions"))
+
+
+async def mirror_contest(
+    client: DomServerClient,
+    cid: str,
+    path_prefix: Optional[str] = None,
+    follow: bool = False,
+):
+    mirror = ContestMirror(path_prefix or ".", cid).load()
+    typer.echo(f"Mirror contest {cid} since token: {mirror.token or 'start'}.")
+
+    changes = 0
+    async with DomServerSession(**client.api_params) as session:
+        try:
+            async for event in session.event_feed.events(
+                cid,
+                since_token=mirror.token,
+                types=list(MIRROR_TYPES),
+                stream=follow,
+            ):
+                if mirror.apply(event):
+                    changes += 1
+        finally:
+            mirror.save()
+
+    counts = ", ".join(f"{key}: {value}" for key, value in mirror.counts().items())
+    typer.echo(f"Applied {changes} changes, {counts}.")
+    typer.echo(f"Mirror file: {mirror.path}")
@@ -6,6 +6,7 @@ import typer
 
 from domjudge_tool_cli.commands.general import general_state, get_or_ask_config
 from domjudge_tool_cli.commands.users._users import (
+    ImportBackend,
     UserExportFormat,
     create_teams_and_users,
     delete_teams_and_users,
@@ -15,6 +16,7 @@ from domjudge_tool_cli.commands.users._users import (
 
 __all__ = [
     "app",
+    "ImportBackend",
     "UserExportFormat",
     "create_teams_and_users",
     "delete_teams_and_users",
@@ -38,6 +40,10 @@ def user_list(
         None,
         help="Export file name",
     ),
+    db: Optional[str] = typer.Option(
+        None,
+        help="Query this submissions sync-db database instead of the API.",
+    ),
 ):
     """
     Get DOMjudge users info.
@@ -46,13 +52,14 @@ def user_list(
         team_id: Team id
         format: Export file format.
         file: Export file name.
+        db: Local contest database file.
     """
     user_ids = None
     if ids:
         user_ids = ids.split(",")
 
     client = get_or_ask_config(general_state["config"])
-    asyncio.run(get_users(client, user_ids, team_id, format, file))
+    asyncio.run(get_users(client, user_ids, team_id, format, file, db))
 
 
 @app.command()
@@ -95,8 +102,17 @@ def import_users_teams(
     file: typer.FileText = typer.Argument(...),
     category_id: Optional[int] = typer.Option(None),
     affiliation_id: Optional[int] = typer.Option(None),
-    user_roles: Optional[List[int]] = typer.Option(None),
-    enabled: bool = typer.Option(True),
+    user_roles: Optional[List[int]] = typer.Option(
+        None,
+        help=(
+            "User role ids, default to config user_roles. With the api backend, "
+            "roles other than the team role (3) are set with the web user form."
+        ),
+    ),
+    enabled: bool = typer.Option(
+        True,
+        help="With the api backend, disabled users go through the web user form.",
+    ),
     format: Optional[UserExportFormat] = None,
     ignore_existing: bool = typer.Option(False),
     delete_existing: bool = typer.Option(False),
@@ -105,6 +121,22 @@ def import_users_teams(
         None, help="Random charset, ex: 0123456789"
     ),
     new_password: bool = typer.Option(False),
+    workers: Optional[int] = typer.Option(
+        None,
+        help="Users imported in parallel, default to config max_connections.",
+    ),
+    backend: ImportBackend = typer.Option(
+        ImportBackend.WEB,
+        help=(
+            "web: jury forms per user, api: bulk API import files for existing "
+            "users and rows with a team_id column, new teams without an id are "
+            "created with the web team form."
+        ),
+    ),
+    dry_run: bool = typer.Option(
+        False,
+        help="Only print the create, update and delete plan.",
+    ),
 ):
     client = get_or_ask_config(general_state["config"])
     asyncio.run(
@@ -121,6 +153,9 @@ def import_users_teams(
             password_length,
             password_pattern,
             new_password,
+            workers,
+            backend,
+            dry_run,
         ),
     )
 
@@ -129,6 +164,10 @@ def import_users_teams(
 def rm_teams_and_users(
     include: Optional[List[str]] = typer.Option(None),
     exclude: Optional[List[str]] = typer.Option(None),
+    workers: Optional[int] = typer.Option(
+        None,
+        help="Parallel deletes, default to config max_connections.",
+    ),
 ):
     client = get_or_ask_config(general_state["config"])
     asyncio.run(
@@ -136,5 +175,6 @@ def rm_teams_and_users(
             client,
             include,
             exclude,
+            workers,
         ),
     )
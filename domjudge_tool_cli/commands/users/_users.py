@@ -1,13 +1,27 @@
+import hashlib
+import time
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
+import httpx
 import typer
 from tablib import Dataset
 
 from domjudge_tool_cli.models import CreateUser, DomServerClient, User
-from domjudge_tool_cli.services.api.v4 import UsersAPI
-from domjudge_tool_cli.services.web import DomServerWebGateway
+from domjudge_tool_cli.services.session import DomServerSession
+from domjudge_tool_cli.services.web.affiliations import AffiliationIndex
+from domjudge_tool_cli.services.web.base import BaseDomServerWeb
+from domjudge_tool_cli.utils.import_plan import (
+    ImportAction,
+    ImportSnapshot,
+    PlannedUser,
+    plan_import,
+    user_state,
+)
 from domjudge_tool_cli.utils.password import gen_password
+from domjudge_tool_cli.utils.pool import PoolResult, TaskError, run_pool
+from domjudge_tool_cli.utils.store import ContestStore
 
 
 def gen_user_dataset(users: List[Any]) -> Dataset:
@@ -46,7 +60,37 @@ class UserExportFormat(str, Enum):
                 return name
 
 
+class ImportBackend(str, Enum):
+    WEB = "web"
+    API = "api"
+
+
+def import_snapshot_path(client: DomServerClient) -> Path:
+    host = hashlib.sha256(str(client.host).rstrip("/").encode()).hexdigest()
+    return client.get_cache_dir() / "imports" / f"{host[:16]}.json"
+
+
+def print_import_plan(plan: List[PlannedUser]):
+    dataset = Dataset(headers=["action", "username", "changes"])
+    for it in plan:
+        if it.action != ImportAction.NOOP:
+            dataset.append([it.action.value, it.user.username, ",".join(it.changes)])
+
+    if dataset.height:
+        typer.echo(dataset.export("cli", tablefmt="simple"))
+
+    counts = ", ".join(
+        f"{sum(1 for it in plan if it.action == action)} {action.value}"
+        for action in ImportAction
+    )
+    typer.echo(f"Plan: {counts}.")
+
+
 def print_users_table(users: List[User]):
+    if not users:
+        typer.echo("No users.")
+        return
+
     dataset = gen_user_dataset(users)
     for rm_key in ["last_login_time", "first_login_time", "roles", "last_ip", "ip"]:
         del dataset[rm_key]
@@ -59,15 +103,20 @@ async def get_users(
     team_id: Optional[str] = None,
     format: Optional[UserExportFormat] = None,
     file: Optional[typer.FileBinaryWrite] = None,
+    db: Optional[str] = None,
 ):
-    async with UsersAPI(**client.api_params) as api:
-        users = await api.all_users(ids, team_id)
+    if db:
+        with ContestStore(db) as store:
+            users = store.users(ids, team_id)
+    else:
+        async with DomServerSession(**client.api_params) as session:
+            users = await session.users.all_users(ids, team_id)
 
-    if ids:
-        users = list(filter(lambda obj: obj.id in ids, users))
+        if ids:
+            users = list(filter(lambda obj: obj.id in ids, users))
 
-    if team_id:
-        users = list(filter(lambda obj: obj.team_id == team_id, users))
+        if team_id:
+            users = list(filter(lambda obj: obj.team_id == team_id, users))
 
     if format:
         format.export(users, file)
@@ -79,11 +128,81 @@ async def get_user(
     client: DomServerClient,
     id: str,
 ):
-    async with UsersAPI(**client.api_params) as api:
-        user = await api.get_user(id)
+    async with DomServerSession(**client.api_params) as session:
+        user = await session.users.get_user(id)
     print_users_table([user])
 
 
+async def create_team(
+    client: DomServerClient,
+    web: BaseDomServerWeb,
+    user: Union[CreateUser, User],
+    category_id: int,
+    affiliation_id: Optional[int] = None,
+    enabled: bool = True,
+    affiliations: Optional[AffiliationIndex] = None,
+) -> Tuple[str, Optional[str]]:
+    """
+    Create or update the team of a user.
+
+    Args:
+        affiliations: An affiliation index to share across users.
+
+    Returns:
+        (team_id, user_id), the user id of a new team is None, see
+        `resolve_user_ids`.
+    """
+    await web.ensure_login()
+    if not affiliation_id and not user.affiliation:
+        affiliation_id = client.affiliation_id
+    elif user.affiliation:
+        if not affiliations:
+            affiliations = AffiliationIndex(web, client.affiliation_country)
+
+        affiliation = await affiliations.get_or_create(user.affiliation)
+        affiliation_id = affiliation.id
+
+    if isinstance(user, User):
+        return await web.update_team(user, category_id, affiliation_id, enabled)
+
+    team_id = await web.create_team_and_user(
+        user,
+        category_id,
+        affiliation_id,
+        enabled,
+    )
+    return team_id, None
+
+
+async def resolve_user_ids(
+    session: DomServerSession,
+    team_ids: List[str],
+) -> Dict[str, str]:
+    """User id by team id from one users request, instead of a team page each."""
+    if len(team_ids) == 1:
+        users = await session.users.all_users(team_id=team_ids[0], cache=False)
+    else:
+        users = await session.users.all_users(cache=False)
+
+    team_ids = set(team_ids)
+    return {it.team_id: it.id for it in users if it.team_id in team_ids}
+
+
+def assign_passwords(
+    users: List[Union[CreateUser, User]],
+    password_length: Optional[int] = None,
+    password_pattern: Optional[str] = None,
+    new_password: bool = False,
+) -> None:
+    """
+    Generate the passwords of new users without one, or of every user with
+    `new_password`. An updated user without a password keeps its current one.
+    """
+    for user in users:
+        if new_password or (not user.password and not isinstance(user, User)):
+            user.password = gen_password(password_length, password_pattern)
+
+
 async def create_team_and_user(
     client: DomServerClient,
     user: Union[CreateUser, User],
@@ -94,54 +213,340 @@ async def create_team_and_user(
     password_length: Optional[int] = None,
     password_pattern: Optional[str] = None,
     new_password: bool = False,
+    session: Optional[DomServerSession] = None,
+    affiliations: Optional[AffiliationIndex] = None,
 ) -> CreateUser:
+    """
+    Create or update a user team and set the user password.
+
+    Args:
+        session: A session to reuse, its web client logs in once.
+        affiliations: An affiliation index to share across users.
+    """
+    if not session:
+        async with DomServerSession(**client.api_params) as session:
+            return await create_team_and_user(
+                client,
+                user,
+                category_id,
+                affiliation_id,
+                user_roles,
+                enabled,
+                password_length,
+                password_pattern,
+                new_password,
+                session,
+                affiliations,
+            )
+
     if not category_id:
         category_id = client.category_id
 
     if not user_roles:
         user_roles = client.user_roles
 
-    if not user.password or new_password:
-        user.password = gen_password(password_length, password_pattern)
+    assign_passwords([user], password_length, password_pattern, new_password)
 
-    DomServerWeb = DomServerWebGateway(client.version)
-    async with DomServerWeb(**client.api_params) as web:
-        await web.login()
-        if not affiliation_id and not user.affiliation:
-            affiliation_id = client.affiliation_id
-        elif user.affiliation:
-            affiliation = await web.get_affiliation(user.affiliation)
+    web = session.web(client.version, **client.web_params)
+    team_id, user_id = await create_team(
+        client,
+        web,
+        user,
+        category_id,
+        affiliation_id,
+        enabled,
+        affiliations,
+    )
+    if not user_id:
+        user_ids = await resolve_user_ids(session, [team_id])
+        user_id = user_ids.get(team_id)
+        assert user_id, f"User of team {team_id} not found."
 
-            if affiliation:
-                affiliation_id = affiliation.id
-            else:
-                name = user.affiliation
-                affiliation = await web.create_affiliation(
-                    name,
-                    name,
-                    client.affiliation_country,
-                )
-                affiliation_id = affiliation.id
+    await web.set_user_password(user_id, user.password, user_roles, enabled)
+
+    return CreateUser.from_user(user) if isinstance(user, User) else user
+
+
+# DOMjudge `team` role, the role the import API gives team accounts.
+TEAM_ROLE_ID = 3
 
+
+def needs_user_form(user_roles: Optional[List[int]], enabled: bool) -> bool:
+    """
+    The import API enables accounts with the team role only, other roles or a
+    disabled account need the web user form.
+    """
+    return not enabled or bool(user_roles and set(user_roles) != {TEAM_ROLE_ID})
+
+
+def gen_import_payloads(
+    users: List[Union[CreateUser, User]],
+    category_id: int,
+    affiliation_id: Optional[int] = None,
+    affiliation_ids: Optional[Dict[str, str]] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Convert users with a team id to CCS JSON import files.
+
+    Existing accounts keep their ids, new ones get their id from the server.
+
+    Args:
+        affiliation_ids: Affiliation id by name, from `AffiliationIndex`.
+
+    Returns:
+        (teams, accounts)
+    """
+    affiliation_ids = affiliation_ids or {}
+    teams = []
+    accounts = []
+    for user in users:
+        team_id = user.team_id
+        assert team_id, f"Team id of {user.username} missing."
+
+        organization_id = str(affiliation_id) if affiliation_id else None
+        if user.affiliation:
+            organization_id = affiliation_ids[user.affiliation]
+
+        teams.append(
+            {
+                "id": team_id,
+                "name": user.username,
+                "display_name": user.name,
+                "group_ids": [str(category_id)],
+                "organization_id": organization_id,
+            }
+        )
+        account = {
+            "username": user.username,
+            "type": "team",
+            "team_id": team_id,
+            "name": user.name,
+        }
+        if user.password:
+            account["password"] = user.password
         if isinstance(user, User):
-            team_id, user_id = await web.update_team(
-                user,
-                category_id,
-                affiliation_id,
+            account["id"] = user.id
+        accounts.append(account)
+
+    return teams, accounts
+
+
+async def import_teams_and_users_api(
+    session: DomServerSession,
+    client: DomServerClient,
+    users: List[Union[CreateUser, User]],
+    category_id: Optional[int] = None,
+    affiliation_id: Optional[int] = None,
+    user_roles: Optional[List[int]] = None,
+    enabled: bool = True,
+    password_length: Optional[int] = None,
+    password_pattern: Optional[str] = None,
+    new_password: bool = False,
+    workers: Optional[int] = None,
+) -> PoolResult:
+    """
+    Upload the users with a team id with the API import files, one request per
+    file. New teams without an id go through the web team form, the server
+    gives them their ids.
+
+    Affiliations are looked up by name or shortname and created when missing,
+    like the web backend. The API can not set other roles than the team role
+    nor disable accounts, the imported users then also go through the web
+    user form.
+    """
+    start = time.monotonic()
+    category_id = category_id or client.category_id
+    affiliation_id = affiliation_id or client.affiliation_id
+    assign_passwords(users, password_length, password_pattern, new_password)
+
+    web = session.web(client.version, **client.web_params)
+    affiliations = AffiliationIndex(web, client.affiliation_country)
+    imported = [(index, it) for index, it in enumerate(users) if it.team_id]
+    created = [(index, it) for index, it in enumerate(users) if not it.team_id]
+
+    results: List[Any] = [None] * len(users)
+    errors: List[TaskError] = []
+    if created:
+        typer.echo(f"Create {len(created)} new teams with the web form.")
+        result = await create_teams_and_users_web(
+            client,
+            session,
+            [it for _, it in created],
+            category_id,
+            affiliation_id,
+            user_roles,
+            enabled,
+            new_password=False,
+            workers=workers,
+            affiliations=affiliations,
+        )
+        for (index, _), new_user in zip(created, result.results):
+            results[index] = new_user
+        for error in result.errors:
+            errors.append(TaskError(created[error.index][0], error.item, error.error))
+
+    if not imported:
+        errors.sort(key=lambda it: it.index)
+        return PoolResult(results, errors, time.monotonic() - start)
+
+    try:
+        affiliation_ids = {}
+        for name in {it.affiliation for _, it in imported if it.affiliation}:
+            await web.ensure_login()
+            affiliation_ids[name] = (await affiliations.get_or_create(name)).id
+
+        teams, accounts = gen_import_payloads(
+            [it for _, it in imported],
+            category_id,
+            affiliation_id,
+            affiliation_ids,
+        )
+        typer.echo(f"Import {len(teams)} teams.")
+        await session.users.import_teams(teams)
+        typer.echo(f"Import {len(accounts)} accounts.")
+        await session.users.import_accounts(accounts)
+    except (AssertionError, httpx.HTTPError) as e:
+        message = e.response.text if isinstance(e, httpx.HTTPStatusError) else e
+        typer.echo(f"Import fail: {message!s}", err=True)
+        errors.extend(TaskError(index, user, e) for index, user in imported)
+        errors.sort(key=lambda it: it.index)
+        return PoolResult(results, errors, time.monotonic() - start)
+
+    new_users = [
+        (index, CreateUser.from_user(it) if isinstance(it, User) else it)
+        for index, it in imported
+    ]
+    if needs_user_form(user_roles, enabled):
+        user_ids = {
+            it.username: it.id for it in await session.users.all_users(cache=False)
+        }
+        await web.ensure_login()
+
+        async def set_user(item: Tuple[int, CreateUser]) -> CreateUser:
+            _, user = item
+            user_id = user_ids[user.username]
+            await web.set_user_password(
+                user_id,
+                user.password,
+                user_roles or [TEAM_ROLE_ID],
                 enabled,
             )
-            user = CreateUser.from_user(user)
-        else:
-            team_id, user_id = await web.create_team_and_user(
-                user,
-                category_id,
-                affiliation_id,
-                enabled,
+            return user
+
+        with typer.progressbar(length=len(new_users), label="Set users:") as progress:
+            result = await run_pool(
+                new_users,
+                set_user,
+                client.get_concurrency(workers),
+                on_done=lambda _: progress.update(1),
             )
+        for (index, _), new_user in zip(new_users, result.results):
+            results[index] = new_user
+        for error in result.errors:
+            index, user = error.item
+            errors.append(TaskError(index, user, error.error))
+    else:
+        for index, new_user in new_users:
+            results[index] = new_user
+
+    errors.sort(key=lambda it: it.index)
+    return PoolResult(results, errors, time.monotonic() - start)
+
+
+async def create_teams_and_users_web(
+    client: DomServerClient,
+    session: DomServerSession,
+    users: List[Union[CreateUser, User]],
+    category_id: Optional[int] = None,
+    affiliation_id: Optional[int] = None,
+    user_roles: Optional[List[int]] = None,
+    enabled: bool = True,
+    password_length: Optional[int] = None,
+    password_pattern: Optional[str] = None,
+    new_password: bool = False,
+    workers: Optional[int] = None,
+    affiliations: Optional[AffiliationIndex] = None,
+) -> PoolResult:
+    """
+    Create or update the teams, resolve the new user ids with one users request,
+    then set the user passwords.
+
+    Args:
+        affiliations: An affiliation index to share with other imports.
+    """
+    start = time.monotonic()
+    category_id = category_id or client.category_id
+    user_roles = user_roles or client.user_roles
+    concurrency = client.get_concurrency(workers)
+    assign_passwords(users, password_length, password_pattern, new_password)
+
+    # One login for the whole batch, the web client logs in again if the
+    # session expires.
+    web = session.web(client.version, **client.web_params)
+    if users:
+        await web.ensure_login()
+    if not affiliations:
+        affiliations = AffiliationIndex(web, client.affiliation_country)
+
+    async def create(user: Union[CreateUser, User]) -> Tuple[str, Optional[str]]:
+        return await create_team(
+            client,
+            web,
+            user,
+            category_id,
+            affiliation_id,
+            enabled,
+            affiliations,
+        )
+
+    with typer.progressbar(length=len(users), label="Import teams:") as progress:
+        teams = await run_pool(
+            users,
+            create,
+            concurrency,
+            on_done=lambda _: progress.update(1),
+        )
+
+    new_team_ids = [it[0] for it in teams.results if it and not it[1]]
+    user_ids = {}
+    if new_team_ids:
+        try:
+            user_ids = await resolve_user_ids(session, new_team_ids)
+        except httpx.HTTPError as e:
+            typer.echo(f"Users list fail: {e!r}", err=True)
+
+    created = [
+        (index, user, team)
+        for index, (user, team) in enumerate(zip(users, teams.results))
+        if team
+    ]
+
+    async def set_user(item: Tuple[int, Any, Tuple[str, Optional[str]]]) -> CreateUser:
+        _, user, (team_id, user_id) = item
+        user_id = user_id or user_ids.get(team_id)
+        assert user_id, f"User of team {team_id} not found."
 
         await web.set_user_password(user_id, user.password, user_roles, enabled)
+        return CreateUser.from_user(user) if isinstance(user, User) else user
+
+    with typer.progressbar(length=len(created), label="Set users:") as progress:
+        passwords = await run_pool(
+            created,
+            set_user,
+            concurrency,
+            on_done=lambda _: progress.update(1),
+        )
+
+    results = [None] * len(users)
+    errors = list(teams.errors)
+    for (index, _, _), new_user in zip(created, passwords.results):
+        results[index] = new_user
+    for error in passwords.errors:
+        index, user, _ = error.item
+        errors.append(TaskError(index, user, error.error))
 
-        return user
+    errors.sort(key=lambda it: it.index)
+    return PoolResult(results, errors, time.monotonic() - start)
 
 
 async def create_teams_and_users(
@@ -157,12 +562,10 @@ async def create_teams_and_users(
     password_length: Optional[int] = None,
     password_pattern: Optional[str] = None,
     new_password: bool = False,
+    workers: Optional[int] = None,
+    backend: ImportBackend = ImportBackend.WEB,
+    dry_run: bool = False,
 ) -> None:
-    async with UsersAPI(**client.api_params) as api:
-        users = await api.all_users()
-
-    existing_users: Dict[str, User] = {it.username: it for it in users}
-
     if not format:
         format = UserExportFormat.CSV
 
@@ -170,52 +573,73 @@ async def create_teams_and_users(
     if format == UserExportFormat.CSV:
         input_file = file.read().replace("\ufeff", "")
 
-    users = []
-    delete_users = []
+    category_id = category_id or client.category_id
+    user_roles = user_roles or client.user_roles
     dataset = Dataset().load(input_file, format=format.value)
-
+    input_users = []
     for item in dataset.dict:
         item["email"] = None if not item.get("email") else item["email"]
-        user = CreateUser(**item)
-
-        username = user.username
-        if username in existing_users:
-            existing_user = existing_users[username]
-
-            if delete_existing:
-                delete_users.append(existing_user.username)
-
-            if ignore_existing:
-                typer.echo(f"User {user.username} is ignored")
-                continue
-
-            if not delete_existing and not ignore_existing:
-                existing_user.update(**item)
-                users.append(existing_user)
-                continue
-
-        users.append(user)
+        input_users.append(CreateUser(**item))
+
+    snapshot = ImportSnapshot(import_snapshot_path(client)).load()
+    async with DomServerSession(**client.api_params) as session:
+        users = await session.users.all_users(cache=False)
+        existing_users: Dict[str, User] = {it.username: it for it in users}
+
+        plan = plan_import(
+            input_users,
+            existing_users,
+            snapshot,
+            category_id,
+            affiliation_id or client.affiliation_id,
+            user_roles,
+            enabled,
+            ignore_existing,
+            delete_existing,
+            new_password,
+        )
+        print_import_plan(plan)
+        if dry_run:
+            return
 
-    if delete_users:
-        delete_teams = [
-            existing_users[username].team_id
-            for username in delete_users
-            if existing_users[username].team_id
+        delete_users = [it.user for it in plan if it.action == ImportAction.DELETE]
+        operations = [
+            it for it in plan if it.action in (ImportAction.CREATE, ImportAction.UPDATE)
         ]
-        DomServerWeb = DomServerWebGateway(client.version)
-        async with DomServerWeb(**client.api_params) as web:
-            await web.login()
-            typer.echo("Delete existing users.")
-            await web.delete_users(delete_users)
-            typer.echo("Delete existing teams.")
-            await web.delete_teams(delete_teams)
-
-    new_users = []
-    with typer.progressbar(users) as progress:
-        for user in progress:
-            new_user = await create_team_and_user(
+
+        if delete_users:
+            typer.echo("Delete existing users and teams.")
+            await delete_users_and_teams_by_id(
                 client,
-                user,
+                session,
+                delete_users,
+                [it.team_id for it in delete_users if it.team_id],
+                workers,
+            )
+            for it in delete_users:
+                snapshot.forget(it.username)
+            snapshot.save()
+
+        users = [it.user for it in operations]
+        if backend == ImportBackend.API:
+            result = await import_teams_and_users_api(
+                session,
+                client,
+                users,
+                category_id,
+                affiliation_id,
+                user_roles,
+                enabled,
+                password_length,
+                password_pattern,
+                new_password,
+                workers,
+            )
+        else:
+            result = await create_teams_and_users_web(
+                client,
+                session,
+                users,
                 category_id,
                 affiliation_id,
                 user_roles,
@@ -223,47 +647,147 @@ async def create_teams_and_users(
                 password_length,
                 password_pattern,
                 new_password,
+                workers,
+            )
+
+    for new_user in result.results:
+        if new_user:
+            state = user_state(
+                new_user,
+                category_id,
+                affiliation_id or client.affiliation_id,
+                user_roles,
+                enabled,
             )
-            new_users.append(new_user)
+            snapshot.record(new_user.username, state)
+    snapshot.save()
 
+    new_users = [it for it in result.results if it]
     if new_users:
         file_name = format.export(new_users, name="import-users-teams-out")
         typer.echo(file_name)
 
+    if result.errors:
+        for error in result.errors:
+            typer.echo(
+                f"User {error.item.username} import fail: {error.error!r}",
+                err=True,
+            )
+
+        # The failed input rows, ready to import again.
+        retry_dataset = Dataset(headers=dataset.headers)
+        for error in result.errors:
+            retry_dataset.append(dataset[operations[error.index].index])
+
+        file_name = f"import-users-teams-retry.{format.value}"
+        with open(file_name, "w") as f:
+            f.write(retry_dataset.export(format.value))
+        typer.echo(f"Retry file: {file_name}", err=True)
+
+    typer.echo(result.summary("users"))
+
+
+async def delete_by_ids(
+    ids: List[str],
+    delete: Callable[[str], Awaitable[None]],
+    concurrency: int,
+    name: str,
+) -> PoolResult:
+    with typer.progressbar(length=len(ids), label=f"Delete {name}s:") as progress:
+        result = await run_pool(
+            ids,
+            delete,
+            concurrency,
+            on_done=lambda _: progress.update(1),
+        )
+
+    for error in result.errors:
+        typer.echo(
+            f"{name.title()} {error.item} delete fail: {error.error!r}", err=True
+        )
+    typer.echo(result.summary(f"{name}s"))
+    return result
+
+
+async def delete_users_and_teams_by_id(
+    client: DomServerClient,
+    session: DomServerSession,
+    users: List[User],
+    team_ids: List[str],
+    workers: Optional[int] = None,
+) -> bool:
+    """
+    Delete users and teams by their API ids, then check a fresh listing.
+
+    Returns:
+        True if every user and team is gone.
+    """
+    concurrency = client.get_concurrency(workers)
+    web = session.web(client.version, **client.web_params)
+    await web.ensure_login()
+    await delete_by_ids([it.id for it in users], web.delete_user, concurrency, "user")
+    await delete_by_ids(team_ids, web.delete_team, concurrency, "team")
+
+    remaining_ids = {it.id for it in await session.users.all_users(cache=False)}
+    remaining_users = [it.username for it in users if it.id in remaining_ids]
+    result = await run_pool(team_ids, web.team_exists, concurrency)
+    remaining_teams = [
+        team_id for team_id, exists in zip(team_ids, result.results) if exists
+    ]
+    remaining_teams.extend(str(it.item) for it in result.errors)
+
+    if remaining_users:
+        typer.echo(f"Users not deleted: {', '.join(remaining_users)}", err=True)
+    if remaining_teams:
+        typer.echo(f"Teams not deleted: {', '.join(remaining_teams)}", err=True)
+    return not remaining_users and not remaining_teams
+
 
 async def delete_teams_and_users(
     client: DomServerClient,
     include: Optional[List[str]] = None,
     exclude: Optional[List[str]] = None,
+    workers: Optional[int] = None,
 ) -> None:
     default_ignore_users = ["admin", "judgehost", client.username]
 
-    async with UsersAPI(**client.api_params) as api:
-        users = await api.all_users()
+    async with DomServerSession(**client.api_params) as session:
+        users = await session.users.all_users(cache=False)
 
-    existing_users = [it.username for it in users]
+        existing_users = [it.username for it in users]
 
-    if not exclude:
-        exclude = default_ignore_users
+        if not exclude:
+            exclude = default_ignore_users
 
-    if not include:
-        include = existing_users
+        if not include:
+            include = existing_users
 
-    if include:
-        include = list(
-            filter(
-                lambda it: it not in default_ignore_users,
-                include,
+        if include:
+            include = list(
+                filter(
+                    lambda it: it not in default_ignore_users,
+                    include,
+                )
             )
-        )
 
-    include_teams = [it.team_id for it in users if it.username in include]
-    exclude_teams = [it.team_id for it in users if it.username in exclude]
+        include = set(map(lambda it: it.lower(), include))
+        exclude = set(map(lambda it: it.lower(), exclude))
+        delete_users = [
+            it
+            for it in users
+            if it.username.lower() in include and it.username.lower() not in exclude
+        ]
+        exclude_teams = {it.team_id for it in users if it.username.lower() in exclude}
+        delete_teams = [
+            it.team_id
+            for it in delete_users
+            if it.team_id and it.team_id not in exclude_teams
+        ]
 
-    DomServerWeb = DomServerWebGateway(client.version)
-    async with DomServerWeb(**client.api_params) as web:
-        await web.login()
-        typer.echo("Delete users.")
-        await web.delete_users(include, exclude)
-        typer.echo("Delete teams.")
-        await web.delete_teams(include_teams, exclude_teams)
+        await delete_users_and_teams_by_id(
+            client,
+            session,
+            delete_users,
+            delete_teams,
+            workers,
+        )
@@ -1,8 +1,12 @@
 from .affiliation import Affiliation
+from .contest import Contest
 from .domserver import DomServerClient
+from .group import Group
 from .judgement_types import JudgementType
 from .judgements import Judgement
+from .manifest import ManifestEntry
 from .problem import Problem, ProblemItem
+from .scoreboard import Scoreboard, ScoreboardProblem, ScoreboardRow, ScoreboardScore
 from .submission import Submission, SubmissionFile
 from .team import Team
 from .user import CreateUser, User
@@ -17,6 +21,13 @@ __all__ = (
     "Problem",
     "ProblemItem",
     "Affiliation",
+    "Contest",
+    "Group",
     "Judgement",
     "JudgementType",
+    "ManifestEntry",
+    "Scoreboard",
+    "ScoreboardRow",
+    "ScoreboardScore",
+    "ScoreboardProblem",
 )
@@ -0,0 +1,29 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class Contest(BaseModel):
+    """
+    {
+      "id": "2",
+      "shortname": "demo",
+      "name": "Demo contest",
+      "formal_name": "Demo contest",
+      "start_time": "2022-04-22T09:00:00.000+08:00",
+      "end_time": "2022-04-22T14:00:00.000+08:00",
+      "duration": "5:00:00.000",
+      "scoreboard_freeze_duration": "1:00:00.000",
+      "penalty_time": 20
+    }
+    """
+
+    id: str
+    shortname: str
+    name: str
+    formal_name: Optional[str] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    duration: Optional[str] = None
+    scoreboard_freeze_duration: Optional[str] = None
+    penalty_time: Optional[int] = None
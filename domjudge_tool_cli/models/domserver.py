@@ -1,7 +1,17 @@
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import httpx
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, PrivateAttr
+
+from domjudge_tool_cli.services.cache import (
+    DEFAULT_CACHE_MAX_SIZE,
+    HTTPCache,
+    SubmissionFileCache,
+    default_cache_dir,
+)
+from domjudge_tool_cli.services.policy import AIMDLimiter, RetryPolicy
+from domjudge_tool_cli.utils.pool import DEFAULT_CONCURRENCY
 
 
 class DomServerClient(BaseModel):
@@ -12,6 +22,17 @@ class DomServerClient(BaseModel):
     timeout: Optional[float] = None
     max_connections: Optional[int] = None
     max_keepalive_connections: Optional[int] = None
+    retries: int = 3
+    backoff_factor: float = 0.5
+    max_backoff: float = 30.0
+    adaptive_concurrency: bool = False
+    max_latency: Optional[float] = None
+    cache_dir: Optional[str] = None
+    cache_max_size: int = DEFAULT_CACHE_MAX_SIZE
+    http_cache: bool = False
+    http_cache_ttl: Optional[float] = None
+    html_parser: Optional[str] = None
+    persist_session: bool = False
     category_id: Optional[int] = None
     affiliation_id: Optional[int] = None
     affiliation_country: Optional[str] = "TWN"
@@ -19,6 +40,8 @@ class DomServerClient(BaseModel):
     version: str = "7.3.2"
     api_version: str = "v4"
 
+    _config_path: Optional[Path] = PrivateAttr(None)
+
     @property
     def get_timeout(self) -> Optional["httpx.Timeout"]:
         if self.timeout:
@@ -32,6 +55,62 @@ class DomServerClient(BaseModel):
                 max_keepalive_connections=self.max_keepalive_connections,
             )
 
+    def get_concurrency(self, concurrency: Optional[int] = None) -> int:
+        if not concurrency:
+            return self.max_connections or DEFAULT_CONCURRENCY
+
+        if self.max_connections:
+            return min(concurrency, self.max_connections)
+
+        return concurrency
+
+    @property
+    def get_retry_policy(self) -> "RetryPolicy":
+        return RetryPolicy(
+            retries=self.retries,
+            backoff_factor=self.backoff_factor,
+            max_backoff=self.max_backoff,
+        )
+
+    @property
+    def get_limiter(self) -> Optional["AIMDLimiter"]:
+        if self.adaptive_concurrency:
+            return AIMDLimiter(
+                max_limit=self.get_concurrency(),
+                max_latency=self.max_latency,
+            )
+
+    def get_cache_dir(self) -> Path:
+        return Path(self.cache_dir) if self.cache_dir else default_cache_dir()
+
+    def submission_file_cache(self) -> "SubmissionFileCache":
+        return SubmissionFileCache(
+            self.get_cache_dir() / "submissions",
+            self.cache_max_size,
+        )
+
+    @property
+    def get_http_cache(self) -> Optional["HTTPCache"]:
+        if self.http_cache:
+            return HTTPCache(
+                self.get_cache_dir() / "http",
+                self.http_cache_ttl,
+                self.cache_max_size,
+            )
+
+    @property
+    def cookie_jar_path(self) -> Optional[Path]:
+        """Web session cookies file next to the config file, ex: `domserver.cookies.json`."""
+        if self.persist_session and self._config_path:
+            return self._config_path.with_name(f"{self._config_path.stem}.cookies.json")
+
+    @property
+    def web_params(self) -> Dict[str, Any]:
+        return {
+            "html_parser": self.html_parser,
+            "cookie_jar": self.cookie_jar_path,
+        }
+
     @property
     def api_params(self) -> Dict[str, Any]:
         return {
@@ -41,4 +120,7 @@ class DomServerClient(BaseModel):
             "disable_ssl": self.disable_ssl,
             "timeout": self.get_timeout,
             "limits": self.get_limits,
+            "retry_policy": self.get_retry_policy,
+            "limiter": self.get_limiter,
+            "http_cache": self.get_http_cache,
         }
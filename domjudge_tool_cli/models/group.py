@@ -0,0 +1,23 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class Group(BaseModel):
+    """
+    {
+      "hidden": false,
+      "icpc_id": "3",
+      "id": "3",
+      "name": "Participants",
+      "sortorder": 0,
+      "color": null
+    }
+    """
+
+    id: str
+    icpc_id: Optional[str] = None
+    name: str
+    hidden: bool = False
+    sortorder: Optional[int] = None
+    color: Optional[str] = None
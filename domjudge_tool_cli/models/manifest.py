@@ -0,0 +1,24 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ManifestEntry(BaseModel):
+    """
+    {
+    "id": "12653",
+    "verdict": "correct",
+    "path": "problem_A/team_foo/correct_12653.cpp",
+    "size": 1024,
+    "sha256": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+    "output": "source"
+    }
+    """
+
+    id: str
+    verdict: Optional[str]
+    path: str
+    size: int
+    sha256: str
+    # How the files were written: `source`, `zip` or `extracted`.
+    output: Optional[str] = None
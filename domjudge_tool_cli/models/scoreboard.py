@@ -0,0 +1,52 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ScoreboardProblem(BaseModel):
+    label: Optional[str] = None
+    problem_id: str
+    num_judged: int = 0
+    num_pending: int = 0
+    solved: bool = False
+    time: Optional[int] = None
+    first_to_solve: bool = False
+
+
+class ScoreboardScore(BaseModel):
+    num_solved: int = 0
+    total_time: int = 0
+
+
+class ScoreboardRow(BaseModel):
+    """
+    {
+    "rank": 1,
+    "team_id": "2",
+    "score": {"num_solved": 1, "total_time": 20},
+    "problems": [
+        {
+        "label": "A",
+        "problem_id": "1",
+        "num_judged": 1,
+        "num_pending": 0,
+        "solved": true,
+        "time": 20,
+        "first_to_solve": true
+        }
+    ]
+    }
+    """
+
+    rank: Optional[int]
+    team_id: str
+    score: ScoreboardScore
+    problems: List[ScoreboardProblem] = []
+
+
+class Scoreboard(BaseModel):
+    event_id: Optional[str] = None
+    time: Optional[str] = None
+    contest_time: Optional[str] = None
+    state: Optional[dict] = None
+    rows: List[ScoreboardRow] = []
@@ -35,6 +35,8 @@ class CreateUser(BaseModel):
     email: Optional[EmailStr] = None
     password: Optional[str] = None
     affiliation: Optional[str] = None
+    # An id for the new team, the server gives one when empty.
+    team_id: Optional[str] = None
     is_exist: Optional[bool] = None
 
     @classmethod
@@ -1,7 +1,11 @@
+from .contests import ContestsAPI
+from .event_feed import EventFeedAPI
 from .general import GeneralAPI
+from .groups import GroupsAPI
 from .judgement_types import JudgementTypeAPI
 from .judgements import JudgementAPI
 from .problems import ProblemsAPI
+from .scoreboard import ScoreboardAPI
 from .submissions import SubmissionsAPI
 from .teams import TeamsAPI
 from .users import UsersAPI
@@ -14,4 +18,8 @@ __all__ = (
     "ProblemsAPI",
     "JudgementAPI",
     "JudgementTypeAPI",
+    "EventFeedAPI",
+    "ScoreboardAPI",
+    "ContestsAPI",
+    "GroupsAPI",
 )
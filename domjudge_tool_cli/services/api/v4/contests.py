@@ -0,0 +1,21 @@
+from typing import List, Optional
+
+from domjudge_tool_cli.models import Contest
+from domjudge_tool_cli.services.api.v4.base import V4Client
+
+
+class ContestsAPI(V4Client):
+    async def all_contests(
+        self,
+        only_active: Optional[bool] = False,
+    ) -> List[Contest]:
+        """Contests visible to the user."""
+        path = self.make_resource("/contests")
+        params = {"onlyActive": "true"} if only_active else None
+        result = await self.get(path, params)
+        return list(map(lambda it: Contest(**it), result))
+
+    async def contest(self, cid: str) -> Contest:
+        path = self.make_resource(f"/contests/{cid}")
+        result = await self.get(path)
+        return Contest(**result)
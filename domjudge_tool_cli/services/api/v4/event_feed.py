@@ -0,0 +1,53 @@
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from domjudge_tool_cli.services.api.v4.base import V4Client
+
+
+class EventFeedAPI(V4Client):
+    async def events(
+        self,
+        cid: str,
+        since_token: Optional[str] = None,
+        types: Optional[List[str]] = None,
+        stream: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate the contest NDJSON event feed.
+
+        Args:
+            cid: Contest id.
+            since_token: Only events after this token (or event id on DOMjudge 7).
+            types: Only these endpoint types, ex: ["submissions", "judgements"].
+            stream: Keep the connection open and wait for new events if true.
+        """
+        path = self.make_resource(f"/contests/{cid}/event-feed")
+        params = dict(stream="true" if stream else "false")
+
+        if since_token:
+            params["since_token"] = since_token
+            params["since_id"] = since_token
+
+        if types:
+            params["types"] = ",".join(types)
+
+        # The server only sends keep-alive newlines, never time out on reads.
+        timeout = httpx.Timeout(self.client.timeout.connect, read=None)
+        r = await self.request(
+            "GET",
+            path,
+            stream=True,
+            params=params,
+            auth=self.auth,
+            timeout=timeout,
+        )
+        try:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        finally:
+            await r.aclose()
@@ -0,0 +1,15 @@
+from typing import List
+
+from domjudge_tool_cli.models import Group
+from domjudge_tool_cli.services.api.v4.base import V4Client
+
+
+class GroupsAPI(V4Client):
+    async def all_groups(
+        self,
+        cid: str,
+    ) -> List[Group]:
+        """Team categories, a team of hidden groups only is not on the scoreboard."""
+        path = self.make_resource(f"/contests/{cid}/groups")
+        result = await self.get(path, cache=True)
+        return list(map(lambda it: Group(**it), result))
@@ -23,6 +23,7 @@ class JudgementTypeAPI(V4Client):
         response = await self.get(
             path,
             params if params else None,
+            cache=True,
         )
 
         return list(map(lambda it: JudgementType(**it), response))
@@ -11,7 +11,7 @@ class ProblemsAPI(V4Client):
         cid: str,
     ) -> List[Problem]:
         path = self.make_resource(f"/contests/{cid}/problems")
-        result = await self.get(path)
+        result = await self.get(path, cache=True)
         return list(map(lambda it: Problem(**it), result))
 
     async def problem(self, cid: str, id: str) -> Problem:
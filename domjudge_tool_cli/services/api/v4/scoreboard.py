@@ -0,0 +1,53 @@
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from domjudge_tool_cli.models import Scoreboard
+from domjudge_tool_cli.services.api.v4.base import V4Client
+
+
+class ScoreboardAPI(V4Client):
+    async def scoreboard(
+        self,
+        cid: str,
+        public: bool = True,
+    ) -> Scoreboard:
+        """
+        Args:
+            public: The public board, frozen at the scoreboard freeze.
+        """
+        path = self.make_resource(f"/contests/{cid}/scoreboard")
+        result = await self.get(path, {"public": "true" if public else "false"})
+        return Scoreboard(**result)
+
+    async def poll(
+        self,
+        cid: str,
+        public: bool = True,
+        validators: Optional[Dict[str, str]] = None,
+    ) -> Tuple[Optional[Scoreboard], Dict[str, str]]:
+        """
+        Conditional scoreboard request with the validators of the last poll.
+
+        Returns:
+            (scoreboard, validators), the scoreboard is None when the server
+            answers 304 Not Modified.
+        """
+        path = self.make_resource(f"/contests/{cid}/scoreboard")
+        r = await self.request(
+            "GET",
+            path,
+            params={"public": "true" if public else "false"},
+            auth=self.auth,
+            headers=validators,
+        )
+        if r.status_code == httpx.codes.NOT_MODIFIED:
+            return None, validators or {}
+
+        r.raise_for_status()
+        next_validators = {}
+        if r.headers.get("ETag"):
+            next_validators["If-None-Match"] = r.headers["ETag"]
+        if r.headers.get("Last-Modified"):
+            next_validators["If-Modified-Since"] = r.headers["Last-Modified"]
+        return Scoreboard(**r.json()), next_validators
@@ -1,20 +1,174 @@
+import asyncio
+import base64
 import logging
 import os
 import shutil
-from glob import glob
-from pathlib import Path
-from typing import List, Optional
+import zipfile
+from io import BytesIO
+from pathlib import Path, PurePosixPath
+from tempfile import TemporaryFile
+from typing import IO, List, Optional, Tuple
 
 import aiofiles
 from aiofiles import os as aio_os
 
 from domjudge_tool_cli.models import Submission, SubmissionFile
 from domjudge_tool_cli.services.api.v4.base import V4Client
+from domjudge_tool_cli.services.cache import (
+    CachedFile,
+    SubmissionFileCache,
+    link_or_copy,
+)
 
-unpack_archive = aio_os.wrap(shutil.unpack_archive)
+# Archives up to this size are extracted from memory, larger ones are spooled
+# to a temporary file written off the event loop.
+ARCHIVE_MEMORY_SIZE = 64 * 1024 * 1024
+
+
+def source_relative_path(filename: Optional[str]) -> Optional[Path]:
+    """
+    Relative path of a submitted file, None for an absolute path or a path
+    with a `..` segment.
+    """
+    path = PurePosixPath((filename or "").replace("\\", "/"))
+    if not path.parts or path.is_absolute() or ".." in path.parts:
+        return None
+    if path.parts[0].endswith(":"):
+        return None
+    return Path(*path.parts)
+
+
+def source_output_paths(
+    filenames: List[Optional[str]],
+    output_dir: Path,
+) -> List[Optional[Path]]:
+    """Output path of each submitted file in `output_dir`, None if unsafe."""
+    paths = []
+    for filename in filenames:
+        relative_path = source_relative_path(filename)
+        if relative_path is None:
+            logging.warning(f"Skip unsafe submission file name {filename!r}.")
+            paths.append(None)
+        else:
+            paths.append(output_dir / relative_path)
+    return paths
+
+
+def _extract_first_file(archive: IO[bytes], output_stem: Path) -> str:
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            members = [it for it in zf.infolist() if not it.is_dir()]
+            if not members:
+                return ""
+
+            member = members[0]
+            file_ex = os.path.splitext(member.filename)[-1]
+            output_path = output_stem.with_name(f"{output_stem.name}{file_ex}")
+            with zf.open(member) as src, open(output_path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+    except zipfile.BadZipFile:
+        return ""
+
+    return str(output_path)
+
+
+def _write_archive_blobs(
+    file_cache: SubmissionFileCache,
+    archive: IO[bytes],
+) -> List[Tuple[str, str, int]]:
+    """Stream each archive member into a cache blob, see `put_blobs`."""
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            blobs = []
+            for it in zf.infolist():
+                if it.is_dir():
+                    continue
+                with zf.open(it) as src:
+                    blobs.append((it.filename, *file_cache.write_blob(src)))
+            return blobs
+    except zipfile.BadZipFile:
+        return []
+
+
+def _write_archive(files: List[CachedFile], zip_path: Path) -> str:
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for it in files:
+            zf.write(it.path, it.name)
+    return str(zip_path)
+
+
+def _materialize(
+    files: List[CachedFile],
+    output_stem: Path,
+    first_only: bool = False,
+    link: bool = False,
+) -> str:
+    if len(files) == 1 or first_only:
+        file_ex = os.path.splitext(files[0].name)[-1]
+        output_path = output_stem.with_name(f"{output_stem.name}{file_ex}")
+        link_or_copy(files[0].path, output_path, link)
+        return str(output_path)
+
+    output_paths = source_output_paths([it.name for it in files], output_stem)
+    for it, output_path in zip(files, output_paths):
+        if output_path is None:
+            continue
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        link_or_copy(it.path, output_path, link)
+    return str(output_stem)
+
+
+extract_first_file = aio_os.wrap(_extract_first_file)
+write_archive_blobs = aio_os.wrap(_write_archive_blobs)
+write_archive = aio_os.wrap(_write_archive)
+materialize = aio_os.wrap(_materialize)
 
 
 class SubmissionsAPI(V4Client):
+    file_cache: Optional[SubmissionFileCache] = None
+    # Hardlink output files to the read-only cache blobs instead of copying.
+    link_files: bool = False
+
+    def cache_key(self, cid: str, id: str) -> str:
+        return SubmissionFileCache.key(self.host, cid, id)
+
+    async def _cached_archive(self, cid: str, id: str) -> List[CachedFile]:
+        key = self.cache_key(cid, id)
+        files = self.file_cache.get(key)
+        if files is not None:
+            return files
+
+        path = self.make_resource(f"/contests/{cid}/submissions/{id}/files")
+        with await self.download_archive(path) as archive:
+            blobs = await write_archive_blobs(self.file_cache, archive)
+
+        if not blobs:
+            return []
+        return self.file_cache.put_blobs(key, blobs)
+
+    async def download_archive(self, path: str) -> IO[bytes]:
+        """
+        Stream an archive into memory, past `ARCHIVE_MEMORY_SIZE` it moves to a
+        temporary file written in a thread.
+        """
+        archive: IO[bytes] = BytesIO()
+        in_memory = True
+        async for chunk in self.stream_file(path):
+            if in_memory and archive.tell() + len(chunk) > ARCHIVE_MEMORY_SIZE:
+                spool = await asyncio.to_thread(TemporaryFile)
+                await asyncio.to_thread(spool.write, archive.getvalue())
+                archive.close()
+                archive = spool
+                in_memory = False
+
+            if in_memory:
+                archive.write(chunk)
+            else:
+                await asyncio.to_thread(archive.write, chunk)
+
+        archive.seek(0)
+        return archive
+
     async def all_submissions(
         self,
         cid: str,
@@ -55,40 +209,134 @@ class SubmissionsAPI(V4Client):
         strict: Optional[bool] = False,
         is_extract: bool = False,
     ) -> str:
+        """
+        Download a submission files archive into `file_path`.
+
+        The archive is streamed, when extracting it is held in memory
+        (in a temporary file only past `ARCHIVE_MEMORY_SIZE`) and the source
+        file is written straight to its final path.
+
+        Returns:
+            The written file path, the source file if extracted else the zip file.
+        """
         is_dir = await aio_os.path.isdir(file_path)
         if not is_dir:
             await aio_os.makedirs(file_path, exist_ok=True)
 
         path = self.make_resource(f"/contests/{cid}/submissions/{id}/files")
-        result = await self.get_file(path)
-        file_name = f"{filename}_{id}.zip"
-        zip_path = Path(file_path) / file_name
-        async with aiofiles.open(zip_path, "wb") as f:
-            await f.write(result)
-
-        if is_extract:
-            async with aiofiles.tempfile.TemporaryDirectory() as temp_dir:
-                await unpack_archive(zip_path, temp_dir, "zip")
-                files = list(glob(str(temp_dir) + "/*"))
-                if not files:
-                    logging.warning(f"{zip_path} unzip fail!")
-                    return ""
-                file = files[0]
-                file_ex = os.path.splitext(file)[-1]
-                await aio_os.rename(
-                    file,
-                    Path(file_path) / f"{filename}_{id}{file_ex}",
-                )
-                await aio_os.remove(zip_path)
-
-        return file_name
-
-    async def submission_file_name(
+        zip_path = Path(file_path) / f"{filename}_{id}.zip"
+
+        if self.file_cache:
+            files = await self._cached_archive(cid, id)
+            if not files:
+                logging.warning(f"{zip_path} unzip fail!")
+                return ""
+            if not is_extract:
+                return await write_archive(files, zip_path)
+            return await materialize(
+                files,
+                Path(file_path) / f"{filename}_{id}",
+                first_only=True,
+                link=self.link_files,
+            )
+
+        if not is_extract:
+            async with aiofiles.open(zip_path, "wb") as f:
+                async for chunk in self.stream_file(path):
+                    await f.write(chunk)
+            return str(zip_path)
+
+        with await self.download_archive(path) as archive:
+            output_path = await extract_first_file(
+                archive,
+                Path(file_path) / f"{filename}_{id}",
+            )
+
+        if not output_path:
+            logging.warning(f"{zip_path} unzip fail!")
+            return ""
+
+        return output_path
+
+    async def submission_source_codes(
         self,
         cid: str,
         id: str,
-    ) -> SubmissionFile:
-
+    ) -> List[SubmissionFile]:
         path = self.make_resource(f"/contests/{cid}/submissions/{id}/source-code")
         result = await self.get(path)
-        return SubmissionFile(**result[0])
+        return list(map(lambda it: SubmissionFile(**it), result))
+
+    async def source_files(self, cid: str, id: str) -> List[Tuple[str, bytes]]:
+        """Submitted file names and contents, read from the file cache if cached."""
+        if self.file_cache:
+            files = self.file_cache.get(self.cache_key(cid, id))
+            if files is not None:
+                return [(it.name, await asyncio.to_thread(it.read)) for it in files]
+
+        source_codes = await self.submission_source_codes(cid, id)
+        return [
+            (it.filename or "", base64.b64decode(it.source or ""))
+            for it in source_codes
+        ]
+
+    async def submission_sources(
+        self,
+        cid: str,
+        id: str,
+        filename: str,
+        file_path: Optional[str] = None,
+        source_files: Optional[List[Tuple[str, bytes]]] = None,
+    ) -> str:
+        """
+        Write a submission source files decoded from the `source-code` endpoint.
+
+        A single file is written as `{filename}_{id}{ext}`, multiple files
+        are kept with their relative paths in a `{filename}_{id}` directory.
+
+        Args:
+            source_files: Names and contents from `source_files`, if already read.
+
+        Returns:
+            The written file or directory path.
+        """
+        output_path = Path(file_path) / f"{filename}_{id}"
+        if self.file_cache:
+            files = self.file_cache.get(self.cache_key(cid, id))
+            if files:
+                await aio_os.makedirs(file_path, exist_ok=True)
+                return await materialize(files, output_path, link=self.link_files)
+
+        if source_files is None:
+            source_files = await self.source_files(cid, id)
+
+        if not source_files:
+            logging.warning(f"Submission {id} has no source code!")
+            return ""
+
+        if self.file_cache:
+            files = self.file_cache.put(self.cache_key(cid, id), source_files)
+            await aio_os.makedirs(file_path, exist_ok=True)
+            return await materialize(files, output_path, link=self.link_files)
+
+        if len(source_files) == 1:
+            file_ex = os.path.splitext(source_files[0][0])[-1]
+            output_path = output_path.with_name(f"{output_path.name}{file_ex}")
+            files = [(output_path, source_files[0][1])]
+        else:
+            output_paths = source_output_paths(
+                [name for name, _ in source_files],
+                output_path,
+            )
+            files = [
+                (source_path, content)
+                for source_path, (_, content) in zip(output_paths, source_files)
+                if source_path is not None
+            ]
+
+        for source_path, content in files:
+            await aio_os.makedirs(source_path.parent, exist_ok=True)
+            async with aiofiles.open(source_path, "wb") as f:
+                await f.write(content)
+
+        return str(output_path)
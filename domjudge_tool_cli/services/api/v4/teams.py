@@ -11,7 +11,7 @@ class TeamsAPI(V4Client):
         cid: str,
     ) -> List[Team]:
         path = self.make_resource(f"/contests/{cid}/teams")
-        result = await self.get(path)
+        result = await self.get(path, cache=True)
         return list(map(lambda it: Team(**it), result))
 
     async def team(self, cid: str, id: str) -> Team:
@@ -1,4 +1,5 @@
-from typing import List, Optional
+import json
+from typing import Any, Dict, List, Optional
 
 from domjudge_tool_cli.models import User
 from domjudge_tool_cli.services.api.v4.base import V4Client
@@ -9,6 +10,7 @@ class UsersAPI(V4Client):
         self,
         ids: Optional[List[str]] = None,
         team_id: Optional[str] = None,
+        cache: bool = True,
     ) -> List[User]:
         path = self.make_resource("/users")
         params = dict()
@@ -22,6 +24,7 @@ class UsersAPI(V4Client):
         result = await self.get(
             path,
             params if params else None,
+            cache=cache,
         )
         return list(map(lambda it: User(**it), result))
 
@@ -33,3 +36,18 @@ class UsersAPI(V4Client):
 
         result = await self.get(path)
         return User(**result)
+
+    async def import_json(self, resource: str, items: List[Dict[str, Any]]) -> Any:
+        """
+        Upload a CCS JSON import file, ex: `teams.json` to `/users/teams`.
+        """
+        path = self.make_resource(f"/users/{resource}")
+        content = json.dumps(items, ensure_ascii=False).encode()
+        files = {"json": (f"{resource}.json", content, "application/json")}
+        return await self.post(path, files=files)
+
+    async def import_teams(self, teams: List[Dict[str, Any]]) -> Any:
+        return await self.import_json("teams", teams)
+
+    async def import_accounts(self, accounts: List[Dict[str, Any]]) -> Any:
+        return await self.import_json("accounts", accounts)
@@ -1,7 +1,12 @@
-from typing import Any, Dict, Optional
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Optional
 
 import httpx
 
+from domjudge_tool_cli.services.cache import HTTPCache
+from domjudge_tool_cli.services.policy import AIMDLimiter, RetryPolicy
+
 
 class BaseClient:
     def __init__(
@@ -10,8 +15,15 @@ class BaseClient:
         disable_ssl: Optional[bool] = None,
         timeout: Optional[httpx.Timeout] = None,
         limits: Optional[httpx.Limits] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        limiter: Optional[AIMDLimiter] = None,
+        http_cache: Optional[HTTPCache] = None,
     ):
         self.host = host
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy(retries=0)
+        self.limiter = limiter
+        self.http_cache = http_cache
         self._parameters = dict(base_url=host)
 
         if disable_ssl:
@@ -23,16 +35,91 @@ class BaseClient:
         if limits:
             self._parameters["limits"] = limits
 
-        self.client = self.new_client()
+        # A shared client belongs to its session, which closes it.
+        self._owns_client = client is None
+        self.client = client if client else self.new_client()
 
     def new_client(self) -> "httpx.AsyncClient":
         return httpx.AsyncClient(**self._parameters)
 
+    async def request(
+        self,
+        method: str,
+        path: str,
+        stream: bool = False,
+        auth: Optional[httpx.Auth] = None,
+        follow_redirects: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Send a request through the retry policy and the adaptive limiter.
+
+        A streamed response is returned open, the caller must close it. It
+        holds its limiter slot until closed, so the limiter caps concurrent
+        transfers and sees the latency of the whole download.
+        """
+        request = self.client.build_request(method, path, **kwargs)
+        send_kwargs = dict(stream=stream, follow_redirects=follow_redirects)
+        if auth:
+            send_kwargs["auth"] = auth
+
+        attempt = 0
+        while True:
+            response = None
+            error = None
+            if self.limiter:
+                await self.limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = await self.client.send(request, **send_kwargs)
+            except httpx.TransportError as e:
+                error = e
+            except BaseException:
+                if self.limiter:
+                    await self.limiter.release()
+                raise
+
+            retry = self.retry_policy.should_retry(method, attempt, response, error)
+            if self.limiter:
+                if stream and response is not None and not retry:
+                    self._release_on_close(response, start)
+                else:
+                    self.limiter.record(time.monotonic() - start, response)
+                    await self.limiter.release()
+
+            if not retry:
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self.retry_policy.backoff(attempt, response)
+            if response is not None:
+                await response.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _release_on_close(self, response: httpx.Response, start: float) -> None:
+        aclose = response.aclose
+        released = False
+
+        async def release_on_close() -> None:
+            nonlocal released
+            try:
+                await aclose()
+            finally:
+                if not released:
+                    released = True
+                    self.limiter.record(time.monotonic() - start, response)
+                    await self.limiter.release()
+
+        response.aclose = release_on_close
+
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.__aexit__(exc_type, exc_val, exc_tb)
+        if self._owns_client:
+            await self.client.__aexit__(exc_type, exc_val, exc_tb)
 
 
 class APIClient(BaseClient):
@@ -44,22 +131,76 @@ class APIClient(BaseClient):
         disable_ssl: Optional[bool] = None,
         timeout: Optional[httpx.Timeout] = None,
         limits: Optional[httpx.Limits] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        limiter: Optional[AIMDLimiter] = None,
+        http_cache: Optional[HTTPCache] = None,
     ):
-        super().__init__(host, disable_ssl, timeout, limits)
         self.username = username
         self.password = password
-        self._parameters = dict(
-            base_url=host,
-            auth=httpx.BasicAuth(username, password),
+        self.auth = httpx.BasicAuth(username, password)
+        super().__init__(
+            host,
+            disable_ssl,
+            timeout,
+            limits,
+            client,
+            retry_policy,
+            limiter,
+            http_cache,
         )
-        self.client = self.new_client()
 
     async def get(
         self,
         path: str,
         params: Optional[Dict[str, Any]] = None,
+        cache: bool = False,
+    ) -> Any:
+        """
+        GET a JSON resource.
+
+        Args:
+            cache: Serve and revalidate the response through `http_cache`.
+        """
+        if not cache or not self.http_cache:
+            r = await self.request("GET", path, params=params, auth=self.auth)
+            r.raise_for_status()
+            return r.json()
+
+        key = self.http_cache.key(self.host, path, params, self.username)
+        entry = self.http_cache.load(key)
+        if entry and self.http_cache.is_fresh(entry):
+            return entry["body"]
+
+        r = await self.request(
+            "GET",
+            path,
+            params=params,
+            auth=self.auth,
+            headers=self.http_cache.validators(entry),
+        )
+        if r.status_code == httpx.codes.NOT_MODIFIED and entry:
+            self.http_cache.touch(key, entry)
+            return entry["body"]
+
+        r.raise_for_status()
+        body = r.json()
+        self.http_cache.store(key, r, body)
+        return body
+
+    async def post(
+        self,
+        path: str,
+        data: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
     ) -> Any:
-        r = await self.client.get(path, params=params)  # type: httpx.Response
+        r = await self.request(
+            "POST",
+            path,
+            data=data,
+            files=files,
+            auth=self.auth,
+        )
         r.raise_for_status()
         return r.json()
 
@@ -68,10 +209,30 @@ class APIClient(BaseClient):
         path: str,
         params: Optional[Dict[str, Any]] = None,
     ) -> Any:
-        r = await self.client.get(path, params=params)  # type: httpx.Response
+        r = await self.request("GET", path, params=params, auth=self.auth)
         r.raise_for_status()
         return r.content
 
+    async def stream_file(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        r = await self.request(
+            "GET",
+            path,
+            stream=True,
+            params=params,
+            auth=self.auth,
+        )
+        try:
+            r.raise_for_status()
+            async for chunk in r.aiter_bytes(chunk_size):
+                yield chunk
+        finally:
+            await r.aclose()
+
 
 class WebClient(BaseClient):
     def __init__(
@@ -82,17 +243,31 @@ class WebClient(BaseClient):
         disable_ssl: Optional[bool] = None,
         timeout: Optional[httpx.Timeout] = None,
         limits: Optional[httpx.Limits] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        limiter: Optional[AIMDLimiter] = None,
+        http_cache: Optional[HTTPCache] = None,
     ):
         self.username = username
         self.password = password
-        super().__init__(host, disable_ssl, timeout, limits)
+        super().__init__(
+            host,
+            disable_ssl,
+            timeout,
+            limits,
+            client,
+            retry_policy,
+            limiter,
+            http_cache,
+        )
 
     async def get(
         self,
         path: str,
         params: Optional[Dict[str, Any]] = None,
     ) -> httpx.Response:
-        r = await self.client.get(  # type: httpx.Response
+        r = await self.request(
+            "GET",
             path,
             params=params,
             follow_redirects=True,
@@ -104,11 +279,14 @@ class WebClient(BaseClient):
         self,
         path: str,
         body: Optional[Dict[str, Any]] = None,
+        follow_redirects: bool = True,
     ) -> httpx.Response:
-        r = await self.client.post(  # type: httpx.Response
+        r = await self.request(
+            "POST",
             path,
             data=body,
-            follow_redirects=True,
+            follow_redirects=follow_redirects,
         )
-        r.raise_for_status()
+        if r.is_error or follow_redirects:
+            r.raise_for_status()
         return r
@@ -0,0 +1,344 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import IO, Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import httpx
+
+DEFAULT_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+BLOB_CHUNK_SIZE = 64 * 1024
+
+
+def default_cache_dir() -> Path:
+    root = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(root) / "domjudge-tool-cli"
+
+
+def link_or_copy(
+    source: Union[str, Path],
+    destination: Union[str, Path],
+    link: bool = False,
+) -> None:
+    """
+    Copy a cached blob to `destination`, a writable file of its own.
+
+    With `link` it is hardlinked instead, falling back to a copy across file
+    systems. A hardlink shares the read-only blob, editing it in place after
+    `chmod u+w` changes the cached content of every submission using it.
+    """
+    destination = Path(destination)
+    if destination.exists() or destination.is_symlink():
+        destination.unlink()
+
+    if link:
+        try:
+            os.link(source, destination)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(source, destination)
+
+
+class CachedFile(NamedTuple):
+    name: str
+    path: Path
+
+    def read(self) -> bytes:
+        return self.path.read_bytes()
+
+
+class SubmissionFileCache:
+    """
+    On-disk cache of submission source files, which never change once submitted.
+
+    Entries are keyed by (host, cid, submission id) and point to blobs stored by
+    content hash, identical sources share one blob. Blobs are read-only,
+    output files are copied from them, or hardlinked when asked to, so
+    materializing a cached submission costs no network. The least recently
+    used entries are evicted past `max_size` bytes.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Union[str, Path]] = None,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+    ):
+        self.root = Path(root) if root else default_cache_dir() / "submissions"
+        self.max_size = max_size
+        self.blobs = self.root / "blobs"
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.root / "index.sqlite3")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                key TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                PRIMARY KEY (key, position)
+            );
+            CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+            CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+            """
+        )
+
+    @staticmethod
+    def key(host: str, cid: str, id: str) -> str:
+        return f"{str(host).rstrip('/')}|{cid}|{id}"
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.blobs / sha256[:2] / sha256
+
+    def get(self, key: str) -> Optional[List[CachedFile]]:
+        rows = self.db.execute(
+            "SELECT name, sha256 FROM files WHERE key = ? ORDER BY position",
+            (key,),
+        ).fetchall()
+        if not rows:
+            return None
+
+        files = [CachedFile(name, self.blob_path(sha256)) for name, sha256 in rows]
+        if not all(it.path.is_file() for it in files):
+            self.delete(key)
+            return None
+
+        with self.db:
+            self.db.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return files
+
+    def write_blob(self, source: IO[bytes]) -> Tuple[str, int]:
+        """
+        Stream `source` into a blob, hashed while written to a temporary file
+        then renamed. Returns its sha256 and size.
+
+        It touches no database, it can run in a thread before `put_blobs`.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_name = tempfile.mkstemp(suffix=".tmp", dir=self.blobs)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: source.read(BLOB_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+
+            sha256 = digest.hexdigest()
+            path = self.blob_path(sha256)
+            if path.is_file():
+                os.unlink(temp_name)
+            else:
+                path.parent.mkdir(exist_ok=True)
+                os.chmod(temp_name, 0o444)
+                os.replace(temp_name, path)
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            raise
+        return sha256, size
+
+    def put_blobs(
+        self,
+        key: str,
+        blobs: List[Tuple[str, str, int]],
+    ) -> List[CachedFile]:
+        """Record the entry of written blobs, (name, sha256, size) in file order."""
+        with self.db:
+            self.db.execute("DELETE FROM files WHERE key = ?", (key,))
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (key, size, accessed) VALUES (?, ?, ?)",
+                (key, sum(size for _, _, size in blobs), time.time()),
+            )
+            self.db.executemany(
+                "INSERT INTO files (key, position, name, sha256) VALUES (?, ?, ?, ?)",
+                [
+                    (key, position, name, sha256)
+                    for position, (name, sha256, _) in enumerate(blobs)
+                ],
+            )
+        self.evict(keep=key)
+        return [CachedFile(name, self.blob_path(sha256)) for name, sha256, _ in blobs]
+
+    def put(self, key: str, files: List[Tuple[str, bytes]]) -> List[CachedFile]:
+        blobs = [(name, *self.write_blob(BytesIO(content))) for name, content in files]
+        return self.put_blobs(key, blobs)
+
+    def delete(self, key: str) -> None:
+        hashes = [
+            sha256
+            for (sha256,) in self.db.execute(
+                "SELECT sha256 FROM files WHERE key = ?", (key,)
+            )
+        ]
+        with self.db:
+            self.db.execute("DELETE FROM files WHERE key = ?", (key,))
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+        for sha256 in set(hashes):
+            (used,) = self.db.execute(
+                "SELECT COUNT(*) FROM files WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            if not used:
+                self.blob_path(sha256).unlink(missing_ok=True)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        (total,) = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if total <= self.max_size:
+            return
+
+        rows = self.db.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_size:
+                break
+            if key == keep:
+                continue
+            self.delete(key)
+            total -= size
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "SubmissionFileCache":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class HTTPCache:
+    """
+    On-disk cache of JSON GET responses with their `ETag` / `Last-Modified`.
+
+    A cached response is revalidated with a conditional request and served again
+    on 304. With `ttl` seconds, a response younger than `ttl` is served without
+    any request, which also covers servers that send no validators. The least
+    recently used entries are evicted past `max_size` bytes, an entry file's
+    modification time is its last use.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Union[str, Path]] = None,
+        ttl: Optional[float] = None,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+    ):
+        self.root = Path(root) if root else default_cache_dir() / "http"
+        self.ttl = ttl
+        self.max_size = max_size
+        # Total entry size, scanned on the first write.
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def key(
+        host: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        username: Optional[str] = None,
+    ) -> str:
+        content = json.dumps(
+            [str(host).rstrip("/"), path, params or {}, username],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.entry_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        if not self.ttl:
+            return False
+        return time.time() - entry["stored_at"] < self.ttl
+
+    @staticmethod
+    def validators(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, key: str, response: httpx.Response, body: Any) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified and not self.ttl:
+            return
+
+        self._write(
+            key,
+            {
+                "etag": etag,
+                "last_modified": last_modified,
+                "stored_at": time.time(),
+                "body": body,
+            },
+        )
+
+    def touch(self, key: str, entry: Dict[str, Any]) -> None:
+        entry["stored_at"] = time.time()
+        self._write(key, entry)
+
+    def entries(self) -> List[Tuple[Path, os.stat_result]]:
+        return [(it, it.stat()) for it in self.root.glob("*/*.json")]
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self.entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self._size is None:
+            self._size = sum(stat.st_size for _, stat in self.entries())
+
+        try:
+            self._size -= path.stat().st_size
+        except OSError:
+            pass
+
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+        self._size += path.stat().st_size
+        if self._size > self.max_size:
+            self.evict(keep=path)
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        # Other processes share the directory, the total is scanned again.
+        entries = self.entries()
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in sorted(entries, key=lambda it: it[1].st_mtime):
+            if total <= self.max_size:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+        self._size = total
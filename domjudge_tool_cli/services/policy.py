@@ -0,0 +1,147 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Optional
+
+import httpx
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+# The server refused the request without processing it, safe for any method.
+REFUSED_STATUSES = (429, 503)
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Decide whether a failed request is retried and how long to wait before.
+
+    Idempotent requests are retried on transport errors and `retry_statuses`.
+    Other methods are only retried when the request never reached the server
+    (connect errors) or the server refused it (429, 503).
+    Delays are exponential with full jitter, or the server `Retry-After`.
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        retry_statuses: Iterable[int] = RETRY_STATUSES,
+    ):
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = set(retry_statuses)
+
+    def should_retry(
+        self,
+        method: str,
+        attempt: int,
+        response: Optional[httpx.Response] = None,
+        error: Optional[Exception] = None,
+    ) -> bool:
+        if attempt >= self.retries:
+            return False
+
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        if error is not None:
+            if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+                return True
+            return idempotent and isinstance(error, httpx.TransportError)
+
+        if response is None or response.status_code not in self.retry_statuses:
+            return False
+
+        return idempotent or response.status_code in REFUSED_STATUSES
+
+    def backoff(
+        self,
+        attempt: int,
+        response: Optional[httpx.Response] = None,
+    ) -> float:
+        if response is not None:
+            delay = retry_after(response)
+            if delay is not None:
+                return min(delay, self.max_backoff)
+
+        ceiling = min(self.max_backoff, self.backoff_factor * (2**attempt))
+        return random.uniform(0, ceiling)
+
+
+class AIMDLimiter:
+    """
+    Adaptive in-flight requests limit, additive increase / multiplicative decrease.
+
+    Every successful response grows the limit by about one per round trip, up to
+    `max_limit`. A 5xx, 429, transport error or a response slower than
+    `max_latency` cuts it by `decrease_factor`, down to `min_limit`.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        max_latency: Optional[float] = None,
+        decrease_factor: float = 0.5,
+    ):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.max_latency = max_latency
+        self.decrease_factor = decrease_factor
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+        self._last_decrease = 0.0
+
+    def _on_success(self) -> None:
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _on_congestion(self) -> None:
+        # Decrease at most once per latency window, in-flight requests
+        # failing together are one congestion signal.
+        now = time.monotonic()
+        if now - self._last_decrease < (self.max_latency or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+
+    def record(
+        self,
+        latency: float,
+        response: Optional[httpx.Response] = None,
+    ) -> None:
+        congested = response is None or response.status_code in RETRY_STATUSES
+        if self.max_latency and latency > self.max_latency:
+            congested = True
+
+        if congested:
+            self._on_congestion()
+        else:
+            self._on_success()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
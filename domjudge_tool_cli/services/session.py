@@ -0,0 +1,139 @@
+from pathlib import Path
+from typing import Dict, Optional, Type, TypeVar
+
+import httpx
+
+from domjudge_tool_cli.services.api.v4 import (
+    ContestsAPI,
+    EventFeedAPI,
+    GeneralAPI,
+    GroupsAPI,
+    JudgementAPI,
+    JudgementTypeAPI,
+    ProblemsAPI,
+    ScoreboardAPI,
+    SubmissionsAPI,
+    TeamsAPI,
+    UsersAPI,
+)
+from domjudge_tool_cli.services.api_client import APIClient, BaseClient
+from domjudge_tool_cli.services.cache import HTTPCache
+from domjudge_tool_cli.services.policy import AIMDLimiter, RetryPolicy
+from domjudge_tool_cli.services.web import DomServerWebGateway
+from domjudge_tool_cli.services.web.base import BaseDomServerWeb
+
+T = TypeVar("T", bound=APIClient)
+
+
+class DomServerSession(BaseClient):
+    """
+    One connection pool shared by every v4 API resource and the web client.
+
+    usage:
+        async with DomServerSession(**client.api_params) as session:
+            teams = await session.teams.all_teams(cid)
+            web = session.web(client.version)
+    """
+
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        disable_ssl: Optional[bool] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        limits: Optional[httpx.Limits] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        limiter: Optional[AIMDLimiter] = None,
+        http_cache: Optional[HTTPCache] = None,
+    ):
+        self.username = username
+        self.password = password
+        super().__init__(
+            host,
+            disable_ssl,
+            timeout,
+            limits,
+            retry_policy=retry_policy,
+            limiter=limiter,
+            http_cache=http_cache,
+        )
+        self._resources: Dict[type, APIClient] = {}
+        self._web: Optional[BaseDomServerWeb] = None
+
+    def resource(self, api_class: Type[T]) -> T:
+        if api_class not in self._resources:
+            self._resources[api_class] = api_class(
+                self.host,
+                self.username,
+                self.password,
+                client=self.client,
+                retry_policy=self.retry_policy,
+                limiter=self.limiter,
+                http_cache=self.http_cache,
+            )
+        return self._resources[api_class]
+
+    @property
+    def general(self) -> GeneralAPI:
+        return self.resource(GeneralAPI)
+
+    @property
+    def users(self) -> UsersAPI:
+        return self.resource(UsersAPI)
+
+    @property
+    def teams(self) -> TeamsAPI:
+        return self.resource(TeamsAPI)
+
+    @property
+    def groups(self) -> GroupsAPI:
+        return self.resource(GroupsAPI)
+
+    @property
+    def problems(self) -> ProblemsAPI:
+        return self.resource(ProblemsAPI)
+
+    @property
+    def submissions(self) -> SubmissionsAPI:
+        return self.resource(SubmissionsAPI)
+
+    @property
+    def judgements(self) -> JudgementAPI:
+        return self.resource(JudgementAPI)
+
+    @property
+    def judgement_types(self) -> JudgementTypeAPI:
+        return self.resource(JudgementTypeAPI)
+
+    @property
+    def event_feed(self) -> EventFeedAPI:
+        return self.resource(EventFeedAPI)
+
+    @property
+    def scoreboard(self) -> ScoreboardAPI:
+        return self.resource(ScoreboardAPI)
+
+    @property
+    def contests(self) -> ContestsAPI:
+        return self.resource(ContestsAPI)
+
+    def web(
+        self,
+        version: str,
+        html_parser: Optional[str] = None,
+        cookie_jar: Optional[Path] = None,
+    ) -> BaseDomServerWeb:
+        if not self._web:
+            DomServerWeb = DomServerWebGateway(version)
+            self._web = DomServerWeb(
+                self.host,
+                self.username,
+                self.password,
+                client=self.client,
+                retry_policy=self.retry_policy,
+                limiter=self.limiter,
+                html_parser=html_parser,
+                cookie_jar=cookie_jar,
+            )
+        return self._web
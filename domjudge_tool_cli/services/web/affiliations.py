@@ -0,0 +1,62 @@
+import asyncio
+from typing import Dict, Optional
+
+from domjudge_tool_cli.models import Affiliation
+from domjudge_tool_cli.services.web.base import BaseDomServerWeb
+
+
+class AffiliationIndex:
+    """
+    Affiliations by name and shortname, loaded from the jury page once.
+
+    Created affiliations are added in place. Creation holds a lock per name, so
+    concurrent imports with the same new affiliation create it only once.
+
+    usage:
+        affiliations = AffiliationIndex(web, client.affiliation_country)
+        affiliation = await affiliations.get_or_create("NTUB")
+    """
+
+    def __init__(self, web: BaseDomServerWeb, country: str = "TWN"):
+        self.web = web
+        self.country = country
+        self._affiliations: Dict[str, Affiliation] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._create_locks: Dict[str, asyncio.Lock] = {}
+
+    async def load(self) -> None:
+        async with self._load_lock:
+            if self._loaded:
+                return
+
+            for it in await self.web.get_affiliations():
+                self.add(it)
+            self._loaded = True
+
+    def add(self, affiliation: Affiliation) -> None:
+        # The first listed affiliation wins, like `get_affiliation`.
+        self._affiliations.setdefault(affiliation.name, affiliation)
+        self._affiliations.setdefault(affiliation.shortname, affiliation)
+
+    def get(self, name: str) -> Optional[Affiliation]:
+        return self._affiliations.get(name)
+
+    async def get_or_create(self, name: str) -> Affiliation:
+        await self.load()
+        affiliation = self.get(name)
+        if affiliation:
+            return affiliation
+
+        lock = self._create_locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            affiliation = self.get(name)
+            if not affiliation:
+                affiliation = await self.web.create_affiliation(
+                    name,
+                    name,
+                    self.country,
+                )
+                self.add(affiliation)
+
+        return affiliation
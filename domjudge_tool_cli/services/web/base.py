@@ -1,30 +1,592 @@
+import asyncio
+import json
+import os
+import stat
+import time
 from abc import ABC, abstractmethod
-from typing import List, Optional, Tuple
+from enum import Enum
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
+import httpx
 from bs4 import BeautifulSoup
 
 from domjudge_tool_cli.models import Affiliation, CreateUser, ProblemItem, User
 from domjudge_tool_cli.services.api_client import WebClient
+from domjudge_tool_cli.utils.pool import run_pool
 
 
-def _get_input_fields(page: str) -> dict:
-    soup = BeautifulSoup(page, "html.parser")
+class HTMLParserBackend(str, Enum):
+    AUTO = "auto"
+    SOUP = "soup"
+    LXML = "lxml"
+    STREAM = "stream"
 
-    data = {ele.get("name"): ele.get("value") for ele in soup.select("input")}
 
-    select_tags = soup.select("select")
-    for tag in select_tags:
-        option = tag.select_one("option[selected]")
-        data[tag.get("name")] = option.get("value") if option else None
+class Link(NamedTuple):
+    text: str
+    href: Optional[str]
+    img_alt: Optional[str]  # `alt` of the first image in the link, if any.
 
-    data.pop(None, None)  # remove no name fields
-    return data
+
+class PageParser(ABC):
+    """
+    The few extracts the jury pages need, so a backend does not have to build
+    a full document tree.
+    """
+
+    backend: HTMLParserBackend
+    # BeautifulSoup tree builder for the pages that still need a whole tree.
+    soup_features: str = "html.parser"
+
+    @abstractmethod
+    def input_fields(self, page: str) -> Dict[str, Optional[str]]:
+        """
+        Form fields by name, a `select` value is its first selected option.
+        Later fields win over earlier ones and every `select` wins over inputs.
+        """
+        ...
+
+    @abstractmethod
+    def table_rows(self, page: str) -> List[List[Link]]:
+        """The links of each `table tbody tr` row."""
+        ...
+
+
+class SoupParser(PageParser):
+    backend = HTMLParserBackend.SOUP
+
+    def input_fields(self, page: str) -> Dict[str, Optional[str]]:
+        soup = BeautifulSoup(page, "html.parser")
+
+        data = {ele.get("name"): ele.get("value") for ele in soup.select("input")}
+
+        select_tags = soup.select("select")
+        for tag in select_tags:
+            option = tag.select_one("option[selected]")
+            data[tag.get("name")] = option.get("value") if option else None
+
+        data.pop(None, None)  # remove no name fields
+        return data
+
+    @staticmethod
+    def _link(element) -> Link:
+        img = element.img
+        return Link(
+            text=element.text,
+            href=element.get("href"),
+            img_alt=img.get("alt", "") if img else None,
+        )
+
+    def table_rows(self, page: str) -> List[List[Link]]:
+        soup = BeautifulSoup(page, "html.parser")
+        return [
+            [self._link(it) for it in row.select("a")]
+            for row in soup.select("table tbody tr")
+        ]
+
+
+class LxmlParser(PageParser):
+    """libxml2 through the optional `lxml` package."""
+
+    backend = HTMLParserBackend.LXML
+    soup_features = "lxml"
+
+    def __init__(self):
+        from lxml import html
+
+        self._html = html
+
+    def _document(self, page: str):
+        if not page.strip():
+            return None
+        return self._html.document_fromstring(page)
+
+    def input_fields(self, page: str) -> Dict[str, Optional[str]]:
+        document = self._document(page)
+        if document is None:
+            return {}
+
+        data = {ele.get("name"): ele.get("value") for ele in document.iter("input")}
+
+        for tag in document.iter("select"):
+            option = next(iter(tag.xpath(".//option[@selected]")), None)
+            data[tag.get("name")] = option.get("value") if option is not None else None
+
+        data.pop(None, None)  # remove no name fields
+        return data
+
+    @staticmethod
+    def _link(element) -> Link:
+        img = next(element.iter("img"), None)
+        return Link(
+            text=element.text_content(),
+            href=element.get("href"),
+            img_alt=img.get("alt", "") if img is not None else None,
+        )
+
+    def table_rows(self, page: str) -> List[List[Link]]:
+        document = self._document(page)
+        if document is None:
+            return []
+
+        return [
+            [self._link(it) for it in row.iter("a")]
+            for row in document.xpath("//table//tbody//tr")
+        ]
+
+
+VOID_ELEMENTS = frozenset(
+    (
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "param",
+        "source",
+        "track",
+        "wbr",
+    )
+)
+
+
+class _Element:
+    __slots__ = ("tag", "row", "select", "link")
+
+    def __init__(self, tag: str):
+        self.tag = tag
+        self.row: Optional[List[Link]] = None
+        self.select: Optional[List[Optional[str]]] = None
+        self.link: Optional[List[Any]] = None
+
+
+class _PageExtractor(HTMLParser):
+    """
+    One pass over the page tokens, the open elements are tracked like the
+    `html.parser` tree builder of BeautifulSoup: an end tag closes its latest
+    open element and the ones opened after it.
+    """
+
+    def __init__(self, fields: bool = False, rows: bool = False):
+        super().__init__()
+        self.fields = fields
+        self.rows = rows
+
+        self.inputs: Dict[Optional[str], Optional[str]] = {}
+        self.selects: List[List[Optional[str]]] = []
+        self.table_rows: List[List[List[Any]]] = []
+
+        self._stack: List[_Element] = []
+        self._open_selects: List[List[Optional[str]]] = []
+        self._open_rows: List[List[List[Any]]] = []
+        self._open_links: List[List[Any]] = []
+
+    def _in_table_body(self) -> bool:
+        in_body = False
+        for element in reversed(self._stack):
+            if element.tag == "tbody":
+                in_body = True
+            elif in_body and element.tag == "table":
+                return True
+        return False
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        # Valueless attributes are empty strings, the last duplicate wins.
+        attributes = {k: "" if v is None else v for k, v in attrs}
+
+        if tag == "input":
+            if self.fields:
+                self.inputs[attributes.get("name")] = attributes.get("value")
+            return
+
+        if tag == "img":
+            for link in self._open_links:
+                if link[2] is None:
+                    link[2] = attributes.get("alt", "")
+            return
+
+        if tag in VOID_ELEMENTS:
+            return
+
+        element = _Element(tag)
+        if tag == "select" and self.fields:
+            element.select = [attributes.get("name"), None, False]
+            self.selects.append(element.select)
+            self._open_selects.append(element.select)
+        elif tag == "option" and "selected" in attributes:
+            for select in self._open_selects:
+                if not select[2]:
+                    select[1] = attributes.get("value")
+                    select[2] = True
+        elif tag == "tr" and self.rows and self._in_table_body():
+            element.row = []
+            self.table_rows.append(element.row)
+            self._open_rows.append(element.row)
+        elif tag == "a" and self._open_rows:
+            link = ["", attributes.get("href"), None]
+            for row in self._open_rows:
+                row.append(link)
+            element.link = link
+            self._open_links.append(link)
+
+        self._stack.append(element)
+
+    def handle_endtag(self, tag: str):
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index].tag == tag:
+                break
+        else:
+            return
+
+        for element in self._stack[index:]:
+            if element.select is not None:
+                self._open_selects.remove(element.select)
+            if element.row is not None:
+                self._open_rows.remove(element.row)
+            if element.link is not None:
+                self._open_links.remove(element.link)
+        del self._stack[index:]
+
+    def handle_data(self, data: str):
+        for link in self._open_links:
+            link[0] += data
+
+
+class StreamParser(PageParser):
+    """
+    Targeted extractor on the standard library tokenizer, it keeps only the
+    requested fields and table links instead of building a tree.
+    """
+
+    backend = HTMLParserBackend.STREAM
+
+    @staticmethod
+    def _extract(page: str, **kwargs: Any) -> _PageExtractor:
+        extractor = _PageExtractor(**kwargs)
+        extractor.feed(page)
+        extractor.close()
+        return extractor
+
+    def input_fields(self, page: str) -> Dict[str, Optional[str]]:
+        extractor = self._extract(page, fields=True)
+        data = extractor.inputs
+        for name, value, _ in extractor.selects:
+            data[name] = value
+
+        data.pop(None, None)  # remove no name fields
+        return data
+
+    def table_rows(self, page: str) -> List[List[Link]]:
+        extractor = self._extract(page, rows=True)
+        return [[Link(*it) for it in row] for row in extractor.table_rows]
+
+
+HTML_PARSER_ENV = "DOMSERVER_HTML_PARSER"
+
+_parsers: Dict[HTMLParserBackend, PageParser] = {}
+
+
+def get_page_parser(
+    backend: Optional[HTMLParserBackend] = None,
+) -> PageParser:
+    """
+    Args:
+        backend: Default to the `DOMSERVER_HTML_PARSER` environment variable,
+            else `auto`, which is `soup`. The `lxml` and `stream` backends
+            are opt-in.
+    """
+    backend = HTMLParserBackend(
+        backend or os.environ.get(HTML_PARSER_ENV) or HTMLParserBackend.AUTO
+    )
+    if backend == HTMLParserBackend.AUTO:
+        backend = HTMLParserBackend.SOUP
+
+    if backend not in _parsers:
+        parser_class = {
+            HTMLParserBackend.SOUP: SoupParser,
+            HTMLParserBackend.LXML: LxmlParser,
+            HTMLParserBackend.STREAM: StreamParser,
+        }[backend]
+        _parsers[backend] = parser_class()
+
+    return _parsers[backend]
 
 
 class BaseDomServerWeb(WebClient, ABC):
+    """
+    Jury web pages client on one authenticated session.
+
+    Call `ensure_login` instead of `login`, it logs in once per session. When the
+    session expires the server redirects to the login page, `get` and `post` then
+    log in again and retry the request once.
+
+    Pages are read through `parser`, see `get_page_parser` for the backends.
+
+    The default fields of add forms are fetched once per login by `form_fields`,
+    `submit_form` refreshes the CSRF tokens only when the server refuses them.
+
+    With a `cookie_jar` file, the session cookies are saved after each login and
+    the first `ensure_login` reuses them when the jury home page still answers.
+    """
+
+    login_path: str = "/login"
+    home_path: str = "/jury"
+
+    def __init__(
+        self,
+        *args: Any,
+        html_parser: Optional[HTMLParserBackend] = None,
+        cookie_jar: Optional[Path] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.parser = get_page_parser(html_parser)
+        self.cookie_jar = Path(cookie_jar) if cookie_jar else None
+        self._login_lock = asyncio.Lock()
+        self._logins = 0
+        self._forms: Dict[str, Dict[str, Optional[str]]] = {}
+        self._form_locks: Dict[str, asyncio.Lock] = {}
+
     @abstractmethod
     async def login(self) -> None: ...
 
+    async def ensure_login(self, expired: Optional[int] = None) -> None:
+        """
+        Args:
+            expired: The login count seen by a request that hit the login page,
+                concurrent requests then log in again only once.
+        """
+        async with self._login_lock:
+            if self._logins and self._logins != expired:
+                return
+
+            if not self._logins and await self._restore_session():
+                self._logins += 1
+                return
+
+            await self.login()
+            self._logins += 1
+            # CSRF tokens belong to the previous session.
+            self._forms.clear()
+            self.save_cookies()
+
+    def load_cookies(self) -> bool:
+        """
+        Load the saved cookies of this host and user, a jar readable by other
+        users is ignored.
+        """
+        if not self.cookie_jar or not self.cookie_jar.is_file():
+            return False
+        if stat.S_IMODE(self.cookie_jar.stat().st_mode) & 0o077:
+            return False
+
+        try:
+            with open(self.cookie_jar, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if saved.get("host") != str(self.host) or (
+            saved.get("username") != self.username
+        ):
+            return False
+
+        now = time.time()
+        cookies = [
+            it
+            for it in saved.get("cookies", [])
+            if not it.get("expires") or it["expires"] > now
+        ]
+        for it in cookies:
+            self.client.cookies.set(
+                it["name"],
+                it["value"],
+                domain=it["domain"],
+                path=it["path"],
+            )
+        return bool(cookies)
+
+    def save_cookies(self) -> None:
+        if not self.cookie_jar:
+            return
+
+        cookies = [
+            {
+                "name": it.name,
+                "value": it.value,
+                "domain": it.domain,
+                "path": it.path,
+                "expires": it.expires,
+            }
+            for it in self.client.cookies.jar
+        ]
+        data = {"host": str(self.host), "username": self.username, "cookies": cookies}
+
+        self.cookie_jar.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.cookie_jar.with_name(f"{self.cookie_jar.name}.tmp")
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            os.chmod(temp_path, 0o600)
+            json.dump(data, f)
+        os.replace(temp_path, self.cookie_jar)
+
+    async def _restore_session(self) -> bool:
+        """Saved cookies of a session which the server still accepts."""
+        if not self.load_cookies():
+            return False
+
+        res = await self.request("GET", self.home_path)
+        return res.status_code == httpx.codes.OK
+
+    def _is_login_page(self, response: httpx.Response) -> bool:
+        """Redirected to the login page, but not by a login request."""
+        first = response.history[0] if response.history else response
+        return response.url.path.endswith(self.login_path) and (
+            not first.request.url.path.endswith(self.login_path)
+        )
+
+    async def get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> httpx.Response:
+        logins = self._logins
+        res = await super().get(path, params)
+        if self._logins and self._is_login_page(res):
+            await self.ensure_login(expired=logins)
+            res = await super().get(path, params)
+        return res
+
+    async def form_fields(self, path: str) -> Dict[str, Optional[str]]:
+        """
+        A copy of the default fields of the form at `path`, only for forms which
+        do not show a record, ex: add forms.
+        """
+        lock = self._form_locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            if path not in self._forms:
+                res = await self.get(path)
+                self._forms[path] = self.parser.input_fields(res.text)
+
+        return dict(self._forms[path])
+
+    @staticmethod
+    def _csrf_tokens(fields: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in fields.items() if k.rstrip("]").endswith("_token")}
+
+    async def submit_form(
+        self,
+        path: str,
+        data: Dict[str, Any],
+        follow_redirects: bool = True,
+    ) -> httpx.Response:
+        """
+        Post the form at `path`. When the server shows the form again with other
+        CSRF tokens, the tokens are refreshed and the form is sent once more.
+        An invalid form keeps its tokens and is returned as it is.
+
+        Args:
+            follow_redirects: False to not load the page a handled form
+                redirects to, read it with `redirect_path`.
+        """
+        res = await self.post(path, body=data, follow_redirects=follow_redirects)
+        if res.is_redirect or res.url.path != path:
+            return res
+
+        tokens = self._csrf_tokens(self.parser.input_fields(res.text))
+        if not tokens or tokens == self._csrf_tokens(data):
+            return res
+
+        if path in self._forms:
+            self._forms[path].update(tokens)
+        return await self.post(
+            path,
+            body={**data, **tokens},
+            follow_redirects=follow_redirects,
+        )
+
+    @staticmethod
+    def redirect_path(response: httpx.Response) -> str:
+        return httpx.URL(response.headers.get("location", "")).path
+
+    def _redirects_to_login(self, response: httpx.Response) -> bool:
+        return response.is_redirect and (
+            self.redirect_path(response).endswith(self.login_path)
+        )
+
+    async def post(
+        self,
+        path: str,
+        body: Optional[Dict[str, Any]] = None,
+        follow_redirects: bool = True,
+    ) -> httpx.Response:
+        logins = self._logins
+        res = await super().post(path, body, follow_redirects)
+        if not self._logins:
+            return res
+
+        if not follow_redirects:
+            if self._redirects_to_login(res):
+                await self.ensure_login(expired=logins)
+                res = await super().post(path, body, follow_redirects)
+            return res
+
+        if not self._is_login_page(res):
+            return res
+
+        await self.ensure_login(expired=logins)
+        if len(res.history) == 1:
+            # The form itself was refused, it is safe to send again.
+            return await super().post(path, body)
+
+        # The form was handled, the session expired on the page it redirects to.
+        return await super().get(res.history[-1].request.url.path)
+
+    async def delete(self, path: str) -> None:
+        """
+        Confirm a jury delete form, without loading the list page it redirects to.
+        """
+        res = await self.post(path, follow_redirects=False)
+        assert res.is_redirect, f"Delete fail. {path}"
+
+    async def delete_links(
+        self,
+        links: List[str],
+        concurrency: Optional[int] = None,
+    ) -> None:
+        result = await run_pool(links, self.delete, concurrency)
+        if result.errors:
+            raise result.errors[0].error
+
+    async def exists(self, path: str) -> bool:
+        logins = self._logins
+        res = await self.request("GET", path)
+        if self._logins and self._redirects_to_login(res):
+            await self.ensure_login(expired=logins)
+            res = await self.request("GET", path)
+
+        if res.status_code == httpx.codes.NOT_FOUND:
+            return False
+        if res.is_error:
+            res.raise_for_status()
+        return True
+
+    @abstractmethod
+    async def delete_user(self, user_id: str) -> None: ...
+
+    @abstractmethod
+    async def delete_team(self, team_id: str) -> None: ...
+
+    @abstractmethod
+    async def team_exists(self, team_id: str) -> bool: ...
+
     @abstractmethod
     async def create_team_and_user(
         self,
@@ -32,7 +594,11 @@ class BaseDomServerWeb(WebClient, ABC):
         category_id: int,
         affiliation_id: int,
         enabled: bool = True,
-    ) -> Tuple[str, str]:
+    ) -> str:
+        """
+        Returns:
+            The team id, the new user id is read from the users API.
+        """
         raise NotImplemented
 
     @abstractmethod
@@ -49,7 +615,7 @@ class BaseDomServerWeb(WebClient, ABC):
     async def set_user_password(
         self,
         user_id: str,
-        password: str,
+        password: Optional[str],
         user_roles: List[int],
         enabled: bool = True,
     ) -> None: ...
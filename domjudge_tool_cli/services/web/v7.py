@@ -1,10 +1,8 @@
 from enum import Enum
 from typing import List, Optional, Tuple
 
-from bs4 import BeautifulSoup
-
 from domjudge_tool_cli.models import Affiliation, CreateUser, ProblemItem, User
-from domjudge_tool_cli.services.web.base import BaseDomServerWeb, _get_input_fields
+from domjudge_tool_cli.services.web.base import BaseDomServerWeb
 
 
 class HomePath(str, Enum):
@@ -16,12 +14,15 @@ class UserPath(str, Enum):
     LIST = "/jury/users"
     ADD = "/jury/users/add"
     EDIT = "/jury/users/%s/edit"
+    DELETE = "/jury/users/%s/delete"
 
 
 class TeamPath(str, Enum):
     LIST = "/jury/teams"
     ADD = "/jury/teams/add"
+    VIEW = "/jury/teams/%s"
     EDIT = "/jury/teams/%s/edit"
+    DELETE = "/jury/teams/%s/delete"
 
 
 class AffiliationPath(str, Enum):
@@ -38,7 +39,7 @@ class DomServerWeb(BaseDomServerWeb):
     async def login(self) -> None:
         login_form = await self.get(HomePath.LOGIN)
         data = {
-            **_get_input_fields(login_form.text),
+            **self.parser.input_fields(login_form.text),
             "_username": self.username,
             "_password": self.password,
         }
@@ -52,11 +53,9 @@ class DomServerWeb(BaseDomServerWeb):
         category_id: int,
         affiliation_id: int,
         enabled: bool = True,
-    ) -> Tuple[str, str]:
-        res = await self.get(TeamPath.ADD)
-
+    ) -> str:
         data = {
-            **_get_input_fields(res.text),
+            **await self.form_fields(TeamPath.ADD),
             "team[name]": user.username,
             "team[displayName]": user.name,
             "team[affiliation]": str(affiliation_id),
@@ -69,17 +68,10 @@ class DomServerWeb(BaseDomServerWeb):
         if "team[contests][]" in data and data["team[contests][]"] is None:
             data.pop("team[contests][]")
 
-        res = await self.post(TeamPath.ADD, body=data)
-        assert res.url.path != TeamPath.ADD, f"Team create fail. {user.username}"
-        team_id = res.url.path.split("/")[-1]
-
-        res = await self.get(res.url.path)  # Go to team view page.
+        res = await self.submit_form(TeamPath.ADD, data, follow_redirects=False)
+        assert res.is_redirect, f"Team create fail. {user.username}"
 
-        soup = BeautifulSoup(res.text, "html.parser")
-        user_link = soup.select_one(".container-fluid a")
-        user_id = user_link["href"].split("/")[-1]
-
-        return team_id, user_id
+        return self.redirect_path(res).split("/")[-1]
 
     async def update_team(
         self,
@@ -93,7 +85,7 @@ class DomServerWeb(BaseDomServerWeb):
         res = await self.get(url)
 
         data = {
-            **_get_input_fields(res.text),
+            **self.parser.input_fields(res.text),
             "team[name]": user.username,
             "team[displayName]": user.name,
             "team[affiliation]": str(affiliation_id),
@@ -104,22 +96,16 @@ class DomServerWeb(BaseDomServerWeb):
         if "team[contests][]" in data and data["team[contests][]"] is None:
             data.pop("team[contests][]")
 
-        res = await self.post(url, body=data)
-        assert res.url.path != url, f"Team update fail. {user.username}"
-        team_id = res.url.path.split("/")[-1]
-
-        res = await self.get(res.url.path)  # Go to team view page.
-
-        soup = BeautifulSoup(res.text, "html.parser")
-        user_link = soup.select_one(".container-fluid a")
-        user_id = user_link["href"].split("/")[-1]
+        res = await self.submit_form(url, data, follow_redirects=False)
+        assert res.is_redirect, f"Team update fail. {user.username}"
+        team_id = self.redirect_path(res).split("/")[-1]
 
-        return team_id, user_id
+        return team_id, user.id
 
     async def set_user_password(
         self,
         user_id: str,
-        password: str,
+        password: Optional[str],
         user_roles: List[int],
         enabled: bool = True,
     ) -> None:
@@ -130,16 +116,16 @@ class DomServerWeb(BaseDomServerWeb):
         user_roles_data = list(map(str, user_roles))
 
         data = {
-            **_get_input_fields(res.text),
-            "user[plainPassword]": password,
+            **self.parser.input_fields(res.text),
             "user[enabled]": "1" if enabled else "0",
             "user[user_roles][]": user_roles_data,
         }
+        # An empty password field keeps the current password.
+        if password:
+            data["user[plainPassword]"] = password
 
-        res = await self.post(url, body=data)
-        res.raise_for_status()
-
-        assert res.url.path != url, f"User set password fail. {user_id}"
+        res = await self.submit_form(url, data, follow_redirects=False)
+        assert res.is_redirect, f"User set password fail. {user_id}"
 
     async def delete_users(
         self,
@@ -153,20 +139,17 @@ class DomServerWeb(BaseDomServerWeb):
         res = await self.get(UserPath.LIST)
         res.raise_for_status()
 
-        soup = BeautifulSoup(res.text, "html.parser")
         links = []
-        for row in soup.select("table tbody tr"):
-            name = row.select("a")[0].text.strip()
+        for row in self.parser.table_rows(res.text):
+            name = row[0].text.strip()
             lower_name = name.lower()
             if lower_name not in include or lower_name in exclude:
                 continue
 
-            link = row.select("a")[-1]["href"]
-            links.append(self.post(link))
+            link = row[-1].href
+            links.append(link)
 
-        for task in links:
-            res = await task
-            res.raise_for_status()
+        await self.delete_links(links)
 
     async def delete_teams(
         self,
@@ -180,20 +163,26 @@ class DomServerWeb(BaseDomServerWeb):
         res = await self.get(TeamPath.LIST)
         res.raise_for_status()
 
-        soup = BeautifulSoup(res.text, "html.parser")
         links = []
-        for row in soup.select("table tbody tr"):
-            teamid = row.select("a")[0].text.strip().lower()
+        for row in self.parser.table_rows(res.text):
+            teamid = row[0].text.strip().lower()
 
             if teamid not in include or teamid in exclude:
                 continue
 
-            link = row.select("a")[-2]["href"]
-            links.append(self.post(link))
+            link = row[-2].href
+            links.append(link)
+
+        await self.delete_links(links)
 
-        for task in links:
-            res = await task
-            res.raise_for_status()
+    async def delete_user(self, user_id: str) -> None:
+        await self.delete(UserPath.DELETE % user_id)
+
+    async def delete_team(self, team_id: str) -> None:
+        await self.delete(TeamPath.DELETE % team_id)
+
+    async def team_exists(self, team_id: str) -> bool:
+        return await self.exists(TeamPath.VIEW % team_id)
 
     async def create_affiliation(
         self,
@@ -201,17 +190,15 @@ class DomServerWeb(BaseDomServerWeb):
         name: str,
         country: str = "TWN",
     ) -> Affiliation:
-        res = await self.get(AffiliationPath.ADD)
-
         data = {
-            **_get_input_fields(res.text),
+            **await self.form_fields(AffiliationPath.ADD),
             "team_affiliation[shortname]": shortname,
             "team_affiliation[name]": name,
             "team_affiliation[country]": country,
             "team_affiliation[comments]": "",
         }
 
-        res = await self.post(AffiliationPath.ADD, body=data)
+        res = await self.submit_form(AffiliationPath.ADD, data)
         assert res.url.path != AffiliationPath.ADD, "Affiliation create fail."
         affiliation_id = res.url.path.split("/")[-1]
 
@@ -226,16 +213,15 @@ class DomServerWeb(BaseDomServerWeb):
         res = await self.get(AffiliationPath.LIST)
         res.raise_for_status()
 
-        soup = BeautifulSoup(res.text, "html.parser")
         objs = []
-        for row in soup.select("table tbody tr"):
-            affiliation_id = row.select("td a")[0].text.strip()
-            shortname = row.select("td a")[1].text.strip()
-            name = row.select("td a")[2].text.strip()
-            try:
-                country = row.select("td a")[3].img.get("alt", "").strip()
-            except AttributeError:
-                country = row.select("td a")[3].text.strip()
+        for row in self.parser.table_rows(res.text):
+            affiliation_id = row[0].text.strip()
+            shortname = row[1].text.strip()
+            name = row[2].text.strip()
+            if row[3].img_alt is not None:
+                country = row[3].img_alt.strip()
+            else:
+                country = row[3].text.strip()
 
             obj = Affiliation(
                 id=affiliation_id,
@@ -264,14 +250,13 @@ class DomServerWeb(BaseDomServerWeb):
         res = await self.get(ProblemPath.LIST)
         res.raise_for_status()
 
-        soup = BeautifulSoup(res.text, "html.parser")
         objs = []
-        for row in soup.select("table tbody tr"):
-            problem_id = row.select("td a")[0].text.strip()
-            name = row.select("td a")[1].text.strip()
-            time_limit = row.select("td a")[3].text.strip()
-            test_data_count = row.select("td a")[6].text.strip()
-            export_file_path = str(row.select("td a")[7]["href"]).strip()
+        for row in self.parser.table_rows(res.text):
+            problem_id = row[0].text.strip()
+            name = row[1].text.strip()
+            time_limit = row[3].text.strip()
+            test_data_count = row[6].text.strip()
+            export_file_path = str(row[7].href).strip()
 
             if only and problem_id not in only:
                 continue
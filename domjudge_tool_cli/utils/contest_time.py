@@ -0,0 +1,29 @@
+from typing import Optional, Union
+
+
+def parse_contest_time(value: Optional[Union[str, float, int]]) -> Optional[float]:
+    """
+    Contest relative time to seconds.
+
+    Accepts the API `(-)h:mm:ss.sss` format or plain seconds.
+    """
+    if value is None or value == "":
+        return None
+
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    value = value.strip()
+    sign = -1.0 if value.startswith("-") else 1.0
+    seconds = 0.0
+    for part in value.lstrip("+-").split(":"):
+        seconds = seconds * 60 + float(part)
+    return sign * seconds
+
+
+def format_contest_time(seconds: float) -> str:
+    sign = "-" if seconds < 0 else ""
+    seconds = abs(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, rest = divmod(rest, 60)
+    return f"{sign}{int(hours)}:{int(minutes):02d}:{rest:06.3f}"
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+from domjudge_tool_cli.models import CreateUser, User
+
+
+class ImportAction(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    NOOP = "no-op"
+
+
+class PlannedUser(NamedTuple):
+    action: ImportAction
+    index: int
+    user: Union[CreateUser, User]
+    changes: List[str]
+
+
+def password_sha256(password: Optional[str]) -> Optional[str]:
+    if not password:
+        return None
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def user_state(
+    user: Union[CreateUser, User],
+    category_id: Optional[int],
+    affiliation_id: Optional[int],
+    user_roles: Optional[List[int]],
+    enabled: bool,
+) -> Dict[str, Any]:
+    """The team and account settings an import applies to a user."""
+    return {
+        "name": user.name,
+        "affiliation": user.affiliation or None,
+        "affiliation_id": None if user.affiliation else affiliation_id,
+        "category_id": category_id,
+        "user_roles": sorted(user_roles or []),
+        "enabled": enabled,
+        "password": password_sha256(user.password),
+    }
+
+
+class ImportSnapshot:
+    """
+    On-disk record of the settings last applied to each imported username.
+
+    The API does not expose team categories, affiliations nor passwords, an
+    existing user is compared with this record to find what changed.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.users: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> "ImportSnapshot":
+        if self.path.is_file():
+            with open(self.path, encoding="utf-8") as f:
+                self.users = json.load(f)
+        return self
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.users, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def record(self, username: str, state: Dict[str, Any]) -> None:
+        if state.get("password") is None:
+            # The password was kept, so was its recorded hash.
+            recorded = self.users.get(username) or {}
+            state = {**state, "password": recorded.get("password")}
+        self.users[username] = state
+
+    def forget(self, username: str) -> None:
+        self.users.pop(username, None)
+
+    def changes(
+        self,
+        user: User,
+        state: Dict[str, Any],
+        new_password: bool = False,
+    ) -> List[str]:
+        """
+        Changed fields of an existing user, an unknown user always changes.
+        """
+        recorded = self.users.get(user.username)
+        if recorded is None:
+            return ["unknown"]
+
+        changes = [
+            key
+            for key, value in state.items()
+            # No input password keeps the current one.
+            if not (key == "password" and value is None) and recorded.get(key) != value
+        ]
+        if user.enabled != state["enabled"] and "enabled" not in changes:
+            changes.append("enabled")
+        if not user.team_id:
+            changes.append("team")
+        if new_password and "password" not in changes:
+            changes.append("password")
+        return changes
+
+
+def plan_import(
+    users: List[CreateUser],
+    existing_users: Dict[str, User],
+    snapshot: ImportSnapshot,
+    category_id: Optional[int],
+    affiliation_id: Optional[int],
+    user_roles: Optional[List[int]],
+    enabled: bool,
+    ignore_existing: bool = False,
+    delete_existing: bool = False,
+    new_password: bool = False,
+) -> List[PlannedUser]:
+    """
+    Plan the minimal operations to import `users`, `index` is the input position.
+
+    A deleted existing user is created again, it is planned as a delete and
+    its input row as a create. An updated user is the existing user with the
+    input fields.
+    """
+    plan = []
+    for index, user in enumerate(users):
+        existing_user = existing_users.get(user.username)
+        if not existing_user:
+            plan.append(PlannedUser(ImportAction.CREATE, index, user, []))
+            continue
+
+        if delete_existing:
+            plan.append(PlannedUser(ImportAction.DELETE, index, existing_user, []))
+            if not ignore_existing:
+                plan.append(PlannedUser(ImportAction.CREATE, index, user, []))
+            continue
+
+        if ignore_existing:
+            plan.append(PlannedUser(ImportAction.NOOP, index, user, ["ignored"]))
+            continue
+
+        state = user_state(user, category_id, affiliation_id, user_roles, enabled)
+        changes = snapshot.changes(existing_user, state, new_password)
+        if not changes:
+            plan.append(PlannedUser(ImportAction.NOOP, index, user, []))
+            continue
+
+        existing_user.update(**user.dict(exclude={"is_exist"}))
+        plan.append(PlannedUser(ImportAction.UPDATE, index, existing_user, changes))
+
+    return plan
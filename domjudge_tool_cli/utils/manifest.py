@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from domjudge_tool_cli.models import ManifestEntry
+
+
+def _files(path: Path) -> List[Path]:
+    if path.is_dir():
+        return sorted(it for it in path.rglob("*") if it.is_file())
+    return [path]
+
+
+def path_size(path: Union[str, Path]) -> int:
+    return sum(it.stat().st_size for it in _files(Path(path)))
+
+
+def file_sha256(path: Union[str, Path], chunk_size: int = 64 * 1024) -> str:
+    """Content hash of a file, or of every file name and content in a directory."""
+    path = Path(path)
+    digest = hashlib.sha256()
+    for file in _files(path):
+        if file != path:
+            digest.update(file.relative_to(path).as_posix().encode())
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SubmissionManifest:
+    """
+    On-disk record of downloaded submission files, stored next to the output tree.
+
+    Paths are kept relative to the manifest directory so the whole tree can be moved.
+    The manifest is flushed every `flush_every` records, an interrupted run keeps
+    what it already downloaded.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        cid: str,
+        flush_every: int = 50,
+    ):
+        self.root = Path(root)
+        self.cid = cid
+        self.path = self.root / f"contest_{cid}.manifest.json"
+        self.flush_every = flush_every
+        self.entries: Dict[str, ManifestEntry] = {}
+        self._pending = 0
+
+    def load(self) -> "SubmissionManifest":
+        if self.path.is_file():
+            with open(self.path, encoding="utf-8") as f:
+                content = json.load(f)
+            self.entries = {
+                it["id"]: ManifestEntry(**it) for it in content.get("submissions", [])
+            }
+        return self
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        content = {
+            "cid": self.cid,
+            "submissions": [it.dict() for it in self.entries.values()],
+        }
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        self._pending = 0
+
+    def __enter__(self) -> "SubmissionManifest":
+        return self.load()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.save()
+
+    def absolute(self, entry: ManifestEntry) -> Path:
+        return self.root / entry.path
+
+    def is_fresh(
+        self,
+        id: str,
+        verdict: Optional[str],
+        directory: Union[str, Path],
+        output: Optional[str] = None,
+    ) -> bool:
+        """
+        True if the submission was downloaded with the same verdict and output
+        into `directory` and the file on disk still has the recorded size.
+        """
+        entry = self.entries.get(id)
+        if not entry or (entry.verdict, entry.output) != (verdict, output):
+            return False
+
+        file_path = self.absolute(entry)
+        if file_path.parent.resolve() != Path(directory).resolve():
+            return False
+
+        return file_path.exists() and path_size(file_path) == entry.size
+
+    def discard_stale(
+        self,
+        id: str,
+        verdict: Optional[str],
+        output: Optional[str] = None,
+    ) -> None:
+        """
+        Forget a submission entry, removing its file if it was re-judged since
+        or is downloaded with another output.
+        """
+        entry = self.entries.pop(id, None)
+        if entry and (entry.verdict, entry.output) != (verdict, output):
+            file_path = self.absolute(entry)
+            if file_path.is_dir():
+                shutil.rmtree(file_path)
+            elif file_path.is_file():
+                file_path.unlink()
+
+    async def record(
+        self,
+        id: str,
+        verdict: Optional[str],
+        file_path: Union[str, Path],
+        output: Optional[str] = None,
+    ) -> ManifestEntry:
+        """Record a downloaded file, hashed in a thread off the event loop."""
+        file_path = Path(file_path)
+        size, sha256 = await asyncio.to_thread(
+            lambda: (path_size(file_path), file_sha256(file_path))
+        )
+        entry = ManifestEntry(
+            id=id,
+            verdict=verdict,
+            path=os.path.relpath(file_path, self.root),
+            size=size,
+            sha256=sha256,
+            output=output,
+        )
+        self.entries[id] = entry
+
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.save()
+
+        return entry
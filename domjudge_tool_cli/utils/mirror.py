@@ -0,0 +1,126 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from domjudge_tool_cli.models import Judgement, Problem, Submission, Team
+
+MIRROR_TYPES = ("teams", "problems", "submissions", "judgements")
+
+
+def parse_event(
+    event: Dict[str, Any],
+) -> Tuple[Optional[str], str, Optional[str], Optional[Any]]:
+    """
+    Normalize an event of both feed formats.
+
+    DOMjudge 7 / CCS 2020-03: {"id": token, "type", "op", "data": {...}}.
+    CCS 2022-07: {"token", "type", "id": object id, "data": {...} or null}.
+
+    Returns:
+        (token, type, object id, data), data is None for a deletion.
+    """
+    event_type = event.get("type")
+    if "op" in event:
+        data = event.get("data") or {}
+        object_id = data.get("id")
+        if event["op"] == "delete":
+            data = None
+        return event.get("id"), event_type, object_id, data
+
+    return event.get("token"), event_type, event.get("id"), event.get("data")
+
+
+class ContestMirror:
+    """
+    Local copy of a contest teams, problems, submissions and judgements,
+    kept up to date by applying event feed deltas.
+
+    The last applied token is persisted with the objects, a restart resumes
+    the feed from there instead of reloading the contest.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        cid: str,
+        flush_every: int = 500,
+        flush_interval: float = 5.0,
+    ):
+        self.root = Path(root)
+        self.cid = cid
+        self.path = self.root / f"contest_{cid}.mirror.json"
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.token: Optional[str] = None
+        self.objects: Dict[str, Dict[str, Dict[str, Any]]] = {
+            it: {} for it in MIRROR_TYPES
+        }
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+
+    def load(self) -> "ContestMirror":
+        if self.path.is_file():
+            with open(self.path, encoding="utf-8") as f:
+                content = json.load(f)
+            self.token = content.get("token")
+            for it in MIRROR_TYPES:
+                self.objects[it] = content.get(it, {})
+        return self
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        content = {"cid": self.cid, "token": self.token, **self.objects}
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+
+    def apply(self, event: Dict[str, Any]) -> bool:
+        """
+        Apply one event, returns true if it changed a mirrored object.
+        """
+        token, event_type, object_id, data = parse_event(event)
+        if token:
+            self.token = token
+
+        changed = False
+        if event_type in self.objects:
+            objects = self.objects[event_type]
+            if isinstance(data, list):
+                # A whole collection snapshot.
+                objects.clear()
+                objects.update({it["id"]: it for it in data})
+                changed = True
+            elif data is None:
+                changed = objects.pop(object_id, None) is not None
+            else:
+                objects[data.get("id", object_id)] = data
+                changed = True
+
+        self._pending += 1
+        if (
+            self._pending >= self.flush_every
+            or time.monotonic() - self._flushed_at >= self.flush_interval
+        ):
+            self.save()
+
+        return changed
+
+    def counts(self) -> Dict[str, int]:
+        return {key: len(value) for key, value in self.objects.items()}
+
+    def teams(self) -> List[Team]:
+        return [Team(**it) for it in self.objects["teams"].values()]
+
+    def problems(self) -> List[Problem]:
+        return [Problem(**it) for it in self.objects["problems"].values()]
+
+    def submissions(self) -> List[Submission]:
+        return [Submission(**it) for it in self.objects["submissions"].values()]
+
+    def judgements(self) -> List[Judgement]:
+        return [Judgement(**it) for it in self.objects["judgements"].values()]
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Iterable, List, NamedTuple, Optional
+
+DEFAULT_CONCURRENCY = 8
+
+
+class TaskError(NamedTuple):
+    index: int
+    item: Any
+    error: BaseException
+
+
+class PoolResult:
+    def __init__(
+        self,
+        results: List[Any],
+        errors: List[TaskError],
+        elapsed: float,
+    ):
+        self.results = results
+        self.errors = errors
+        self.elapsed = elapsed
+
+    @property
+    def total(self) -> int:
+        return len(self.results)
+
+    @property
+    def succeeded(self) -> int:
+        return self.total - len(self.errors)
+
+    @property
+    def throughput(self) -> float:
+        if self.elapsed <= 0:
+            return 0.0
+        return self.succeeded / self.elapsed
+
+    def summary(self, label: str = "tasks") -> str:
+        return (
+            f"{self.succeeded}/{self.total} {label} done, "
+            f"{len(self.errors)} failed in {self.elapsed:.2f}s "
+            f"({self.throughput:.2f} {label}/s)."
+        )
+
+
+async def run_pool(
+    items: Iterable[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    concurrency: Optional[int] = None,
+    on_done: Optional[Callable[[Any], None]] = None,
+) -> PoolResult:
+    """
+    Run `worker` over `items` with at most `concurrency` tasks in flight.
+
+    Results keep the input order. A failing item does not abort the pool,
+    its exception is collected in `PoolResult.errors` and its result is `None`.
+    `on_done` is called with each item once it has finished, whatever the outcome.
+    """
+    items = list(items)
+    concurrency = max(1, concurrency or DEFAULT_CONCURRENCY)
+    results: List[Any] = [None] * len(items)
+    errors: List[TaskError] = []
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for index in range(len(items)):
+        queue.put_nowait(index)
+
+    async def consume() -> None:
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            item = items[index]
+            try:
+                results[index] = await worker(item)
+            except Exception as e:
+                errors.append(TaskError(index, item, e))
+            finally:
+                if on_done:
+                    on_done(item)
+
+    start = time.monotonic()
+    workers = [
+        asyncio.create_task(consume()) for _ in range(min(concurrency, len(items)))
+    ]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        raise
+
+    errors.sort(key=lambda it: it.index)
+    return PoolResult(results, errors, time.monotonic() - start)
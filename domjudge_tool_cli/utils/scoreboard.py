@@ -0,0 +1,323 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from domjudge_tool_cli.models import (
+    Group,
+    Judgement,
+    JudgementType,
+    Problem,
+    Scoreboard,
+    ScoreboardProblem,
+    ScoreboardRow,
+    ScoreboardScore,
+    Submission,
+    Team,
+)
+from domjudge_tool_cli.utils.contest_time import format_contest_time, parse_contest_time
+
+# A team ranking key, smaller is better: (-solved, penalty minutes, solve
+# minutes from the last to the first), the last solve breaks ties.
+RankKey = Tuple[int, int, Tuple[int, ...]]
+
+# Penalty minutes of a rejected try, the DOMjudge default.
+DEFAULT_PENALTY_MINUTES = 20
+
+CORRECT = "correct"
+REJECTED = "rejected"
+IGNORED = "ignored"
+
+
+class ScoreboardEngine:
+    """
+    ICPC scoreboard computed from submissions and judgements, without the server.
+
+    Cell state lives in flat per team and problem arrays. A judgement only
+    recomputes its own cell and moves its team in a sorted list of ranking keys,
+    a rank is then found with a bisect instead of sorting the board.
+
+    Like the server board, teams in hidden groups only are left out and
+    submissions at or after `contest_end`, in contest time seconds, are too late.
+    Excluded teams and ignored problems give "what-if" boards, ignored problems
+    match an id or a label.
+
+    usage:
+        engine = ScoreboardEngine(teams, problems, judgement_types)
+        engine.load(submissions, judgements)
+        scoreboard = engine.scoreboard()
+    """
+
+    def __init__(
+        self,
+        teams: List[Team],
+        problems: List[Problem],
+        judgement_types: List[JudgementType],
+        penalty_minutes: int = DEFAULT_PENALTY_MINUTES,
+        exclude_teams: Iterable[str] = (),
+        ignore_problems: Iterable[str] = (),
+        groups: Iterable[Group] = (),
+        contest_end: Optional[float] = None,
+    ):
+        exclude_teams = set(exclude_teams)
+        ignore_problems = set(ignore_problems)
+        hidden_groups = {it.id for it in groups if it.hidden}
+        self.teams = [
+            it
+            for it in teams
+            if it.id not in exclude_teams
+            and not (it.group_ids and set(it.group_ids) <= hidden_groups)
+        ]
+        self.problems = [
+            it
+            for it in sorted(problems, key=lambda it: it.ordinal)
+            if it.id not in ignore_problems and it.label not in ignore_problems
+        ]
+        self.penalty_minutes = penalty_minutes
+        self.contest_end = contest_end
+        self.verdicts: Dict[str, str] = {}
+        for it in judgement_types:
+            if it.solved:
+                self.verdicts[it.id] = CORRECT
+            elif it.penalty:
+                self.verdicts[it.id] = REJECTED
+            else:
+                self.verdicts[it.id] = IGNORED
+
+        self._team_index = {it.id: index for index, it in enumerate(self.teams)}
+        self._problem_index = {it.id: index for index, it in enumerate(self.problems)}
+        self.reset()
+
+    def reset(self) -> None:
+        """Back to the board without submissions."""
+        size = len(self.teams) * len(self.problems)
+        self.num_judged = [0] * size
+        self.num_pending = [0] * size
+        self.rejected = [0] * size
+        self.solve_time: List[Optional[int]] = [None] * size
+
+        self._submissions: Dict[str, Tuple[int, float]] = {}
+        self._cell_submissions: Dict[int, List[Tuple[float, str]]] = {}
+        self._results: Dict[str, str] = {}
+        self._keys: List[RankKey] = [self._empty_key()] * len(self.teams)
+        self._ranking: List[RankKey] = sorted(self._keys)
+
+    @staticmethod
+    def _empty_key() -> RankKey:
+        return 0, 0, ()
+
+    def _cell(self, submission: Submission) -> Optional[int]:
+        team = self._team_index.get(submission.team_id)
+        problem = self._problem_index.get(submission.problem_id)
+        if team is None or problem is None:
+            return None
+        return team * len(self.problems) + problem
+
+    def add_submission(self, submission: Submission) -> None:
+        """A new submission, pending until its judgement."""
+        cell = self._cell(submission)
+        if cell is None or submission.id in self._submissions:
+            return
+
+        seconds = parse_contest_time(submission.contest_time) or 0.0
+        if self.contest_end is not None and seconds >= self.contest_end:
+            return
+
+        self._submissions[submission.id] = (cell, seconds)
+        insort(self._cell_submissions.setdefault(cell, []), (seconds, submission.id))
+        self._update_cell(cell)
+
+    def apply_judgement(self, judgement: Judgement) -> None:
+        """The last valid judgement of a submission is its result."""
+        if not judgement.valid or judgement.submission_id not in self._submissions:
+            return
+
+        result = self.verdicts.get(judgement.judgement_type_id)
+        if result is None:
+            return
+
+        self._results[judgement.submission_id] = result
+        self._update_cell(self._submissions[judgement.submission_id][0])
+
+    def load(
+        self,
+        submissions: Iterable[Submission],
+        judgements: Iterable[Judgement],
+    ) -> "ScoreboardEngine":
+        for it in submissions:
+            self.add_submission(it)
+        for it in judgements:
+            self.apply_judgement(it)
+        return self
+
+    def _update_cell(self, cell: int) -> None:
+        judged = pending = rejected = 0
+        solve_time = None
+        for seconds, submission_id in self._cell_submissions.get(cell, []):
+            result = self._results.get(submission_id)
+            if result is None:
+                pending += 1
+            elif result == CORRECT:
+                judged += 1
+                solve_time = int(seconds // 60)
+                break
+            elif result == REJECTED:
+                judged += 1
+                rejected += 1
+
+        self.num_judged[cell] = judged
+        self.num_pending[cell] = pending
+        changed = (self.rejected[cell], self.solve_time[cell]) != (rejected, solve_time)
+        self.rejected[cell] = rejected
+        self.solve_time[cell] = solve_time
+        if changed:
+            self._update_team(cell // len(self.problems))
+
+    def _team_key(self, team: int) -> RankKey:
+        start = team * len(self.problems)
+        solved = 0
+        minutes = 0
+        solve_times = []
+        for cell in range(start, start + len(self.problems)):
+            solve_time = self.solve_time[cell]
+            if solve_time is None:
+                continue
+            solved += 1
+            minutes += solve_time + self.rejected[cell] * self.penalty_minutes
+            solve_times.append(solve_time)
+
+        return -solved, minutes, tuple(sorted(solve_times, reverse=True))
+
+    def _update_team(self, team: int) -> None:
+        old_key = self._keys[team]
+        new_key = self._team_key(team)
+        if new_key == old_key:
+            return
+
+        del self._ranking[bisect_left(self._ranking, old_key)]
+        insort(self._ranking, new_key)
+        self._keys[team] = new_key
+
+    def rank(self, team_id: str) -> int:
+        """Teams with the same key share the rank."""
+        key = self._keys[self._team_index[team_id]]
+        return bisect_left(self._ranking, key) + 1
+
+    def scoreboard(self, contest_time: Optional[float] = None) -> Scoreboard:
+        first_solves = []
+        for problem in range(len(self.problems)):
+            times = [
+                self.solve_time[team * len(self.problems) + problem]
+                for team in range(len(self.teams))
+            ]
+            solved = [it for it in times if it is not None]
+            first_solves.append(min(solved) if solved else None)
+
+        order = sorted(
+            range(len(self.teams)),
+            key=lambda it: (self._keys[it], self.teams[it].name),
+        )
+        rows = []
+        for team in order:
+            key = self._keys[team]
+            cells = []
+            for index, problem in enumerate(self.problems):
+                cell = team * len(self.problems) + index
+                solve_time = self.solve_time[cell]
+                cells.append(
+                    ScoreboardProblem(
+                        label=problem.label,
+                        problem_id=problem.id,
+                        num_judged=self.num_judged[cell],
+                        num_pending=self.num_pending[cell],
+                        solved=solve_time is not None,
+                        time=solve_time,
+                        first_to_solve=(
+                            solve_time is not None and solve_time == first_solves[index]
+                        ),
+                    )
+                )
+
+            rows.append(
+                ScoreboardRow(
+                    rank=bisect_left(self._ranking, key) + 1,
+                    team_id=self.teams[team].id,
+                    score=ScoreboardScore(num_solved=-key[0], total_time=key[1]),
+                    problems=cells,
+                )
+            )
+
+        return Scoreboard(
+            contest_time=(
+                format_contest_time(contest_time) if contest_time is not None else None
+            ),
+            rows=rows,
+        )
+
+
+class ScoreboardTimeline:
+    """
+    Scoreboard at any contest time, replayed through a `ScoreboardEngine`.
+
+    Submissions are sorted by `contest_time` and judgements by
+    `end_contest_time` once. Seeking forward only applies the events in
+    between, so a frame series is one pass over the events. Seeking back
+    replays from the start. A judgement without an end time is not finished,
+    its submission stays pending.
+
+    usage:
+        timeline = ScoreboardTimeline(engine, submissions, judgements)
+        for seconds, scoreboard in timeline.frames(range(0, 18000, 1800)):
+            ...
+    """
+
+    def __init__(
+        self,
+        engine: ScoreboardEngine,
+        submissions: Iterable[Submission],
+        judgements: Iterable[Judgement],
+    ):
+        self.engine = engine
+        events: List[Tuple[float, int, Union[Submission, Judgement]]] = []
+        for it in submissions:
+            events.append((parse_contest_time(it.contest_time) or 0.0, 0, it))
+        for it in judgements:
+            seconds = parse_contest_time(it.end_contest_time)
+            if seconds is not None:
+                events.append((seconds, 1, it))
+
+        # Stable, a submission comes before its judgement at the same time and
+        # judgements keep their order.
+        events.sort(key=lambda it: (it[0], it[1]))
+        self._events = events
+        self._position = 0
+        self.time: Optional[float] = None
+
+    @property
+    def end_time(self) -> float:
+        """Contest time of the last event."""
+        return self._events[-1][0] if self._events else 0.0
+
+    def seek(self, seconds: float) -> None:
+        if self.time is not None and seconds < self.time:
+            self.engine.reset()
+            self._position = 0
+
+        while self._position < len(self._events):
+            event_time, kind, event = self._events[self._position]
+            if event_time > seconds:
+                break
+            if kind:
+                self.engine.apply_judgement(event)
+            else:
+                self.engine.add_submission(event)
+            self._position += 1
+
+        self.time = seconds
+
+    def at(self, seconds: float) -> Scoreboard:
+        self.seek(seconds)
+        return self.engine.scoreboard(seconds)
+
+    def frames(self, times: Iterable[float]) -> Iterator[Tuple[float, Scoreboard]]:
+        """Boards at sorted `times`, in one pass over the events."""
+        for seconds in sorted(times):
+            yield seconds, self.at(seconds)
@@ -0,0 +1,464 @@
+import asyncio
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from domjudge_tool_cli.models import (
+    Contest,
+    Group,
+    Judgement,
+    JudgementType,
+    Problem,
+    Submission,
+    Team,
+    User,
+)
+from domjudge_tool_cli.utils.contest_time import parse_contest_time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contests (
+    cid TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS contest_details (
+    cid TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    team_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_username ON users (username);
+CREATE INDEX IF NOT EXISTS users_team_id ON users (team_id);
+
+CREATE TABLE IF NOT EXISTS teams (
+    cid TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (cid, id)
+);
+
+CREATE TABLE IF NOT EXISTS groups (
+    cid TEXT NOT NULL,
+    id TEXT NOT NULL,
+    hidden INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (cid, id)
+);
+
+CREATE TABLE IF NOT EXISTS problems (
+    cid TEXT NOT NULL,
+    id TEXT NOT NULL,
+    short_name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (cid, id)
+);
+
+CREATE TABLE IF NOT EXISTS judgement_types (
+    cid TEXT NOT NULL,
+    id TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (cid, id)
+);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    cid TEXT NOT NULL,
+    id TEXT NOT NULL,
+    team_id TEXT NOT NULL,
+    problem_id TEXT NOT NULL,
+    language_id TEXT,
+    contest_seconds REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (cid, id)
+);
+CREATE INDEX IF NOT EXISTS submissions_team ON submissions (cid, team_id);
+CREATE INDEX IF NOT EXISTS submissions_problem ON submissions (cid, problem_id);
+CREATE INDEX IF NOT EXISTS submissions_language ON submissions (cid, language_id);
+CREATE INDEX IF NOT EXISTS submissions_time ON submissions (cid, contest_seconds);
+
+CREATE TABLE IF NOT EXISTS judgements (
+    cid TEXT NOT NULL,
+    id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    submission_id TEXT NOT NULL,
+    judgement_type_id TEXT,
+    valid INTEGER NOT NULL,
+    end_contest_seconds REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (cid, id)
+);
+CREATE INDEX IF NOT EXISTS judgements_submission ON judgements (cid, submission_id);
+"""
+
+# The current verdict of a submission: its last valid judgement, else its last one.
+LATEST_JUDGEMENTS = """
+SELECT submission_id, judgement_type_id, MAX(valid * 1000000000 + seq)
+FROM judgements
+WHERE cid = :cid
+GROUP BY submission_id
+"""
+
+
+def verdict_name(judgement_type: JudgementType) -> str:
+    return str(judgement_type.name).lower().replace(" ", "_")
+
+
+def current_judgements(judgements: Iterable[Judgement]) -> Dict[str, Judgement]:
+    """
+    The current judgement of each submission, like `LATEST_JUDGEMENTS`: its
+    last valid judgement, else its last one.
+    """
+    current: Dict[str, Judgement] = {}
+    for it in judgements:
+        previous = current.get(it.submission_id)
+        if previous is None or it.valid or not previous.valid:
+            current[it.submission_id] = it
+    return current
+
+
+class ContestStore:
+    """
+    Local SQLite copy of the v4 API entities with indexes for filtered queries.
+
+    usage:
+        with ContestStore("contest.sqlite3") as store:
+            await store.sync(session, cid)
+            submissions = store.submissions(cid, verdict="correct")
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "ContestStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _replace(
+        self,
+        table: str,
+        cid: Optional[str],
+        columns: Tuple[str, ...],
+        rows: Iterable[Tuple[Any, ...]],
+    ) -> None:
+        placeholders = ", ".join("?" for _ in columns)
+        with self.db:
+            if cid is None:
+                self.db.execute(f"DELETE FROM {table}")
+            else:
+                self.db.execute(f"DELETE FROM {table} WHERE cid = ?", (cid,))
+            self.db.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                rows,
+            )
+
+    def save_contest(self, contest: Contest) -> None:
+        self._replace(
+            "contest_details",
+            contest.id,
+            ("cid", "data"),
+            [(contest.id, contest.json())],
+        )
+
+    def save_users(self, users: List[User]) -> None:
+        self._replace(
+            "users",
+            None,
+            ("id", "username", "team_id", "data"),
+            ((it.id, it.username, it.team_id, it.json()) for it in users),
+        )
+
+    def save_teams(self, cid: str, teams: List[Team]) -> None:
+        self._replace(
+            "teams",
+            cid,
+            ("cid", "id", "name", "data"),
+            ((cid, it.id, it.name, it.json()) for it in teams),
+        )
+
+    def save_groups(self, cid: str, groups: List[Group]) -> None:
+        self._replace(
+            "groups",
+            cid,
+            ("cid", "id", "hidden", "data"),
+            ((cid, it.id, int(it.hidden), it.json()) for it in groups),
+        )
+
+    def save_problems(self, cid: str, problems: List[Problem]) -> None:
+        self._replace(
+            "problems",
+            cid,
+            ("cid", "id", "short_name", "data"),
+            ((cid, it.id, it.short_name, it.json()) for it in problems),
+        )
+
+    def save_judgement_types(
+        self,
+        cid: str,
+        judgement_types: List[JudgementType],
+    ) -> None:
+        self._replace(
+            "judgement_types",
+            cid,
+            ("cid", "id", "verdict", "data"),
+            ((cid, it.id, verdict_name(it), it.json()) for it in judgement_types),
+        )
+
+    def save_submissions(self, cid: str, submissions: List[Submission]) -> None:
+        self._replace(
+            "submissions",
+            cid,
+            (
+                "cid",
+                "id",
+                "team_id",
+                "problem_id",
+                "language_id",
+                "contest_seconds",
+                "data",
+            ),
+            (
+                (
+                    cid,
+                    it.id,
+                    it.team_id,
+                    it.problem_id,
+                    it.language_id,
+                    parse_contest_time(it.contest_time),
+                    it.json(),
+                )
+                for it in submissions
+            ),
+        )
+
+    def save_judgements(self, cid: str, judgements: List[Judgement]) -> None:
+        self._replace(
+            "judgements",
+            cid,
+            (
+                "cid",
+                "id",
+                "seq",
+                "submission_id",
+                "judgement_type_id",
+                "valid",
+                "end_contest_seconds",
+                "data",
+            ),
+            (
+                (
+                    cid,
+                    it.id,
+                    seq,
+                    it.submission_id,
+                    it.judgement_type_id,
+                    int(it.valid),
+                    parse_contest_time(it.end_contest_time),
+                    it.json(),
+                )
+                for seq, it in enumerate(judgements)
+            ),
+        )
+
+    async def sync(self, session, cid: str, users: bool = False) -> Dict[str, int]:
+        """
+        Replace the contest entities with a fresh download through a
+        `DomServerSession`, returns the stored count per table.
+
+        Args:
+            users: Also replace the users, an admin only endpoint the contest
+                queries do not need. They are fetched past the HTTP cache.
+        """
+        (
+            contest,
+            teams,
+            groups,
+            problems,
+            judgement_types,
+            submissions,
+            judgements,
+        ) = await asyncio.gather(
+            session.contests.contest(cid),
+            session.teams.all_teams(cid),
+            session.groups.all_groups(cid),
+            session.problems.all_problems(cid),
+            session.judgement_types.all_judgement_types(cid),
+            session.submissions.all_submissions(cid),
+            session.judgements.all_judgements(cid),
+        )
+        counts = {}
+        if users:
+            all_users = await session.users.all_users(cache=False)
+            self.save_users(all_users)
+            counts["users"] = len(all_users)
+
+        self.save_contest(contest)
+        self.save_teams(cid, teams)
+        self.save_groups(cid, groups)
+        self.save_problems(cid, problems)
+        self.save_judgement_types(cid, judgement_types)
+        self.save_submissions(cid, submissions)
+        self.save_judgements(cid, judgements)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO contests (cid, synced_at) VALUES (?, ?)",
+                (cid, time.time()),
+            )
+        return {
+            **counts,
+            "teams": len(teams),
+            "groups": len(groups),
+            "problems": len(problems),
+            "judgement_types": len(judgement_types),
+            "submissions": len(submissions),
+            "judgements": len(judgements),
+        }
+
+    def synced_at(self, cid: str) -> Optional[float]:
+        row = self.db.execute(
+            "SELECT synced_at FROM contests WHERE cid = ?",
+            (cid,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def contest(self, cid: str) -> Optional[Contest]:
+        row = self.db.execute(
+            "SELECT data FROM contest_details WHERE cid = ?",
+            (cid,),
+        ).fetchone()
+        return Contest(**json.loads(row[0])) if row else None
+
+    def users(
+        self,
+        ids: Optional[List[str]] = None,
+        team_id: Optional[str] = None,
+    ) -> List[User]:
+        query = "SELECT data FROM users WHERE 1 = 1"
+        params: List[Any] = []
+        if ids:
+            query += f" AND id IN ({', '.join('?' for _ in ids)})"
+            params.extend(ids)
+        if team_id:
+            query += " AND team_id = ?"
+            params.append(team_id)
+
+        rows = self.db.execute(query + " ORDER BY username", params)
+        return [User(**json.loads(data)) for (data,) in rows]
+
+    def teams(self, cid: str) -> List[Team]:
+        rows = self.db.execute("SELECT data FROM teams WHERE cid = ?", (cid,))
+        return [Team(**json.loads(data)) for (data,) in rows]
+
+    def groups(self, cid: str) -> List[Group]:
+        rows = self.db.execute("SELECT data FROM groups WHERE cid = ?", (cid,))
+        return [Group(**json.loads(data)) for (data,) in rows]
+
+    def problems(self, cid: str) -> List[Problem]:
+        rows = self.db.execute("SELECT data FROM problems WHERE cid = ?", (cid,))
+        return [Problem(**json.loads(data)) for (data,) in rows]
+
+    def judgement_types(self, cid: str) -> List[JudgementType]:
+        rows = self.db.execute(
+            "SELECT data FROM judgement_types WHERE cid = ?",
+            (cid,),
+        )
+        return [JudgementType(**json.loads(data)) for (data,) in rows]
+
+    def judgements(self, cid: str) -> List[Judgement]:
+        rows = self.db.execute(
+            "SELECT data FROM judgements WHERE cid = ? ORDER BY seq",
+            (cid,),
+        )
+        return [Judgement(**json.loads(data)) for (data,) in rows]
+
+    def judgement_mapping(self, cid: str) -> Dict[str, str]:
+        """Submission id to its current verdict name, ex: `wrong_answer`."""
+        rows = self.db.execute(
+            f"""
+            SELECT latest.submission_id, judgement_types.verdict
+            FROM ({LATEST_JUDGEMENTS}) AS latest
+            LEFT JOIN judgement_types
+                ON judgement_types.cid = :cid
+                AND judgement_types.id = latest.judgement_type_id
+            """,
+            {"cid": cid},
+        )
+        return dict(rows.fetchall())
+
+    def submissions(
+        self,
+        cid: str,
+        team_id: Optional[str] = None,
+        problem_id: Optional[str] = None,
+        language_id: Optional[str] = None,
+        verdict: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[Submission]:
+        """
+        Args:
+            verdict: Judgement type id or verdict name, ex: `AC` or `correct`.
+            since: Contest time seconds, inclusive.
+            until: Contest time seconds, exclusive.
+        """
+        query = "SELECT submissions.data FROM submissions"
+        params: Dict[str, Any] = {"cid": cid}
+        conditions = ["submissions.cid = :cid"]
+
+        if verdict:
+            query += f"""
+                JOIN ({LATEST_JUDGEMENTS}) AS latest
+                    ON latest.submission_id = submissions.id
+                LEFT JOIN judgement_types
+                    ON judgement_types.cid = :cid
+                    AND judgement_types.id = latest.judgement_type_id
+            """
+            conditions.append(
+                "(latest.judgement_type_id = :verdict"
+                " OR judgement_types.verdict = :verdict)"
+            )
+            params["verdict"] = verdict
+
+        for column, value in (
+            ("team_id", team_id),
+            ("problem_id", problem_id),
+            ("language_id", language_id),
+        ):
+            if value:
+                conditions.append(f"submissions.{column} = :{column}")
+                params[column] = value
+
+        if since is not None:
+            conditions.append("submissions.contest_seconds >= :since")
+            params["since"] = since
+
+        if until is not None:
+            conditions.append("submissions.contest_seconds < :until")
+            params["until"] = until
+
+        if ids:
+            names = [f"id_{index}" for index in range(len(ids))]
+            conditions.append(
+                f"submissions.id IN ({', '.join(':' + it for it in names)})"
+            )
+            params.update(zip(names, ids))
+
+        query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY submissions.contest_seconds, submissions.id"
+        rows = self.db.execute(query, params)
+        return [Submission(**json.loads(data)) for (data,) in rows]
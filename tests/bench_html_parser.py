@@ -0,0 +1,77 @@
+"""
+Compare the jury page parser backends on the v7 and v8 fixture pages.
+
+The list pages are grown to `--rows` table rows, like a large contest.
+
+usage:
+    python -m tests.bench_html_parser --rows 3000 --repeat 5
+"""
+
+import argparse
+import re
+import timeit
+from pathlib import Path
+
+from domjudge_tool_cli.services.web.base import HTMLParserBackend, get_page_parser
+
+FIXTURES = Path(__file__).parent / "fixtures" / "web"
+ROW = re.compile(r"<tr>.*?</tr>\n", re.S)
+
+
+def grow_rows(page: str, rows: int) -> str:
+    body_start = page.index("<tbody>") + len("<tbody>\n")
+    body_end = page.index("</tbody>")
+    templates = ROW.findall(page[body_start:body_end])
+    body = "".join(templates[index % len(templates)] for index in range(rows))
+    return page[:body_start] + body + page[body_end:]
+
+
+def operations(rows: int):
+    for version in ("v7", "v8"):
+        folder = FIXTURES / version
+        for name in ("login", "team_add"):
+            page = (folder / f"{name}.html").read_text(encoding="utf-8")
+            yield f"{version}/{name} fields", page, lambda p, s: p.input_fields(s)
+
+        for name in ("teams", "users", "affiliations", "problems"):
+            page = (folder / f"{name}.html").read_text(encoding="utf-8")
+            yield (
+                f"{version}/{name} x{rows} rows",
+                grow_rows(page, rows),
+                lambda p, s: p.table_rows(s),
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    backends = []
+    for backend in HTMLParserBackend:
+        if backend == HTMLParserBackend.AUTO:
+            continue
+        try:
+            backends.append(get_page_parser(backend))
+        except ImportError:
+            print(f"skip {backend.value}: not installed")
+
+    print(f"{'page':<32}" + "".join(f"{it.backend.value:>12}" for it in backends))
+    for label, page, operation in operations(args.rows):
+        times = []
+        for page_parser in backends:
+            best = min(
+                timeit.repeat(
+                    lambda: operation(page_parser, page),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            times.append(best)
+
+        print(f"{label:<32}" + "".join(f"{it * 1000:>10.2f}ms" for it in times))
+
+
+if __name__ == "__main__":
+    main()
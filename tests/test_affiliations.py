@@ -0,0 +1,37 @@
+import asyncio
+
+from domjudge_tool_cli.models import Affiliation
+from domjudge_tool_cli.services.web.affiliations import AffiliationIndex
+
+
+class FakeWeb:
+    def __init__(self):
+        self.listed = 0
+        self.created = []
+
+    async def get_affiliations(self):
+        self.listed += 1
+        return [Affiliation(id="1", shortname="NTUB", name="Taipei", country="TWN")]
+
+    async def create_affiliation(self, shortname, name, country="TWN"):
+        await asyncio.sleep(0.01)
+        self.created.append(name)
+        return Affiliation(id="2", shortname=shortname, name=name, country=country)
+
+
+def test_affiliation_index_creates_once():
+    web = FakeWeb()
+    index = AffiliationIndex(web)
+
+    async def run():
+        return await asyncio.gather(
+            index.get_or_create("Taipei"),
+            index.get_or_create("NTUB"),
+            *(index.get_or_create("NTU") for _ in range(5)),
+        )
+
+    affiliations = asyncio.run(run())
+
+    assert [it.id for it in affiliations] == ["1", "1"] + ["2"] * 5
+    assert web.listed == 1
+    assert web.created == ["NTU"]
@@ -0,0 +1,86 @@
+import asyncio
+import os
+
+import httpx
+
+from domjudge_tool_cli.services.api_client import APIClient
+from domjudge_tool_cli.services.cache import (
+    HTTPCache,
+    SubmissionFileCache,
+    link_or_copy,
+)
+
+
+def test_submission_file_cache_lru_and_shared_blobs(tmp_path):
+    with SubmissionFileCache(tmp_path / "cache", max_size=10) as cache:
+        key_1 = cache.key("http://domjudge.test/", "1", "1")
+        key_2 = cache.key("http://domjudge.test", "1", "2")
+        assert key_1 == "http://domjudge.test|1|1"
+
+        files = cache.put(key_1, [("a.py", b"print(1)")])
+        cache.put(key_2, [("b.py", b"print(1)")])
+        assert cache.get(key_2)[0].path == files[0].path
+
+        output = tmp_path / "a.py"
+        link_or_copy(files[0].path, output)
+        assert output.read_bytes() == b"print(1)"
+        # A copy is writable and does not share the blob.
+        output.write_bytes(b"edited")
+        assert files[0].read() == b"print(1)"
+
+        linked = tmp_path / "linked.py"
+        link_or_copy(files[0].path, linked, link=True)
+        assert linked.stat().st_ino == files[0].path.stat().st_ino
+
+        cache.put(cache.key("http://domjudge.test", "1", "3"), [("c.py", b"x")])
+
+        assert cache.get(key_1) is None
+        assert cache.get(key_2)[0].read() == b"print(1)"
+        assert files[0].path.is_file()
+
+
+def test_api_client_conditional_requests(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=[{"id": "1"}], headers={"ETag": '"v1"'})
+
+    async def main():
+        client = httpx.AsyncClient(
+            base_url="http://domjudge.test",
+            transport=httpx.MockTransport(handler),
+        )
+        async with APIClient(
+            "http://domjudge.test",
+            "admin",
+            "admin",
+            client=client,
+            http_cache=HTTPCache(tmp_path),
+        ) as api:
+            first = await api.get("/api/v4/users", cache=True)
+            second = await api.get("/api/v4/users", cache=True)
+        return first, second
+
+    assert asyncio.run(main()) == ([{"id": "1"}], [{"id": "1"}])
+    assert [it.headers.get("If-None-Match") for it in requests] == [None, '"v1"']
+
+
+def test_http_cache_lru(tmp_path):
+    cache = HTTPCache(tmp_path, ttl=60, max_size=300)
+    response = httpx.Response(200)
+    keys = [cache.key("http://domjudge.test", f"/api/v4/{it}") for it in "abc"]
+
+    cache.store(keys[0], response, "a" * 50)
+    cache.store(keys[1], response, "b" * 50)
+    # A loaded entry is used again, the other one is the oldest.
+    os.utime(cache.entry_path(keys[1]), (0, 0))
+    assert cache.load(keys[0])["body"] == "a" * 50
+    cache.store(keys[2], response, "c" * 50)
+
+    assert cache.load(keys[1]) is None
+    assert cache.load(keys[0])["body"] == "a" * 50
+    assert cache.load(keys[2])["body"] == "c" * 50
+    assert sum(stat.st_size for _, stat in cache.entries()) <= 300
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+
+from domjudge_tool_cli.services.web.base import (
+    HTML_PARSER_ENV,
+    HTMLParserBackend,
+    SoupParser,
+    get_page_parser,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures" / "web"
+PAGES = sorted(FIXTURES.glob("v*/*.html"))
+
+
+def available_parsers():
+    parsers = []
+    for backend in HTMLParserBackend:
+        if backend == HTMLParserBackend.AUTO:
+            continue
+        try:
+            parsers.append(get_page_parser(backend))
+        except ImportError:
+            continue
+    return parsers
+
+
+def test_auto_is_soup(monkeypatch):
+    monkeypatch.delenv(HTML_PARSER_ENV, raising=False)
+    assert isinstance(get_page_parser(), SoupParser)
+    assert isinstance(get_page_parser(HTMLParserBackend.AUTO), SoupParser)
+
+
+@pytest.mark.parametrize("path", PAGES, ids=lambda it: f"{it.parent.name}/{it.name}")
+def test_backends_agree(path):
+    page = path.read_text(encoding="utf-8")
+    soup, *others = available_parsers()
+
+    for parser in others:
+        assert parser.input_fields(page) == soup.input_fields(page), parser.backend
+        assert parser.table_rows(page) == soup.table_rows(page), parser.backend
+
+
+@pytest.mark.parametrize("parser", available_parsers(), ids=lambda it: it.backend)
+def test_page_extracts(parser):
+    form = (FIXTURES / "v8" / "team_add.html").read_text(encoding="utf-8")
+    fields = parser.input_fields(form)
+    assert fields["team[_token]"] == "9ftbQ0lb3c-kqIYpZqrG3Re0Sc1mCVNOrRpyXLIKn8E"
+    assert fields["team[category]"] == "3"
+    assert fields["team[affiliation]"] is None
+    assert fields["team[addUserForTeam]"] == "dont-add-user"
+    assert fields["team[enabled]"] == "0"
+    assert "commented" not in fields
+    assert None not in fields
+
+    affiliations = (FIXTURES / "v7" / "affiliations.html").read_text(encoding="utf-8")
+    rows = parser.table_rows(affiliations)
+    assert [row[0].text for row in rows] == ["1", "2", "3"]
+    assert [row[3].img_alt for row in rows] == ["NLD", "TWN", None]
+    assert parser.table_rows("") == []
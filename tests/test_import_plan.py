@@ -0,0 +1,105 @@
+from domjudge_tool_cli.commands.users._users import (
+    TEAM_ROLE_ID,
+    assign_passwords,
+    gen_import_payloads,
+    needs_user_form,
+)
+from domjudge_tool_cli.models import CreateUser, User
+from domjudge_tool_cli.utils.import_plan import (
+    ImportAction,
+    ImportSnapshot,
+    plan_import,
+    user_state,
+)
+
+
+def existing(username, team_id="1"):
+    return User(
+        id=username,
+        username=username,
+        name=username,
+        roles=["team"],
+        enabled=True,
+        team_id=team_id,
+    )
+
+
+def test_plan_import_only_changed_users(tmp_path):
+    snapshot = ImportSnapshot(tmp_path / "snapshot.json")
+    for username in ("a", "b"):
+        user = CreateUser(username=username, name=username, password="p")
+        snapshot.record(username, user_state(user, 3, 1, [3], True))
+    snapshot.save()
+    snapshot = ImportSnapshot(tmp_path / "snapshot.json").load()
+
+    users = [
+        CreateUser(username="a", name="a"),
+        CreateUser(username="b", name="typo fixed"),
+        CreateUser(username="c", name="c"),
+        CreateUser(username="d", name="d"),
+    ]
+    existing_users = {it: existing(it) for it in ("a", "b", "d")}
+    plan = plan_import(users, existing_users, snapshot, 3, 1, [3], True)
+
+    assert [(it.action, it.index, it.changes) for it in plan] == [
+        (ImportAction.NOOP, 0, []),
+        (ImportAction.UPDATE, 1, ["name"]),
+        (ImportAction.CREATE, 2, []),
+        (ImportAction.UPDATE, 3, ["unknown"]),
+    ]
+    assert plan[1].user.name == "typo fixed"
+
+    plan = plan_import(users[:1], existing_users, snapshot, 3, 1, [3], True, True)
+    assert plan[0].action == ImportAction.NOOP
+
+    plan = plan_import(
+        users[:1], existing_users, snapshot, 3, 1, [3], True, False, True
+    )
+    assert [it.action for it in plan] == [ImportAction.DELETE, ImportAction.CREATE]
+
+
+def test_api_import_payloads_and_user_form():
+    assert not needs_user_form([TEAM_ROLE_ID], True)
+    assert not needs_user_form(None, True)
+    assert needs_user_form([TEAM_ROLE_ID, 6], True)
+    assert needs_user_form([TEAM_ROLE_ID], False)
+
+    users = [
+        CreateUser(username="u1", name="One", affiliation="NTUB", team_id="55"),
+        existing("u2", team_id="7"),
+    ]
+    teams, accounts = gen_import_payloads(users, 3, 1, {"NTUB": "10"})
+
+    assert [(it["id"], it["organization_id"]) for it in teams] == [
+        ("55", "10"),
+        ("7", "1"),
+    ]
+    assert "id" not in accounts[0]
+    assert (accounts[1]["id"], accounts[1]["team_id"]) == ("u2", "7")
+
+
+def test_passwords_of_created_users_only(tmp_path):
+    created = CreateUser(username="new", name="new")
+    updated = existing("old")
+    assign_passwords([created, updated])
+    assert created.password
+    assert updated.password is None
+
+    _, accounts = gen_import_payloads([updated], 3, 1)
+    assert "password" not in accounts[0]
+
+    snapshot = ImportSnapshot(tmp_path / "snapshot.json")
+    snapshot.record("old", user_state(existing("old"), 3, 1, [3], True))
+    updated.password = "kept"
+    snapshot.record("old", user_state(updated, 3, 1, [3], True))
+    updated.password = None
+    snapshot.record("old", user_state(updated, 3, 1, [3], True))
+    assert (
+        snapshot.users["old"]["password"]
+        == user_state(
+            CreateUser(username="old", name="old", password="kept"), 3, 1, [3], True
+        )["password"]
+    )
+
+    assign_passwords([updated], new_password=True)
+    assert updated.password
@@ -0,0 +1,31 @@
+import asyncio
+
+from domjudge_tool_cli.utils.manifest import SubmissionManifest
+
+
+def test_manifest_tracks_fresh_and_rejudged_submissions(tmp_path):
+    directory = tmp_path / "problem_A" / "team_foo"
+    directory.mkdir(parents=True)
+    source = directory / "wrong_answer_1.cpp"
+    source.write_text("int main() {}")
+
+    with SubmissionManifest(tmp_path, "1") as manifest:
+        entry = asyncio.run(manifest.record("1", "wrong_answer", source, "source"))
+
+    assert entry.path == "problem_A/team_foo/wrong_answer_1.cpp"
+    assert entry.size == len("int main() {}")
+
+    manifest = SubmissionManifest(tmp_path, "1").load()
+    assert manifest.is_fresh("1", "wrong_answer", directory, "source")
+    assert not manifest.is_fresh("1", "correct", directory, "source")
+    assert not manifest.is_fresh("1", "wrong_answer", directory, "zip")
+    assert not manifest.is_fresh("1", "wrong_answer", tmp_path / "contest_1", "source")
+    assert not manifest.is_fresh("2", None, directory)
+
+    manifest.discard_stale("1", "wrong_answer", "source")
+    assert source.exists()
+    manifest.entries["1"] = entry
+
+    manifest.discard_stale("1", "wrong_answer", "extracted")
+    assert not source.exists()
+    assert "1" not in manifest.entries
@@ -0,0 +1,23 @@
+from domjudge_tool_cli.utils.mirror import ContestMirror
+
+
+def test_contest_mirror_applies_both_feed_formats(tmp_path):
+    mirror = ContestMirror(tmp_path, "1")
+    mirror.apply(
+        {"id": "1", "type": "teams", "op": "create", "data": {"id": "t1", "name": "a"}}
+    )
+    mirror.apply({"token": "2", "type": "teams", "id": "t2", "data": {"id": "t2"}})
+    mirror.apply({"token": "3", "type": "teams", "id": "t1", "data": None})
+    mirror.apply({"token": "4", "type": "problems", "id": None, "data": [{"id": "A"}]})
+    mirror.apply({"token": "5", "type": "state", "id": None, "data": {}})
+    mirror.save()
+
+    restored = ContestMirror(tmp_path, "1").load()
+    assert restored.token == "5"
+    assert restored.objects["teams"] == {"t2": {"id": "t2"}}
+    assert restored.counts() == {
+        "teams": 1,
+        "problems": 1,
+        "submissions": 0,
+        "judgements": 0,
+    }
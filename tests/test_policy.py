@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+
+from domjudge_tool_cli.services.api_client import APIClient
+from domjudge_tool_cli.services.policy import AIMDLimiter, RetryPolicy
+
+
+def test_retry_policy_methods_and_statuses():
+    policy = RetryPolicy(retries=2)
+    bad_gateway = httpx.Response(502)
+    unavailable = httpx.Response(503, headers={"Retry-After": "7"})
+
+    assert policy.should_retry("GET", 0, bad_gateway)
+    assert not policy.should_retry("GET", 2, bad_gateway)
+    assert not policy.should_retry("GET", 0, httpx.Response(404))
+    assert not policy.should_retry("POST", 0, bad_gateway)
+    assert policy.should_retry("POST", 0, unavailable)
+    assert policy.should_retry("POST", 0, error=httpx.ConnectError("refused"))
+    assert not policy.should_retry("POST", 0, error=httpx.ReadTimeout("slow"))
+    assert policy.backoff(0, unavailable) == 7
+    assert 0 <= policy.backoff(3) <= 4
+
+
+def test_aimd_limiter():
+    limiter = AIMDLimiter(max_limit=8, max_latency=1.0)
+    limiter.record(2.0)
+    assert limiter.limit == 4
+    limiter.record(0.1, httpx.Response(200))
+    assert limiter.limit == 4.25
+
+
+def test_api_client_retries_server_errors():
+    responses = iter([httpx.Response(502), httpx.Response(200, json={"ok": 1})])
+
+    async def main():
+        client = httpx.AsyncClient(
+            base_url="http://domjudge.test",
+            transport=httpx.MockTransport(lambda request: next(responses)),
+        )
+        policy = RetryPolicy(retries=1, backoff_factor=0)
+        async with APIClient(
+            "http://domjudge.test", "admin", "admin", retry_policy=policy, client=client
+        ) as api:
+            return await api.get("/api/v4/version")
+
+    assert asyncio.run(main()) == {"ok": 1}
+
+
+def test_streamed_response_holds_limiter_slot_until_closed():
+    limiter = AIMDLimiter(max_limit=2)
+
+    async def main():
+        client = httpx.AsyncClient(
+            base_url="http://domjudge.test",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=b"x" * 10)
+            ),
+        )
+        async with APIClient(
+            "http://domjudge.test", "admin", "admin", limiter=limiter, client=client
+        ) as api:
+            chunks = []
+            async for chunk in api.stream_file("/api/v4/file"):
+                assert limiter.in_flight == 1
+                chunks.append(chunk)
+            assert limiter.in_flight == 0
+
+            await api.get_file("/api/v4/file")
+            assert limiter.in_flight == 0
+            return b"".join(chunks)
+
+    assert asyncio.run(main()) == b"x" * 10
@@ -0,0 +1,37 @@
+import asyncio
+
+from domjudge_tool_cli.utils.pool import run_pool
+
+
+def test_run_pool_keeps_order_and_collects_errors():
+    running = 0
+    peak = 0
+    done = []
+
+    async def worker(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 * (5 - item % 5))
+        running -= 1
+        if item == 3:
+            raise ValueError(item)
+        return item * 2
+
+    result = asyncio.run(run_pool(range(10), worker, 3, on_done=done.append))
+
+    assert peak == 3
+    assert sorted(done) == list(range(10))
+    assert result.results == [0, 2, 4, None, 8, 10, 12, 14, 16, 18]
+    assert [(it.index, it.item) for it in result.errors] == [(3, 3)]
+    assert result.succeeded == 9
+
+
+def test_run_pool_empty():
+    async def worker(item):
+        return item
+
+    result = asyncio.run(run_pool([], worker))
+
+    assert result.results == []
+    assert result.errors == []
@@ -0,0 +1,158 @@
+import csv
+import json
+
+import pytest
+import typer
+from openpyxl import load_workbook
+
+from domjudge_tool_cli.commands.scoreboard._scoreboard import (
+    ScoreboardExportFormat,
+    diff_scoreboards,
+    parse_contest_ids,
+    scoreboard_rows,
+    write_scoreboard,
+    write_workbook,
+)
+from domjudge_tool_cli.models import Problem, Scoreboard, Team
+
+
+def make_problem(ordinal, label):
+    return Problem(
+        ordinal=ordinal,
+        id=label.lower(),
+        short_name=label,
+        label=label,
+        time_limit=1,
+        externalid=label,
+        name=label,
+        test_data_count=1,
+    )
+
+
+def make_team(id, name, affiliation=None):
+    return Team(group_ids=["3"], id=id, name=name, affiliation=affiliation)
+
+
+SCOREBOARD = Scoreboard(
+    rows=[
+        {
+            "rank": 1,
+            "team_id": "1",
+            "score": {"num_solved": 1, "total_time": 40},
+            "problems": [
+                {
+                    "label": "A",
+                    "problem_id": "a",
+                    "num_judged": 2,
+                    "solved": True,
+                    "time": 20,
+                },
+                {"label": "B", "problem_id": "b", "num_judged": 1, "num_pending": 1},
+            ],
+        },
+        {
+            "rank": 2,
+            "team_id": "2",
+            "score": {"num_solved": 0, "total_time": 0},
+            "problems": [],
+        },
+    ]
+)
+
+
+def test_scoreboard_rows():
+    rows = list(
+        scoreboard_rows(
+            SCOREBOARD,
+            [make_team("1", "team1", "NTUB"), make_team("2", "team2")],
+            [make_problem(2, "B"), make_problem(1, "A")],
+        )
+    )
+
+    assert rows == [
+        ["Rank", "TeamAffiliation", "TeamName", "SolvedCount", "Score", "A", "B"],
+        [1, "NTUB", "team1", 1, 40, "20/2 tries", "2 tries"],
+        [2, "", "team2", 0, 0, "", ""],
+        ["", "", "", 1, "", "1/1/0/20", "0/1/1/n/a"],
+    ]
+
+
+def test_write_scoreboard_formats(tmp_path):
+    rows = [["Rank", "TeamName"], [1, "team1"], [2, "team2"]]
+
+    write_scoreboard(rows, tmp_path / "s.csv", ScoreboardExportFormat.CSV)
+    with open(tmp_path / "s.csv", newline="") as f:
+        assert list(csv.reader(f)) == [
+            ["Rank", "TeamName"],
+            ["1", "team1"],
+            ["2", "team2"],
+        ]
+
+    write_scoreboard(iter(rows), tmp_path / "s.json", ScoreboardExportFormat.JSON)
+    with open(tmp_path / "s.json") as f:
+        assert json.load(f) == [
+            {"Rank": 1, "TeamName": "team1"},
+            {"Rank": 2, "TeamName": "team2"},
+        ]
+
+    write_scoreboard(rows, tmp_path / "s.xlsx", ScoreboardExportFormat.XLSX)
+    sheet = load_workbook(tmp_path / "s.xlsx")["Scoreboard"]
+    assert [list(it) for it in sheet.values] == rows
+
+
+def test_diff_scoreboards():
+    teams = {"1": make_team("1", "team1"), "2": make_team("2", "team2")}
+    problems = {"a": make_problem(1, "A"), "b": make_problem(2, "B")}
+    new = Scoreboard(
+        contest_time="1:00:00",
+        rows=[
+            {
+                "rank": 1,
+                "team_id": "2",
+                "score": {"num_solved": 1, "total_time": 30},
+                "problems": [
+                    {"problem_id": "a", "num_judged": 1, "solved": True, "time": 30}
+                ],
+            },
+            {
+                "rank": 2,
+                "team_id": "1",
+                "score": {"num_solved": 1, "total_time": 40},
+                "problems": SCOREBOARD.rows[0].problems[:1]
+                + [{"label": "B", "problem_id": "b", "num_judged": 2}],
+            },
+            {"rank": 3, "team_id": "3", "score": {}, "problems": []},
+        ],
+    )
+
+    assert diff_scoreboards(None, new, teams, problems) == []
+    changes = diff_scoreboards(SCOREBOARD, new, teams, problems)
+    assert [(it["type"], it["team_id"]) for it in changes] == [
+        ("rank", "2"),
+        ("solve", "2"),
+        ("rank", "1"),
+        ("attempt", "1"),
+        ("team", "3"),
+    ]
+    assert changes[1]["problem"] == "A"
+    assert changes[2]["from"] == 1 and changes[2]["to"] == 2
+    assert changes[3]["judged"] == 2 and changes[3]["pending"] == 0
+    assert diff_scoreboards(new, new, teams, problems) == []
+
+
+def test_parse_contest_ids():
+    assert parse_contest_ids(["3", "5-7,9", "6", ""]) == ["3", "5", "6", "7", "9"]
+    with pytest.raises(typer.BadParameter):
+        parse_contest_ids(["5-x"])
+
+
+def test_write_workbook_sheet_per_contest(tmp_path):
+    file_path = tmp_path / "all.xlsx"
+    write_workbook(
+        [("wk1", [["Rank"], [1]]), ("Week 2: final [A/B]" * 2, [["Rank"]])],
+        str(file_path),
+    )
+
+    workbook = load_workbook(file_path)
+    assert workbook.sheetnames == ["wk1", "Week 2_ final _A_B_Week 2_ fina"]
+    assert [list(it) for it in workbook["wk1"].values] == [["Rank"], [1]]
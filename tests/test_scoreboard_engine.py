@@ -0,0 +1,224 @@
+import asyncio
+import time
+
+from domjudge_tool_cli.commands.scoreboard._scoreboard import (
+    frame_times,
+    load_contest,
+    scoreboard_frames,
+)
+from domjudge_tool_cli.models import (
+    Contest,
+    DomServerClient,
+    Group,
+    Judgement,
+    JudgementType,
+    Submission,
+)
+from domjudge_tool_cli.utils.scoreboard import ScoreboardEngine, ScoreboardTimeline
+from domjudge_tool_cli.utils.store import ContestStore
+
+from .test_scoreboard import make_problem, make_team
+
+JUDGEMENT_TYPES = [
+    JudgementType(id="AC", name="correct", penalty=False, solved=True),
+    JudgementType(id="WA", name="wrong answer", penalty=True, solved=False),
+    JudgementType(id="CE", name="compiler error", penalty=False, solved=False),
+]
+
+
+def make_submission(id, team_id, problem_id, contest_time):
+    return Submission(
+        id=id,
+        team_id=team_id,
+        problem_id=problem_id,
+        contest_time=contest_time,
+    )
+
+
+def make_judgement(id, submission_id, judgement_type_id, valid=True, end=None):
+    return Judgement(
+        id=id,
+        submission_id=submission_id,
+        judgement_type_id=judgement_type_id,
+        valid=valid,
+        end_contest_time=end,
+    )
+
+
+def make_engine(**kwargs):
+    teams = [make_team("1", "team1"), make_team("2", "team2"), make_team("3", "team3")]
+    problems = [make_problem(1, "B"), make_problem(0, "A")]
+    return ScoreboardEngine(teams, problems, JUDGEMENT_TYPES, **kwargs)
+
+
+SUBMISSIONS = [
+    make_submission("1", "1", "a", "0:10:00.000"),
+    make_submission("2", "1", "a", "0:20:30.000"),
+    make_submission("3", "2", "a", "0:15:00.000"),
+    make_submission("4", "2", "b", "0:25:00.000"),
+    make_submission("5", "3", "b", "0:15:40.000"),
+    make_submission("6", "1", "b", "0:40:00.000"),
+]
+
+JUDGEMENTS = [
+    make_judgement("1", "1", "WA"),
+    make_judgement("2", "2", "AC"),
+    make_judgement("3", "3", "AC"),
+    make_judgement("4", "4", "CE"),
+    make_judgement("5", "5", "AC"),
+]
+
+
+def test_penalty_and_pending():
+    scoreboard = make_engine().load(SUBMISSIONS, JUDGEMENTS).scoreboard()
+
+    assert [it.team_id for it in scoreboard.rows] == ["2", "3", "1"]
+    assert [it.rank for it in scoreboard.rows] == [1, 1, 3]
+    team1 = scoreboard.rows[2]
+    assert (team1.score.num_solved, team1.score.total_time) == (1, 40)
+    assert [it.label for it in team1.problems] == ["A", "B"]
+    assert team1.problems[0].num_judged == 2
+    assert team1.problems[1].num_pending == 1
+    # A compiler error is neither a try nor a penalty.
+    assert scoreboard.rows[0].problems[1].num_judged == 0
+    assert scoreboard.rows[0].problems[0].first_to_solve
+    assert not team1.problems[0].first_to_solve
+
+
+def test_tie_broken_by_last_solve():
+    engine = make_engine(penalty_minutes=5)
+    engine.load(SUBMISSIONS, JUDGEMENTS)
+    assert [engine.rank(it) for it in ["1", "2", "3"]] == [3, 1, 1]
+
+    engine.apply_judgement(make_judgement("6", "6", "AC"))
+    # 2 solved in 25 + 40 minutes beats 1 solved in 15 minutes.
+    assert [engine.rank(it) for it in ["1", "2", "3"]] == [1, 2, 2]
+
+
+def test_rejudge_last_valid_judgement_wins():
+    engine = make_engine().load(SUBMISSIONS, JUDGEMENTS)
+
+    engine.apply_judgement(make_judgement("7", "3", "WA"))
+    engine.apply_judgement(make_judgement("8", "3", "AC", valid=False))
+
+    row = next(it for it in engine.scoreboard().rows if it.team_id == "2")
+    assert row.score.num_solved == 0
+    assert row.problems[0].num_judged == 1
+    assert engine.rank("2") == 3
+
+
+def test_exclude_teams_and_ignore_problems():
+    engine = make_engine(exclude_teams=["3"], ignore_problems=["B"])
+    scoreboard = engine.load(SUBMISSIONS, JUDGEMENTS).scoreboard()
+
+    assert [it.team_id for it in scoreboard.rows] == ["2", "1"]
+    assert [[it.label for it in row.problems] for row in scoreboard.rows] == [
+        ["A"],
+        ["A"],
+    ]
+
+
+def test_hidden_groups_left_out():
+    teams = [make_team("1", "team1"), make_team("2", "team2"), make_team("3", "team3")]
+    teams[1].group_ids = ["4"]
+    teams[2].group_ids = ["3", "4"]
+    groups = [
+        Group(id="3", name="Participants"),
+        Group(id="4", name="Observers", hidden=True),
+    ]
+    engine = ScoreboardEngine(
+        teams, [make_problem(0, "A")], JUDGEMENT_TYPES, groups=groups
+    )
+    scoreboard = engine.load(SUBMISSIONS, JUDGEMENTS).scoreboard()
+
+    assert [it.team_id for it in scoreboard.rows] == ["1", "3"]
+    assert [it.rank for it in scoreboard.rows] == [1, 2]
+
+
+def test_too_late_submissions_ignored():
+    # The contest ends at 0:20:30, submission 2 is too late.
+    engine = make_engine(contest_end=1230)
+    scoreboard = engine.load(SUBMISSIONS, JUDGEMENTS).scoreboard()
+
+    team1 = next(it for it in scoreboard.rows if it.team_id == "1")
+    assert team1.score.num_solved == 0
+    assert [(it.num_judged, it.num_pending) for it in team1.problems] == [
+        (1, 0),
+        (0, 0),
+    ]
+
+
+def test_timeline_frames_match_full_replay():
+    judgements = [
+        make_judgement(it.id, it.submission_id, it.judgement_type_id, end=end)
+        for it, end in zip(
+            JUDGEMENTS,
+            ["0:11:00", "0:21:00", "0:50:00", "0:25:10", "0:16:00"],
+        )
+    ]
+    # Still judging, the submission stays pending.
+    judgements.append(make_judgement("6", "6", "AC"))
+    timeline = ScoreboardTimeline(make_engine(), SUBMISSIONS, judgements)
+    assert timeline.end_time == 3000
+
+    frames = dict(timeline.frames([2400, 600, 1200, 3000]))
+    assert [row.score.num_solved for row in frames[600].rows] == [0, 0, 0]
+    assert frames[1200].rows[0].team_id == "3"
+    assert [it.num_pending for it in frames[1200].rows[2].problems] == [1, 0]
+    assert frames[2400].contest_time == "0:40:00.000"
+    assert [it.team_id for it in frames[3000].rows] == ["2", "3", "1"]
+    assert frames[3000].rows[2].problems[1].num_pending == 1
+
+    # Seeking back replays from the start.
+    assert timeline.at(1200) == frames[1200]
+    assert timeline.at(3000) == frames[3000]
+
+
+CLIENT = DomServerClient(host="http://dj.example.com", username="a", password="b")
+
+
+def make_store(tmp_path):
+    """A synced contest store of team1 with a rejected try then a solve."""
+    db = str(tmp_path / "contest.sqlite3")
+    with ContestStore(db) as store:
+        store.save_contest(Contest(id="1", shortname="c", name="c", penalty_time=5))
+        store.save_teams("1", [make_team("1", "team1")])
+        store.save_problems("1", [make_problem(0, "A")])
+        store.save_judgement_types("1", JUDGEMENT_TYPES)
+        store.save_submissions("1", SUBMISSIONS[:2])
+        store.save_judgements("1", JUDGEMENTS[:2])
+        with store.db:
+            store.db.execute(
+                "INSERT INTO contests (cid, synced_at) VALUES (?, ?)",
+                ("1", time.time()),
+            )
+    return db
+
+
+def test_load_contest_penalty_time(tmp_path):
+    db = make_store(tmp_path)
+
+    def total_time(penalty_minutes=None):
+        engine, submissions, judgements = asyncio.run(
+            load_contest(CLIENT, "1", db, penalty_minutes)
+        )
+        return (
+            engine.load(submissions, judgements).scoreboard().rows[0].score.total_time
+        )
+
+    assert total_time() == 20 + 5
+    assert total_time(0) == 20
+
+
+def test_frames_named_by_second(tmp_path):
+    assert frame_times(1230.4, [615, 645.2]) == [615, 645]
+    assert frame_times(1230.4, every=10) == [0, 600, 1200, 1230]
+
+    db = make_store(tmp_path)
+    file_paths = asyncio.run(
+        scoreboard_frames(CLIENT, "1", str(tmp_path / "board"), times=[615, 645], db=db)
+    )
+    assert [it.rsplit("/", 1)[-1] for it in file_paths] == [
+        "board-00615.csv",
+        "board-00645.csv",
+    ]
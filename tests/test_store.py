@@ -0,0 +1,116 @@
+from domjudge_tool_cli.commands.submissions._submissions import (
+    SubmissionFilters,
+    print_submissions_table,
+    verdict_mapping,
+)
+from domjudge_tool_cli.commands.users._users import print_users_table
+from domjudge_tool_cli.models import (
+    Contest,
+    Group,
+    Judgement,
+    JudgementType,
+    Submission,
+)
+from domjudge_tool_cli.utils.contest_time import parse_contest_time
+from domjudge_tool_cli.utils.store import ContestStore, current_judgements, verdict_name
+
+
+def test_parse_contest_time():
+    assert parse_contest_time("1:02:03.500") == 3723.5
+    assert parse_contest_time("-0:10:00.000") == -600.0
+    assert parse_contest_time(None) is None
+
+
+def test_contest_store_filters_by_current_verdict(tmp_path):
+    submissions = [
+        Submission(
+            id=str(i), team_id=str(i % 2), problem_id="A", contest_time=f"0:{i:02d}:00"
+        )
+        for i in range(1, 5)
+    ]
+    judgements = [
+        Judgement(id="1", submission_id="1", judgement_type_id="WA", valid=True),
+        Judgement(id="2", submission_id="2", judgement_type_id="AC", valid=True),
+        # A valid rejudge changes submission 1, an invalid one does not change 2.
+        Judgement(id="3", submission_id="1", judgement_type_id="AC", valid=True),
+        Judgement(id="4", submission_id="2", judgement_type_id="WA", valid=False),
+    ]
+    judgement_types = [
+        JudgementType(id="AC", name="correct", penalty=False, solved=True),
+        JudgementType(id="WA", name="wrong answer", penalty=True, solved=False),
+    ]
+
+    with ContestStore(tmp_path / "contest.sqlite3") as store:
+        store.save_submissions("1", submissions)
+        store.save_judgements("1", judgements)
+        store.save_judgement_types("1", judgement_types)
+
+        assert store.judgement_mapping("1") == {"1": "correct", "2": "correct"}
+        assert [it.id for it in store.submissions("1", verdict="AC")] == ["1", "2"]
+        assert [it.id for it in store.submissions("1", verdict="correct")] == [
+            "1",
+            "2",
+        ]
+        assert [it.id for it in store.submissions("1", team_id="0", since=180)] == ["4"]
+        assert store.submissions("2") == []
+
+
+def test_contest_store_contest_and_groups(tmp_path):
+    contest = Contest(id="1", shortname="demo", name="Demo", duration="5:00:00.000")
+    groups = [
+        Group(id="3", name="Participants"),
+        Group(id="4", name="Observers", hidden=True),
+    ]
+
+    with ContestStore(tmp_path / "contest.sqlite3") as store:
+        store.save_contest(contest)
+        store.save_groups("1", groups)
+
+        assert store.contest("1") == contest
+        assert store.contest("2") is None
+        assert store.groups("1") == groups
+        assert store.groups("2") == []
+
+
+def test_api_filters_match_contest_store(tmp_path):
+    submissions = [
+        Submission(
+            id=str(i), team_id=str(i % 2), problem_id="A", contest_time=f"0:{i:02d}:00"
+        )
+        for i in range(1, 6)
+    ]
+    judgements = [
+        Judgement(id="1", submission_id="1", judgement_type_id="WA", valid=True),
+        Judgement(id="2", submission_id="2", judgement_type_id="AC", valid=True),
+        Judgement(id="3", submission_id="1", judgement_type_id="AC", valid=True),
+        # An invalid rejudge after the valid one is not the current verdict.
+        Judgement(id="4", submission_id="2", judgement_type_id="WA", valid=False),
+        Judgement(id="5", submission_id="3", judgement_type_id="WA", valid=False),
+    ]
+    judgement_types = [
+        JudgementType(id="AC", name="correct", penalty=False, solved=True),
+        JudgementType(id="WA", name="wrong answer", penalty=True, solved=False),
+    ]
+    current = current_judgements(judgements)
+    verdicts = {it.id: verdict_name(it) for it in judgement_types}
+
+    with ContestStore(tmp_path / "contest.sqlite3") as store:
+        store.save_submissions("1", submissions)
+        store.save_judgements("1", judgements)
+        store.save_judgement_types("1", judgement_types)
+
+        assert verdict_mapping(current, verdicts) == store.judgement_mapping("1")
+        for filters in [
+            SubmissionFilters(verdict="AC"),
+            SubmissionFilters(verdict="wrong_answer"),
+            SubmissionFilters(team_id="1", since="0:02:00", until="0:05:00"),
+        ]:
+            assert [it.id for it in filters.apply(submissions, current, verdicts)] == [
+                it.id for it in store.submissions("1", **filters.query())
+            ]
+
+
+def test_empty_tables(capsys):
+    print_submissions_table([])
+    print_users_table([])
+    assert capsys.readouterr().out == "No submissions.\nNo users.\n"
@@ -0,0 +1,122 @@
+import asyncio
+import base64
+import io
+import zipfile
+
+import httpx
+
+from domjudge_tool_cli.services.api.v4 import SubmissionsAPI
+from domjudge_tool_cli.services.api.v4 import submissions as submissions_module
+from domjudge_tool_cli.services.cache import SubmissionFileCache
+
+
+def make_archive(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+def make_api(handler):
+    client = httpx.AsyncClient(
+        base_url="http://domjudge.example.com",
+        transport=httpx.MockTransport(handler),
+    )
+    return SubmissionsAPI(
+        "http://domjudge.example.com", "admin", "admin", client=client
+    )
+
+
+def test_submission_files_extract_past_memory_size(tmp_path, monkeypatch):
+    source = b"print(1)\n" * 1000
+    archive = make_archive({"main.py": source})
+    monkeypatch.setattr(submissions_module, "ARCHIVE_MEMORY_SIZE", 1024)
+
+    async def run():
+        api = make_api(lambda request: httpx.Response(200, content=archive))
+        return await api.submission_files(
+            "1",
+            "7",
+            "team1",
+            str(tmp_path),
+            is_extract=True,
+        )
+
+    output_path = asyncio.run(run())
+
+    assert output_path == str(tmp_path / "team1_7.py")
+    assert (tmp_path / "team1_7.py").read_bytes() == source
+
+
+def test_submission_sources_keep_nested_paths(tmp_path):
+    sources = {
+        "a/Main.java": b"class A {}",
+        "b/Main.java": b"class B {}",
+        "../escape.txt": b"x",
+        "/etc/passwd": b"x",
+    }
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            json=[
+                {
+                    "id": str(index),
+                    "submission_id": "7",
+                    "filename": name,
+                    "source": base64.b64encode(content).decode(),
+                }
+                for index, (name, content) in enumerate(sources.items())
+            ],
+        )
+
+    async def run(file_cache):
+        api = make_api(handler)
+        api.file_cache = file_cache
+        return await api.submission_sources("1", "7", "team1", str(tmp_path / "out"))
+
+    for file_cache in [None, SubmissionFileCache(tmp_path / "cache")]:
+        output_path = tmp_path / "out" / "team1_7"
+        assert asyncio.run(run(file_cache)) == str(output_path)
+        assert (output_path / "a" / "Main.java").read_bytes() == b"class A {}"
+        assert (output_path / "b" / "Main.java").read_bytes() == b"class B {}"
+        written = [
+            it.relative_to(output_path).as_posix()
+            for it in output_path.rglob("*")
+            if it.is_file()
+        ]
+        assert sorted(written) == ["a/Main.java", "b/Main.java"]
+        assert not (tmp_path / "escape.txt").exists()
+
+
+def test_cached_archive_streamed_into_blobs(tmp_path):
+    source = b"print(1)\n" * 1000
+    archive = make_archive({"main.py": source, "lib/util.py": b"x = 1\n"})
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        return httpx.Response(200, content=archive)
+
+    async def run(file_cache):
+        api = make_api(handler)
+        api.file_cache = file_cache
+        output_path = await api.submission_files(
+            "1",
+            "7",
+            "team1",
+            str(tmp_path / "out"),
+            is_extract=True,
+        )
+        return output_path, await api.source_files("1", "7")
+
+    with SubmissionFileCache(tmp_path / "cache") as file_cache:
+        output_path, source_files = asyncio.run(run(file_cache))
+        blobs = list((tmp_path / "cache" / "blobs").rglob("*"))
+
+    assert output_path == str(tmp_path / "out" / "team1_7.py")
+    assert (tmp_path / "out" / "team1_7.py").read_bytes() == source
+    assert source_files == [("main.py", source), ("lib/util.py", b"x = 1\n")]
+    assert len(requests) == 1
+    assert not [it for it in blobs if it.suffix == ".tmp"]
@@ -0,0 +1,53 @@
+import asyncio
+import os
+import stat
+
+import httpx
+
+from domjudge_tool_cli.services.web import v8
+
+
+def test_cookie_jar_reused_across_clients(tmp_path):
+    state = {"logins": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/login":
+            if request.method == "GET":
+                return httpx.Response(200, text='<input name="_csrf_token" value="t">')
+            state["logins"] += 1
+            return httpx.Response(
+                302,
+                headers={"location": "/jury", "set-cookie": "PHPSESSID=s1; path=/"},
+            )
+        if "PHPSESSID=s1" not in request.headers.get("cookie", ""):
+            return httpx.Response(302, headers={"location": "/login"})
+        return httpx.Response(200, text="jury")
+
+    jar = tmp_path / "domserver.cookies.json"
+
+    async def run(username="admin"):
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler),
+            base_url="http://domjudge.test",
+        )
+        web = v8.DomServerWeb(
+            "http://domjudge.test",
+            username,
+            "pass",
+            client=client,
+            cookie_jar=jar,
+        )
+        await web.ensure_login()
+        await client.aclose()
+
+    asyncio.run(run())
+    asyncio.run(run())
+    assert state["logins"] == 1
+    assert stat.S_IMODE(os.stat(jar).st_mode) == 0o600
+
+    asyncio.run(run("other"))
+    assert state["logins"] == 2
+
+    os.chmod(jar, 0o644)
+    asyncio.run(run("other"))
+    assert state["logins"] == 3
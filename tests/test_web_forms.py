@@ -0,0 +1,51 @@
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+
+from domjudge_tool_cli.services.web import v8
+
+FORM = (
+    '<form><input name="team[_token]" value="{token}">'
+    '<input name="team[name]" value=""></form>'
+)
+
+
+def test_form_fields_cached_and_token_refreshed():
+    state = {"token": "a", "gets": 0, "posts": []}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            if request.url.path == v8.TeamPath.ADD:
+                state["gets"] += 1
+            return httpx.Response(200, text=FORM.format(token=state["token"]))
+
+        body = parse_qs(request.content.decode())
+        state["posts"].append(body["team[_token]"][0])
+        if body["team[_token]"][0] != state["token"]:
+            return httpx.Response(200, text=FORM.format(token=state["token"]))
+        return httpx.Response(302, headers={"location": "/jury/teams/1"})
+
+    async def run():
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler),
+            base_url="http://domjudge.test",
+        )
+        web = v8.DomServerWeb("http://domjudge.test", "admin", "pass", client=client)
+
+        for name in ("team1", "team2"):
+            data = {**await web.form_fields(v8.TeamPath.ADD), "team[name]": name}
+            res = await web.submit_form(v8.TeamPath.ADD, data)
+            assert res.url.path == "/jury/teams/1"
+
+        state["token"] = "b"
+        data = {**await web.form_fields(v8.TeamPath.ADD), "team[name]": "team3"}
+        res = await web.submit_form(v8.TeamPath.ADD, data)
+        assert res.url.path == "/jury/teams/1"
+        assert (await web.form_fields(v8.TeamPath.ADD))["team[_token]"] == "b"
+        await client.aclose()
+
+    asyncio.run(run())
+
+    assert state["gets"] == 1
+    assert state["posts"] == ["a", "a", "a", "b"]